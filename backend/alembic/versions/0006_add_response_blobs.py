@@ -0,0 +1,122 @@
+"""Add content-addressed response blobs referenced from runs
+
+Revision ID: 0006_add_response_blobs
+Revises: 0005_add_session_group
+Create Date: 2026-10-19 00:00:00
+"""
+
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.utils.compression import compress_text, content_hash, decompress_text
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_add_response_blobs"
+down_revision = "0005_add_session_group"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.create_table(
+        "response_blobs",
+        sa.Column("content_hash", sa.String(length=64), primary_key=True),
+        sa.Column("codec", sa.String(length=8), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("raw_size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("response_hash", sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_evaluation_runs_response_hash",
+            "response_blobs",
+            ["response_hash"],
+            ["content_hash"],
+        )
+        batch_op.create_index("ix_evaluation_runs_response_hash", ["response_hash"])
+
+    _backfill_response_blobs()
+
+
+def _backfill_response_blobs() -> None:
+    bind = op.get_bind()
+    runs = sa.table(
+        "evaluation_runs",
+        sa.column("id", sa.String),
+        sa.column("response_body", sa.Text),
+        sa.column("response_hash", sa.String),
+    )
+    blobs = sa.table(
+        "response_blobs",
+        sa.column("content_hash", sa.String),
+        sa.column("codec", sa.String),
+        sa.column("payload", sa.LargeBinary),
+        sa.column("raw_size", sa.Integer),
+        sa.column("created_at", sa.DateTime(timezone=True)),
+    )
+
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(runs.c.id, runs.c.response_body)
+            .where(runs.c.id > last_id, runs.c.response_body.is_not(None), runs.c.response_body != "")
+            .order_by(runs.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        now = datetime.now(timezone.utc)
+        blob_rows = {}
+        for _, text in rows:
+            digest = content_hash(text)
+            if digest not in blob_rows:
+                codec, payload = compress_text(text)
+                blob_rows[digest] = {
+                    "content_hash": digest,
+                    "codec": codec,
+                    "payload": payload,
+                    "raw_size": len(text.encode("utf-8")),
+                    "created_at": now,
+                }
+        bind.execute(
+            pg_insert(blobs).values(list(blob_rows.values())).on_conflict_do_nothing(
+                index_elements=["content_hash"]
+            )
+        )
+        for run_id, text in rows:
+            bind.execute(
+                sa.update(runs)
+                .where(runs.c.id == run_id)
+                .values(response_hash=content_hash(text), response_body=None)
+            )
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            "SELECT r.id, b.codec, b.payload FROM evaluation_runs r "
+            "JOIN response_blobs b ON b.content_hash = r.response_hash"
+        )
+    ).all()
+    for run_id, codec, payload in rows:
+        bind.execute(
+            sa.text("UPDATE evaluation_runs SET response_body = :body WHERE id = :id"),
+            {"body": decompress_text(codec, bytes(payload)), "id": run_id},
+        )
+
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.drop_index("ix_evaluation_runs_response_hash")
+        batch_op.drop_constraint("fk_evaluation_runs_response_hash", type_="foreignkey")
+        batch_op.drop_column("response_hash")
+
+    op.drop_table("response_blobs")
@@ -0,0 +1,35 @@
+"""Store reasoning traces separately from final answers
+
+Revision ID: 0007_add_reasoning_hash
+Revises: 0006_add_response_blobs
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007_add_reasoning_hash"
+down_revision = "0006_add_response_blobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("reasoning_hash", sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_evaluation_runs_reasoning_hash",
+            "response_blobs",
+            ["reasoning_hash"],
+            ["content_hash"],
+        )
+        batch_op.create_index("ix_evaluation_runs_reasoning_hash", ["reasoning_hash"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.drop_index("ix_evaluation_runs_reasoning_hash")
+        batch_op.drop_constraint("fk_evaluation_runs_reasoning_hash", type_="foreignkey")
+        batch_op.drop_column("reasoning_hash")
@@ -0,0 +1,32 @@
+"""Add archive columns to evaluation_tasks
+
+Revision ID: 0008_add_task_archive
+Revises: 0007_add_reasoning_hash
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0008_add_task_archive"
+down_revision = "0007_add_reasoning_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column("archive_path", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("summary_stats", sa.JSON(), nullable=True))
+        batch_op.create_index("ix_evaluation_tasks_updated_at", ["updated_at"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.drop_index("ix_evaluation_tasks_updated_at")
+        batch_op.drop_column("summary_stats")
+        batch_op.drop_column("archive_path")
+        batch_op.drop_column("archived_at")
@@ -0,0 +1,51 @@
+"""Add content-hash keyed dataset registry referenced by tasks
+
+Revision ID: 0009_add_datasets
+Revises: 0008_add_task_archive
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0009_add_datasets"
+down_revision = "0008_add_task_archive"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "datasets",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("file_path", sa.Text(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("records_codec", sa.String(length=8), nullable=False),
+        sa.Column("records_payload", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("content_hash", name="uq_datasets_content_hash"),
+    )
+
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("dataset_id", sa.String(length=36), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_evaluation_tasks_dataset_id",
+            "datasets",
+            ["dataset_id"],
+            ["id"],
+        )
+        batch_op.create_index("ix_evaluation_tasks_dataset_id", ["dataset_id"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.drop_index("ix_evaluation_tasks_dataset_id")
+        batch_op.drop_constraint("fk_evaluation_tasks_dataset_id", type_="foreignkey")
+        batch_op.drop_column("dataset_id")
+
+    op.drop_table("datasets")
@@ -0,0 +1,26 @@
+"""Add failure_reason to evaluation_tasks for asynchronous ingestion
+
+Revision ID: 0010_add_failure_reason
+Revises: 0009_add_datasets
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0010_add_failure_reason"
+down_revision = "0009_add_datasets"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("failure_reason", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.drop_column("failure_reason")
@@ -0,0 +1,32 @@
+"""Add time-to-first-token, throughput and token usage columns to evaluation_runs
+
+Revision ID: 0011_add_run_stream_metrics
+Revises: 0010_add_failure_reason
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0011_add_run_stream_metrics"
+down_revision = "0010_add_failure_reason"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("first_token_ms", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("tokens_per_second", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("prompt_tokens", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("completion_tokens", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.drop_column("completion_tokens")
+        batch_op.drop_column("prompt_tokens")
+        batch_op.drop_column("tokens_per_second")
+        batch_op.drop_column("first_token_ms")
@@ -0,0 +1,44 @@
+"""Add token usage, cost and token budget columns
+
+Revision ID: 0012_add_token_accounting
+Revises: 0011_add_run_stream_metrics
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0012_add_token_accounting"
+down_revision = "0011_add_run_stream_metrics"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("reasoning_tokens", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("cost", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("correction_prompt_tokens", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("correction_completion_tokens", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("correction_cost", sa.Float(), nullable=True))
+
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("token_budget", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("total_tokens", sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column("total_cost", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.drop_column("total_cost")
+        batch_op.drop_column("total_tokens")
+        batch_op.drop_column("token_budget")
+
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.drop_column("correction_cost")
+        batch_op.drop_column("correction_completion_tokens")
+        batch_op.drop_column("correction_prompt_tokens")
+        batch_op.drop_column("cost")
+        batch_op.drop_column("reasoning_tokens")
@@ -0,0 +1,34 @@
+"""Add per-item answer rules and the deciding correction stage per run
+
+Revision ID: 0013_add_deterministic_matching
+Revises: 0012_add_token_accounting
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0013_add_deterministic_matching"
+down_revision = "0012_add_token_accounting"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evaluation_items", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("answer_pattern", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("answer_keywords", sa.Text(), nullable=True))
+
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("correction_stage", sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.drop_column("correction_stage")
+
+    with op.batch_alter_table("evaluation_items", schema=None) as batch_op:
+        batch_op.drop_column("answer_keywords")
+        batch_op.drop_column("answer_pattern")
@@ -0,0 +1,26 @@
+"""Record whether the judge prompt was truncated for a run
+
+Revision ID: 0014_add_correction_prompt_truncated
+Revises: 0013_add_deterministic_matching
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0014_add_correction_prompt_truncated"
+down_revision = "0013_add_deterministic_matching"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("correction_prompt_truncated", sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_runs", schema=None) as batch_op:
+        batch_op.drop_column("correction_prompt_truncated")
@@ -0,0 +1,28 @@
+"""Add the per-task opt-in for hedged agent requests
+
+Revision ID: 0015_add_task_hedge_requests
+Revises: 0014_add_correction_prompt_truncated
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0015_add_task_hedge_requests"
+down_revision = "0014_add_correction_prompt_truncated"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("hedge_requests", sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("evaluation_tasks", schema=None) as batch_op:
+        batch_op.drop_column("hedge_requests")
@@ -1,9 +1,27 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import ThreadedSession, get_db, new_session, open_async_session
 
 
 def get_db_session() -> Generator[Session, None, None]:
     yield from get_db()
+
+
+async def get_async_db_session() -> AsyncGenerator:
+    """Yield a session exposing ``run_sync``: asyncpg-backed when available, threadpool otherwise."""
+    session = open_async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_threaded_db_session() -> AsyncGenerator:
+    """Threadpool session for CPU/file-heavy routes; ``AsyncSession.run_sync`` would run them on the event loop."""
+    session = ThreadedSession(new_session())
+    try:
+        yield session
+    finally:
+        await session.close()
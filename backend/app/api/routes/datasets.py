@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette import status
+
+from app.api.dependencies import get_async_db_session
+from app.db.models.evaluation_task import Dataset
+from app.db.repositories import datasets as dataset_repo
+from app.schemas.evaluation_task import DatasetListResponse, DatasetSchema, PaginationMeta
+
+router = APIRouter(prefix="/datasets", tags=["datasets"])
+
+
+def _to_schema(dataset: Dataset) -> DatasetSchema:
+    return DatasetSchema(
+        dataset_id=dataset.id,
+        filename=dataset.filename,
+        content_hash=dataset.content_hash,
+        row_count=dataset.row_count,
+        created_at=dataset.created_at,
+        last_used_at=dataset.last_used_at,
+    )
+
+
+@router.get("", response_model=DatasetListResponse)
+async def list_datasets(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db=Depends(get_async_db_session),
+) -> DatasetListResponse:
+    datasets, total = await db.run_sync(
+        lambda session: dataset_repo.list_datasets_paginated(session, page=page, page_size=page_size)
+    )
+    return DatasetListResponse(
+        items=[_to_schema(dataset) for dataset in datasets],
+        pagination=PaginationMeta(page=page, page_size=page_size, total=total),
+    )
+
+
+@router.get("/{dataset_id}", response_model=DatasetSchema)
+async def get_dataset(dataset_id: str, db=Depends(get_async_db_session)) -> DatasetSchema:
+    dataset = await db.run_sync(dataset_repo.get_dataset, dataset_id)
+    if dataset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "DATASET_NOT_FOUND", "message": "数据集不存在"},
+        )
+    return _to_schema(dataset)
@@ -1,28 +1,58 @@
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from starlette import status
 
-from app.api.dependencies import get_db_session
-from app.db.models.evaluation_task import TaskStatus
+from app.api.dependencies import get_async_db_session, get_db_session, get_threaded_db_session
+from app.db.session import new_session
+from app.core.config import settings
+from app.db.models.evaluation_task import EvaluationItem, TaskStatus
+from app.db.repositories import comparisons as comparison_repo
 from app.db.repositories import evaluation_tasks as repo
 from app.schemas.evaluation_task import (
+    ComparedItemSchema,
+    ComparisonSummary,
     PaginationMeta,
+    TaskComparisonResponse,
     TaskResultResponse,
     TaskCreateRequest,
     TaskCreateResponse,
+    TaskFromDatasetRequest,
     TaskListItem,
     TaskListResponse,
     EvaluationItemSchema,
     EvaluationRunSchema,
     ExportQueryParams,
 )
-from app.services.task_service import create_evaluation_task, parse_headers
+from app.services.agent_response import split_reasoning
+from app.services.comparison import (
+    build_comparison_summary,
+    ensure_distinct_tasks,
+    iter_comparison_csv,
+    load_comparable_task,
+    normalize_compared_item,
+)
+from app.services.retention import ensure_task_hydrated
+from app.services.task_service import create_evaluation_task, create_task_from_dataset, parse_headers
 from app.services.statistics import CorrectionAggregator
-from app.utils.exporter import build_csv_stream_response, build_xlsx_response
+from app.services.export_cache import get_cached_export, request_export_build
+from app.utils.cached_file import build_cached_file_response
+from app.utils.columnar_export import pyarrow_available
+from app.utils.exporter import (
+    COLUMNAR_FORMATS,
+    EXPORT_MEDIA_TYPES,
+    EXPORT_WRITERS,
+    build_export_stream_response,
+    comparison_content_disposition,
+    export_content_disposition,
+)
+from app.utils.live_progress import get_processed_many, get_progress
+from app.utils.task_events import get_latency_stats, stream_task_events
 
 router = APIRouter(prefix="/evaluation-tasks", tags=["evaluation-tasks"])
 
@@ -40,6 +70,15 @@ def _to_beijing(dt: datetime | None) -> datetime | None:
         return dt
 
 
+def _stream_task_items(task_id: str) -> Iterator[EvaluationItem]:
+    # 导出流在请求会话关闭后才被消费，因此使用独立会话
+    db = new_session()
+    try:
+        yield from repo.iter_items_for_task(db, task_id, batch_size=settings.export_batch_size)
+    finally:
+        db.close()
+
+
 @router.post(
     "",
     status_code=status.HTTP_201_CREATED,
@@ -52,6 +91,8 @@ async def create_task(
     agent_api_headers: str | None = Form(default=None),
     agent_model: str | None = Form(default=None),
     enable_correction: bool = Form(default=False),
+    token_budget: int | None = Form(default=None),
+    hedge_requests: bool = Form(default=False),
     db: Session = Depends(get_db_session),
 ) -> TaskCreateResponse:
     payload = TaskCreateRequest(
@@ -60,17 +101,31 @@ async def create_task(
         agent_api_headers=parse_headers(agent_api_headers),
         agent_model=agent_model,
         enable_correction=enable_correction,
+        token_budget=token_budget,
+        hedge_requests=hedge_requests,
     )
     return await create_evaluation_task(db, payload=payload, dataset_file=dataset_file)
 
 
+@router.post(
+    "/from-dataset",
+    status_code=status.HTTP_201_CREATED,
+    response_model=TaskCreateResponse,
+)
+def create_task_from_registered_dataset(
+    payload: TaskFromDatasetRequest,
+    db: Session = Depends(get_db_session),
+) -> TaskCreateResponse:
+    return create_task_from_dataset(db, payload=payload, dataset_id=payload.dataset_id)
+
+
 @router.get("", response_model=TaskListResponse)
-def list_tasks(
+async def list_tasks(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     status_filter: Optional[List[str]] = Query(None, alias="status"),
     query: Optional[str] = Query(None),
-    db: Session = Depends(get_db_session),
+    db=Depends(get_async_db_session),
 ) -> TaskListResponse:
     if status_filter:
         invalid = set(status_filter) - TaskStatus.ALL
@@ -83,7 +138,7 @@ def list_tasks(
                 },
             )
 
-    tasks, total = repo.list_tasks_paginated(
+    tasks, total = await repo.list_tasks_paginated_async(
         db,
         page=page,
         page_size=page_size,
@@ -91,8 +146,14 @@ def list_tasks(
         query=query,
     )
 
+    # 运行中任务的进度以 Redis 实时计数为准，数据库中只保存周期性检查点
+    live_processed = await run_in_threadpool(
+        get_processed_many, [task.id for task in tasks if task.status == TaskStatus.RUNNING]
+    )
+
     items: List[TaskListItem] = []
     for task in tasks:
+        processed = max(task.progress_processed, live_processed.get(task.id, 0))
         duration_seconds: float | None = None
         if task.completed_at:
             duration_seconds = (task.completed_at - task.created_at).total_seconds()
@@ -103,11 +164,15 @@ def list_tasks(
                 status=task.status,
                 enable_correction=task.enable_correction,
                 accuracy_rate=task.accuracy_rate,
-                progress={"processed": task.progress_processed, "total": task.total_items},
+                progress={"processed": min(processed, task.total_items), "total": task.total_items},
                 created_at=_to_beijing(task.created_at),
                 updated_at=_to_beijing(task.updated_at),
                 completed_at=_to_beijing(task.completed_at),
                 duration_seconds=duration_seconds,
+                archived_at=_to_beijing(task.archived_at),
+                failure_reason=task.failure_reason,
+                total_tokens=task.total_tokens,
+                total_cost=task.total_cost,
             )
         )
 
@@ -115,14 +180,65 @@ def list_tasks(
     return TaskListResponse(items=items, pagination=pagination)
 
 
+@router.get("/{task_id}/events")
+def stream_task_progress(
+    task_id: str,
+    request: Request,
+    db: Session = Depends(get_db_session),
+) -> StreamingResponse:
+    task = repo.get_task(db, task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "TASK_NOT_FOUND", "message": "任务不存在"},
+        )
+
+    live = get_progress(task.id) if task.status == TaskStatus.RUNNING else None
+    snapshot = {
+        "task_id": task.id,
+        "status": task.status,
+        "processed": max(task.progress_processed, live["processed"]) if live else task.progress_processed,
+        "total": task.total_items,
+        "run_status_counts": live["run_status_counts"] if live else None,
+        "latency_stats": get_latency_stats(task.id),
+    }
+    return StreamingResponse(
+        stream_task_events(task.id, snapshot=snapshot, is_disconnected=request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{task_id}/results", response_model=TaskResultResponse)
-def get_task_results(
+async def get_task_results(
     task_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     question_id: str | None = Query(None),
-    db: Session = Depends(get_db_session),
+    include_reasoning: bool = Query(False),
+    db=Depends(get_threaded_db_session),
+) -> TaskResultResponse:
+    # 归档恢复、统计与解压都是阻塞/CPU 工作，固定在线程池会话中执行，不占用事件循环
+    return await db.run_sync(
+        _build_task_results,
+        task_id=task_id,
+        page=page,
+        page_size=page_size,
+        question_id=question_id,
+        include_reasoning=include_reasoning,
+    )
+
+
+def _build_task_results(
+    db: Session,
+    *,
+    task_id: str,
+    page: int,
+    page_size: int,
+    question_id: str | None,
+    include_reasoning: bool,
 ) -> TaskResultResponse:
+    # 在同步会话中完成全部加载与组装，懒加载不会越出 run_sync
     task = repo.get_task(db, task_id)
     if not task:
         raise HTTPException(
@@ -135,19 +251,21 @@ def get_task_results(
             detail={"code": "TASK_NOT_FINISHED", "message": "任务尚未完成"},
         )
 
+    ensure_task_hydrated(db, task)
     items, total = repo.list_task_results_paginated(
         db,
         task_id=task_id,
         page=page,
         page_size=page_size,
         question_id=question_id,
+        include_reasoning=include_reasoning,
     )
 
     aggregator = None
     failure_type_map: dict[str, str] = {}
     if task.enable_correction:
         aggregator = CorrectionAggregator()
-        all_items = repo.list_items_for_task(db, task_id)
+        all_items = repo.list_items_for_task(db, task_id, include_responses=False)
         for full_item in all_items:
             aggregator.observe_item(full_item)
         failure_type_map = dict(aggregator.item_failure_types)
@@ -155,23 +273,40 @@ def get_task_results(
     item_models: List[EvaluationItemSchema] = []
     for item in items:
         runs = sorted(item.runs, key=lambda r: r.run_index)
-        run_models = [
-            EvaluationRunSchema(
-                run_index=run.run_index,
-                status=run.status,
-                response_body=run.response_body,
-                latency_ms=run.latency_ms,
-                error_code=run.error_code,
-                error_message=run.error_message,
-                created_at=_to_beijing(run.created_at),
-                correction_status=getattr(run, "correction_status", None),
-                correction_result=getattr(run, "correction_result", None),
-                correction_reason=getattr(run, "correction_reason", None),
-                correction_error_message=getattr(run, "correction_error_message", None),
-                correction_retries=getattr(run, "correction_retries", None),
+        run_models = []
+        for run in runs:
+            answer, inline_reasoning = split_reasoning(run.response_body)
+            reasoning_body = None
+            if include_reasoning:
+                reasoning_body = run.reasoning_body or inline_reasoning
+            run_models.append(
+                EvaluationRunSchema(
+                    run_index=run.run_index,
+                    status=run.status,
+                    response_body=answer or None,
+                    reasoning_body=reasoning_body,
+                    latency_ms=run.latency_ms,
+                    first_token_ms=run.first_token_ms,
+                    tokens_per_second=run.tokens_per_second,
+                    prompt_tokens=run.prompt_tokens,
+                    completion_tokens=run.completion_tokens,
+                    reasoning_tokens=run.reasoning_tokens,
+                    cost=run.cost,
+                    error_code=run.error_code,
+                    error_message=run.error_message,
+                    created_at=_to_beijing(run.created_at),
+                    correction_status=getattr(run, "correction_status", None),
+                    correction_result=getattr(run, "correction_result", None),
+                    correction_reason=getattr(run, "correction_reason", None),
+                    correction_error_message=getattr(run, "correction_error_message", None),
+                    correction_retries=getattr(run, "correction_retries", None),
+                    correction_prompt_tokens=run.correction_prompt_tokens,
+                    correction_completion_tokens=run.correction_completion_tokens,
+                    correction_cost=run.correction_cost,
+                    correction_stage=run.correction_stage,
+                    correction_prompt_truncated=run.correction_prompt_truncated,
+                )
             )
-            for run in runs
-        ]
         item_models.append(
             EvaluationItemSchema(
                 question_id=item.question_id,
@@ -201,6 +336,10 @@ def get_task_results(
         "completed_at": _to_beijing(task.completed_at),
         "created_at": _to_beijing(task.created_at),
         "updated_at": _to_beijing(task.updated_at),
+        "token_budget": task.token_budget,
+        "hedge_requests": task.hedge_requests,
+        "usage": repo.summarize_task_usage(db, task_id),
+        "correction_stages": repo.correction_stage_counts(db, task_id),
     }
 
     if aggregator:
@@ -218,6 +357,7 @@ def get_task_results(
 @router.get("/{task_id}/export")
 def export_task_results(
     task_id: str,
+    request: Request,
     format: str = Query("csv"),
     include_errors: bool = Query(True),
     db: Session = Depends(get_db_session),
@@ -235,14 +375,98 @@ def export_task_results(
         )
 
     params = ExportQueryParams(format=format, include_errors=include_errors)
-    items = repo.list_items_for_task(db, task_id)
+    fmt = params.format.value
+    if fmt not in EXPORT_WRITERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "UNSUPPORTED_EXPORT_FORMAT", "message": "仅支持 csv、xlsx、jsonl、parquet 或 arrow"},
+        )
+    if fmt in COLUMNAR_FORMATS and not pyarrow_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "EXPORT_FORMAT_UNAVAILABLE", "message": "服务端未安装 pyarrow，无法导出该格式"},
+        )
+
+    cached = get_cached_export(task_id, fmt, params.include_errors)
+    if cached is not None:
+        return build_cached_file_response(
+            request,
+            cached,
+            media_type=EXPORT_MEDIA_TYPES[fmt],
+            headers={"Content-Disposition": export_content_disposition(task, fmt)},
+        )
+
+    ensure_task_hydrated(db, task)
+    # 未命中缓存：后台生成文件供后续下载，本次仍实时流式导出
+    request_export_build(task_id, fmt, params.include_errors)
+    return build_export_stream_response(
+        task, _stream_task_items(task_id), fmt, include_errors=params.include_errors
+    )
+
+
+def _stream_compared_items(
+    base_task_id: str, candidate_task_id: str, *, flipped_only: bool
+) -> Iterator[dict]:
+    db = new_session()
+    try:
+        yield from comparison_repo.iter_compared_items(
+            db,
+            base_task_id,
+            candidate_task_id,
+            flipped_only=flipped_only,
+            batch_size=settings.export_batch_size,
+        )
+    finally:
+        db.close()
+
 
-    if params.format == "csv":
-        return build_csv_stream_response(task, items, include_errors=params.include_errors)
-    if params.format == "xlsx":
-        return build_xlsx_response(task, items, include_errors=params.include_errors)
+@router.get("/{task_id}/compare/{candidate_task_id}", response_model=TaskComparisonResponse)
+def compare_tasks(
+    task_id: str,
+    candidate_task_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+    flipped_only: bool = Query(False),
+    db: Session = Depends(get_db_session),
+) -> TaskComparisonResponse:
+    ensure_distinct_tasks(task_id, candidate_task_id)
+    base = load_comparable_task(db, task_id)
+    candidate = load_comparable_task(db, candidate_task_id)
+    ensure_task_hydrated(db, base)
+    ensure_task_hydrated(db, candidate)
+
+    summary = build_comparison_summary(db, base, candidate)
+    rows, total = comparison_repo.list_compared_items(
+        db,
+        task_id,
+        candidate_task_id,
+        page=page,
+        page_size=page_size,
+        flipped_only=flipped_only,
+    )
+    return TaskComparisonResponse(
+        summary=ComparisonSummary(**summary),
+        items=[ComparedItemSchema(**normalize_compared_item(row)) for row in rows],
+        pagination=PaginationMeta(page=page, page_size=page_size, total=total),
+    )
+
+
+@router.get("/{task_id}/compare/{candidate_task_id}/export")
+def export_task_comparison(
+    task_id: str,
+    candidate_task_id: str,
+    flipped_only: bool = Query(False),
+    db: Session = Depends(get_db_session),
+):
+    ensure_distinct_tasks(task_id, candidate_task_id)
+    base = load_comparable_task(db, task_id)
+    candidate = load_comparable_task(db, candidate_task_id)
+    ensure_task_hydrated(db, base)
+    ensure_task_hydrated(db, candidate)
 
-    raise HTTPException(
-        status_code=status.HTTP_400_BAD_REQUEST,
-        detail={"code": "UNSUPPORTED_EXPORT_FORMAT", "message": "仅支持 csv 或 xlsx"},
+    rows = _stream_compared_items(task_id, candidate_task_id, flipped_only=flipped_only)
+    return StreamingResponse(
+        iter_comparison_csv(rows),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": comparison_content_disposition(base, candidate)},
     )
@@ -4,6 +4,7 @@ import types
 
 try:
     from celery import Celery
+    from celery.signals import worker_init, worker_process_init
 except ModuleNotFoundError:  # pragma: no cover - optional dependency
     Celery = None
 
@@ -15,7 +16,12 @@ if Celery is not None:
         "agent_evaluation",
         broker=str(settings.redis_url),
         backend=str(settings.redis_url),
-        include=["app.services.evaluation_runner"],
+        include=[
+            "app.services.evaluation_runner",
+            "app.services.ingestion",
+            "app.services.retention",
+            "app.services.export_cache",
+        ],
     )
 
     celery_app.conf.update(
@@ -25,9 +31,30 @@ if Celery is not None:
             },
         },
         task_acks_late=True,
+        worker_pool=settings.celery_worker_pool,
         worker_concurrency=settings.evaluation_concurrency,
         task_default_rate_limit=settings.rate_limit_per_agent,
+        beat_schedule={
+            "archive-expired-tasks": {
+                "task": "app.services.retention.archive_expired_tasks_job",
+                "schedule": settings.retention_sweep_interval_seconds,
+            },
+        },
     )
+
+    @worker_init.connect
+    def _configure_worker_engine(**kwargs) -> None:
+        # 线程/协程池不会 fork，在主进程中按并发度重建连接池
+        if settings.celery_worker_pool != "prefork":
+            from app.db.session import configure_worker_engine
+
+            configure_worker_engine()
+
+    @worker_process_init.connect
+    def _reset_engine_after_fork(**kwargs) -> None:
+        from app.db.session import configure_worker_engine
+
+        configure_worker_engine(after_fork=True)
 else:  # pragma: no cover - lightweight fallback for local/unit usage
     class _DummyCelery:
         def __init__(self) -> None:
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import logging
+import time
+from functools import lru_cache
+
+try:
+    import redis
+    from redis import asyncio as redis_asyncio
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    redis = None
+    redis_asyncio = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis 故障时暂停访问的时长（秒），避免每次调用都等待连接超时
+UNAVAILABLE_BACKOFF_SECONDS = 30.0
+
+_unavailable_until = 0.0
+
+
+@lru_cache(maxsize=1)
+def get_redis_client():
+    """Return the process-wide synchronous Redis client, or None if redis is unavailable."""
+    if redis is None:
+        return None
+    return redis.Redis.from_url(
+        str(settings.redis_url),
+        decode_responses=True,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+    )
+
+
+def get_available_redis_client():
+    """Return the Redis client unless a recent failure put it in back-off."""
+    if time.monotonic() < _unavailable_until:
+        return None
+    return get_redis_client()
+
+
+def mark_redis_unavailable(exc: Exception) -> None:
+    global _unavailable_until
+    _unavailable_until = time.monotonic() + UNAVAILABLE_BACKOFF_SECONDS
+    logger.warning("Redis unavailable, pausing live updates for %ss: %s", UNAVAILABLE_BACKOFF_SECONDS, exc)
+
+
+def create_async_redis_client():
+    """Create a new asyncio Redis client; callers own it and must close it."""
+    if redis_asyncio is None:
+        return None
+    return redis_asyncio.Redis.from_url(
+        str(settings.redis_url),
+        decode_responses=True,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+    )
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
+import json
 import uuid
 from datetime import datetime, timezone
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
     Integer,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
@@ -18,15 +21,17 @@ from sqlalchemy import (
 from sqlalchemy.orm import Mapped, relationship
 
 from app.db.session import Base
+from app.utils.compression import decompress_text
 
 
 class TaskStatus:
+    INGESTING = "INGESTING"
     PENDING = "PENDING"
     RUNNING = "RUNNING"
     SUCCEEDED = "SUCCEEDED"
     FAILED = "FAILED"
 
-    ALL = {PENDING, RUNNING, SUCCEEDED, FAILED}
+    ALL = {INGESTING, PENDING, RUNNING, SUCCEEDED, FAILED}
 
 
 class RunStatus:
@@ -59,6 +64,15 @@ class EvaluationTask(Base):
     total_items: Mapped[int] = Column(Integer, nullable=False, default=0)
     progress_processed: Mapped[int] = Column(Integer, nullable=False, default=0)
 
+    # 导入或执行失败时的原因说明，展示给用户
+    failure_reason: Mapped[str | None] = Column(Text, nullable=True)
+    # token 预算为空表示不限；总量与费用在任务结束（或预算耗尽）时汇总写入
+    token_budget: Mapped[int | None] = Column(Integer, nullable=True)
+    # 智能体接口幂等时可开启对冲：慢请求超过历史延迟分位数后再发一份，取先返回者
+    hedge_requests: Mapped[bool] = Column(Boolean, nullable=False, default=False)
+    total_tokens: Mapped[int | None] = Column(BigInteger, nullable=True)
+    total_cost: Mapped[float | None] = Column(Float, nullable=True)
+
     runs_per_item: Mapped[int] = Column(Integer, nullable=False, default=5)
     timeout_seconds: Mapped[float] = Column(Float, nullable=False, default=30.0)
     use_stream: Mapped[bool] = Column(Boolean, nullable=False, default=True)
@@ -71,6 +85,13 @@ class EvaluationTask(Base):
     updated_at: Mapped[datetime] = Column(
         DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
     )
+    dataset_id: Mapped[str | None] = Column(
+        String(36), ForeignKey("datasets.id"), nullable=True, index=True
+    )
+    # 归档后明细数据移至本地压缩文件，仅保留汇总统计
+    archived_at: Mapped[datetime | None] = Column(DateTime(timezone=True), nullable=True)
+    archive_path: Mapped[str | None] = Column(Text, nullable=True)
+    summary_stats: Mapped[dict | None] = Column(JSON, nullable=True)
 
     items: Mapped[list["EvaluationItem"]] = relationship(
         "EvaluationItem",
@@ -95,6 +116,9 @@ class EvaluationItem(Base):
     system_prompt: Mapped[str | None] = Column(Text, nullable=True)
     user_context: Mapped[str | None] = Column(Text, nullable=True)
     session_group: Mapped[str | None] = Column(String(128), nullable=True)
+    # 可选的确定性判定规则：正则命中或包含全部关键词即判为正确，无需调用判定模型
+    answer_pattern: Mapped[str | None] = Column(Text, nullable=True)
+    answer_keywords: Mapped[str | None] = Column(Text, nullable=True)
     is_passed: Mapped[bool | None] = Column(Boolean, nullable=True)
 
     created_at: Mapped[datetime] = Column(
@@ -127,8 +151,23 @@ class EvaluationRun(Base):
     )
     run_index: Mapped[int] = Column(Integer, nullable=False)
     status: Mapped[str] = Column(String(16), nullable=False, default=RunStatus.RETRYING)
-    response_body: Mapped[str | None] = Column(Text, nullable=True)
+    # 历史数据的明文响应；新数据写入 response_blobs，仅保存内容哈希
+    response_text: Mapped[str | None] = Column("response_body", Text, nullable=True)
+    response_hash: Mapped[str | None] = Column(
+        String(64), ForeignKey("response_blobs.content_hash"), nullable=True, index=True
+    )
+    # 推理过程单独压缩存储，按需加载
+    reasoning_hash: Mapped[str | None] = Column(
+        String(64), ForeignKey("response_blobs.content_hash"), nullable=True, index=True
+    )
     latency_ms: Mapped[int | None] = Column(Integer, nullable=True)
+    # 流式调用的首 token 耗时与生成速度；usage 由模型返回，HTTP 智能体通常为空
+    first_token_ms: Mapped[int | None] = Column(Integer, nullable=True)
+    tokens_per_second: Mapped[float | None] = Column(Float, nullable=True)
+    prompt_tokens: Mapped[int | None] = Column(Integer, nullable=True)
+    completion_tokens: Mapped[int | None] = Column(Integer, nullable=True)
+    reasoning_tokens: Mapped[int | None] = Column(Integer, nullable=True)
+    cost: Mapped[float | None] = Column(Float, nullable=True)
     error_code: Mapped[str | None] = Column(String(32), nullable=True)
     error_message: Mapped[str | None] = Column(Text, nullable=True)
     correction_status: Mapped[str] = Column(String(16), nullable=False, default="PENDING")
@@ -136,6 +175,13 @@ class EvaluationRun(Base):
     correction_reason: Mapped[str | None] = Column(Text, nullable=True)
     correction_error_message: Mapped[str | None] = Column(Text, nullable=True)
     correction_retries: Mapped[int] = Column(Integer, nullable=False, default=0)
+    # 给出判定结果的阶段：EXACT/NUMERIC/DATE/PATTERN/KEYWORDS/SIMILARITY 为本地判定，LLM 为模型判定
+    correction_stage: Mapped[str | None] = Column(String(16), nullable=True)
+    # 判定输入超出 CORRECTION_PROMPT_MAX_TOKENS 被截断时为 True
+    correction_prompt_truncated: Mapped[bool | None] = Column(Boolean, nullable=True)
+    correction_prompt_tokens: Mapped[int | None] = Column(Integer, nullable=True)
+    correction_completion_tokens: Mapped[int | None] = Column(Integer, nullable=True)
+    correction_cost: Mapped[float | None] = Column(Float, nullable=True)
 
     created_at: Mapped[datetime] = Column(
         DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
@@ -147,7 +193,88 @@ class EvaluationRun(Base):
     )
 
     item: Mapped["EvaluationItem"] = relationship("EvaluationItem", back_populates="runs")
+    response_blob: Mapped["ResponseBlob | None"] = relationship(
+        "ResponseBlob", foreign_keys=[response_hash], lazy="selectin"
+    )
+    reasoning_blob: Mapped["ResponseBlob | None"] = relationship(
+        "ResponseBlob", foreign_keys=[reasoning_hash], lazy="select"
+    )
 
     __table_args__ = (
         UniqueConstraint("item_id", "run_index", name="uq_evaluation_run"),
     )
+
+    def cache_response_body(self, text: str | None) -> None:
+        """Remember the text just stored under ``response_hash`` so reads skip the blob lookup."""
+        self.__dict__["_cached_response"] = (self.response_hash, text)
+
+    @property
+    def response_body(self) -> str | None:
+        cached = self.__dict__.get("_cached_response")
+        if cached is not None and cached[0] == self.response_hash:
+            return cached[1]
+        if self.response_blob is not None:
+            return self.response_blob.text
+        return self.response_text
+
+    def cache_reasoning_body(self, text: str | None) -> None:
+        """Remember the text just stored under ``reasoning_hash`` so reads skip the blob lookup."""
+        self.__dict__["_cached_reasoning"] = (self.reasoning_hash, text)
+
+    @property
+    def reasoning_body(self) -> str | None:
+        cached = self.__dict__.get("_cached_reasoning")
+        if cached is not None and cached[0] == self.reasoning_hash:
+            return cached[1]
+        if self.reasoning_blob is not None:
+            return self.reasoning_blob.text
+        return None
+
+
+class ResponseBlob(Base):
+    """Content-addressed, compressed agent response shared by all runs with identical output."""
+
+    __tablename__ = "response_blobs"
+
+    content_hash: Mapped[str] = Column(String(64), primary_key=True)
+    codec: Mapped[str] = Column(String(8), nullable=False)
+    payload: Mapped[bytes] = Column(LargeBinary, nullable=False)
+    raw_size: Mapped[int] = Column(Integer, nullable=False)
+    created_at: Mapped[datetime] = Column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    @property
+    def text(self) -> str:
+        cached = self.__dict__.get("_decoded_text")
+        if cached is None:
+            cached = decompress_text(self.codec, self.payload)
+            self.__dict__["_decoded_text"] = cached
+        return cached
+
+
+class Dataset(Base):
+    """Uploaded dataset registered once by content hash and shared by the tasks that use it."""
+
+    __tablename__ = "datasets"
+
+    id: Mapped[str] = Column(String(36), primary_key=True, default=generate_uuid, unique=True)
+    content_hash: Mapped[str] = Column(String(64), nullable=False)
+    filename: Mapped[str] = Column(String(255), nullable=False)
+    file_path: Mapped[str] = Column(Text, nullable=False)
+    row_count: Mapped[int] = Column(Integer, nullable=False)
+    # 解析后的记录以压缩 JSON 保存，复用时无需再次用 pandas 解析
+    records_codec: Mapped[str] = Column(String(8), nullable=False)
+    records_payload: Mapped[bytes] = Column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = Column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    last_used_at: Mapped[datetime] = Column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (UniqueConstraint("content_hash", name="uq_datasets_content_hash"),)
+
+    @property
+    def records(self) -> list[dict]:
+        return json.loads(decompress_text(self.records_codec, self.records_payload))
@@ -0,0 +1,165 @@
+"""SQL-side joins between two tasks' items, matched on ``question_id``.
+
+Per-item run statistics are aggregated inside Postgres and joined through the
+``(task_id, question_id)`` unique index, so comparisons never load either task's
+items into Python beyond the requested page.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import and_, case, distinct, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models.evaluation_task import EvaluationItem, EvaluationRun, RunStatus
+
+CHANGE_REGRESSION = "REGRESSION"
+CHANGE_IMPROVEMENT = "IMPROVEMENT"
+CHANGE_UNCHANGED = "UNCHANGED"
+CHANGE_UNKNOWN = "UNKNOWN"
+
+
+def _item_stats(task_id: str, name: str):
+    """Per-item aggregate of a task's runs: mean latency, failed runs and error codes."""
+    return (
+        select(
+            EvaluationItem.question_id.label("question_id"),
+            EvaluationItem.row_index.label("row_index"),
+            EvaluationItem.is_passed.label("is_passed"),
+            func.avg(EvaluationRun.latency_ms).label("avg_latency_ms"),
+            func.count(EvaluationRun.id)
+            .filter(EvaluationRun.status != RunStatus.SUCCEEDED)
+            .label("failed_runs"),
+            func.array_remove(func.array_agg(distinct(EvaluationRun.error_code)), None).label("error_codes"),
+        )
+        .select_from(EvaluationItem)
+        .outerjoin(EvaluationRun, EvaluationRun.item_id == EvaluationItem.id)
+        .where(EvaluationItem.task_id == task_id)
+        .group_by(EvaluationItem.id)
+        .subquery(name)
+    )
+
+
+def _joined(base_task_id: str, candidate_task_id: str):
+    base = _item_stats(base_task_id, "base")
+    candidate = _item_stats(candidate_task_id, "candidate")
+    return base, candidate, base.join(candidate, base.c.question_id == candidate.c.question_id)
+
+
+def _change_expr(base, candidate):
+    return case(
+        (and_(base.c.is_passed.is_(True), candidate.c.is_passed.is_(False)), CHANGE_REGRESSION),
+        (and_(base.c.is_passed.is_(False), candidate.c.is_passed.is_(True)), CHANGE_IMPROVEMENT),
+        (and_(base.c.is_passed.is_not(None), candidate.c.is_passed.is_not(None)), CHANGE_UNCHANGED),
+        else_=CHANGE_UNKNOWN,
+    )
+
+
+def _items_stmt(base_task_id: str, candidate_task_id: str, *, flipped_only: bool):
+    base, candidate, joined = _joined(base_task_id, candidate_task_id)
+    change = _change_expr(base, candidate)
+    stmt = (
+        select(
+            base.c.question_id,
+            base.c.row_index,
+            base.c.is_passed.label("base_passed"),
+            candidate.c.is_passed.label("candidate_passed"),
+            change.label("change"),
+            base.c.avg_latency_ms.label("base_latency_ms"),
+            candidate.c.avg_latency_ms.label("candidate_latency_ms"),
+            (candidate.c.avg_latency_ms - base.c.avg_latency_ms).label("latency_delta_ms"),
+            base.c.failed_runs.label("base_failed_runs"),
+            candidate.c.failed_runs.label("candidate_failed_runs"),
+            base.c.error_codes.label("base_error_codes"),
+            candidate.c.error_codes.label("candidate_error_codes"),
+        )
+        .select_from(joined)
+        .order_by(base.c.row_index)
+    )
+    if flipped_only:
+        stmt = stmt.where(change.in_([CHANGE_REGRESSION, CHANGE_IMPROVEMENT]))
+    return stmt
+
+
+def list_compared_items(
+    db: Session,
+    base_task_id: str,
+    candidate_task_id: str,
+    *,
+    page: int,
+    page_size: int,
+    flipped_only: bool = False,
+) -> tuple[List[Dict[str, Any]], int]:
+    stmt = _items_stmt(base_task_id, candidate_task_id, flipped_only=flipped_only)
+    total = db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())) or 0
+    rows = db.execute(stmt.offset((page - 1) * page_size).limit(page_size)).mappings().all()
+    return [dict(row) for row in rows], total
+
+
+def iter_compared_items(
+    db: Session,
+    base_task_id: str,
+    candidate_task_id: str,
+    *,
+    flipped_only: bool = False,
+    batch_size: int = 1000,
+) -> Iterator[Dict[str, Any]]:
+    stmt = _items_stmt(base_task_id, candidate_task_id, flipped_only=flipped_only).execution_options(
+        yield_per=batch_size
+    )
+    for row in db.execute(stmt).mappings():
+        yield dict(row)
+
+
+def summarize_comparison(db: Session, base_task_id: str, candidate_task_id: str) -> Dict[str, Any]:
+    base, candidate, joined = _joined(base_task_id, candidate_task_id)
+    evaluated = and_(base.c.is_passed.is_not(None), candidate.c.is_passed.is_not(None))
+    latency_delta = candidate.c.avg_latency_ms - base.c.avg_latency_ms
+    row = db.execute(
+        select(
+            func.count().label("matched"),
+            func.count().filter(evaluated).label("evaluated"),
+            func.count().filter(evaluated, base.c.is_passed.is_(True)).label("base_passed"),
+            func.count().filter(evaluated, candidate.c.is_passed.is_(True)).label("candidate_passed"),
+            func.count()
+            .filter(base.c.is_passed.is_(True), candidate.c.is_passed.is_(False))
+            .label("regressions"),
+            func.count()
+            .filter(base.c.is_passed.is_(False), candidate.c.is_passed.is_(True))
+            .label("improvements"),
+            func.avg(latency_delta).label("mean_latency_delta_ms"),
+            func.percentile_cont(0.5).within_group(latency_delta).label("median_latency_delta_ms"),
+            func.percentile_cont(0.95).within_group(latency_delta).label("p95_latency_delta_ms"),
+        ).select_from(joined)
+    ).mappings().one()
+    return dict(row)
+
+
+def count_items(db: Session, task_id: str) -> int:
+    return db.scalar(
+        select(func.count()).select_from(EvaluationItem).where(EvaluationItem.task_id == task_id)
+    ) or 0
+
+
+def error_code_counts(db: Session, task_id: str) -> Dict[str, int]:
+    rows = db.execute(
+        select(EvaluationRun.error_code, func.count())
+        .join(EvaluationItem, EvaluationRun.item_id == EvaluationItem.id)
+        .where(EvaluationItem.task_id == task_id, EvaluationRun.error_code.is_not(None))
+        .group_by(EvaluationRun.error_code)
+    ).all()
+    return {code: count for code, count in rows}
+
+
+__all__ = [
+    "CHANGE_IMPROVEMENT",
+    "CHANGE_REGRESSION",
+    "CHANGE_UNCHANGED",
+    "CHANGE_UNKNOWN",
+    "count_items",
+    "error_code_counts",
+    "iter_compared_items",
+    "list_compared_items",
+    "summarize_comparison",
+]
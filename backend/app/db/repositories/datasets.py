@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, defer
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.db.models.evaluation_task import Dataset, generate_uuid
+from app.utils.compression import compress_text
+
+
+def get_dataset(db: Session, dataset_id: str) -> Optional[Dataset]:
+    return db.scalar(select(Dataset).where(Dataset.id == dataset_id))
+
+
+def get_dataset_by_hash(db: Session, content_hash: str) -> Optional[Dataset]:
+    return db.scalar(select(Dataset).where(Dataset.content_hash == content_hash))
+
+
+def create_dataset(
+    db: Session,
+    *,
+    content_hash: str,
+    filename: str,
+    file_path: str,
+    records: List[dict],
+) -> Dataset:
+    """Register a parsed dataset; concurrent uploads of the same file resolve to one row."""
+    now = datetime.now(timezone.utc)
+    codec, payload = compress_text(json.dumps(records, ensure_ascii=False))
+    db.execute(
+        pg_insert(Dataset)
+        .values(
+            id=generate_uuid(),
+            content_hash=content_hash,
+            filename=filename,
+            file_path=file_path,
+            row_count=len(records),
+            records_codec=codec,
+            records_payload=payload,
+            created_at=now,
+            last_used_at=now,
+        )
+        .on_conflict_do_nothing(index_elements=["content_hash"])
+    )
+    return get_dataset_by_hash(db, content_hash)
+
+
+def touch_dataset(db: Session, dataset: Dataset) -> None:
+    now = datetime.now(timezone.utc)
+    db.execute(update(Dataset).where(Dataset.id == dataset.id).values(last_used_at=now))
+    set_committed_value(dataset, "last_used_at", now)
+
+
+def list_datasets_paginated(db: Session, *, page: int, page_size: int) -> tuple[List[Dataset], int]:
+    total = db.scalar(select(func.count()).select_from(Dataset)) or 0
+    stmt = (
+        select(Dataset)
+        .options(defer(Dataset.records_payload))
+        .order_by(Dataset.last_used_at.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    return list(db.scalars(stmt)), total
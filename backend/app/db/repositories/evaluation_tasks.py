@@ -1,18 +1,24 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone, timedelta
-from typing import Iterable, List, Optional
+from typing import Iterable, Iterator, List, Optional
 
-from sqlalchemy import func, select
+from sqlalchemy import Select, delete, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.models.evaluation_task import (
     EvaluationItem,
     EvaluationRun,
     EvaluationTask,
+    ResponseBlob,
     RunStatus,
     TaskStatus,
+    generate_uuid,
     )
+from app.utils import live_progress, task_events
+from app.utils.compression import compress_text, content_hash
 
 
 def try_claim_task(db: Session, task_id: str) -> Optional[EvaluationTask]:
@@ -43,6 +49,7 @@ def create_task(
     *,
     task_name: str,
     agent_api_url: str,
+    dataset_id: Optional[str] = None,
     agent_api_headers: Optional[dict],
     agent_model: Optional[str],
     enable_correction: bool,
@@ -50,20 +57,26 @@ def create_task(
     timeout_seconds: float,
     use_stream: bool,
     total_items: int,
+    status: str = TaskStatus.PENDING,
+    token_budget: Optional[int] = None,
+    hedge_requests: bool = False,
 ) -> EvaluationTask:
     now = datetime.now(timezone.utc)
     task = EvaluationTask(
         task_name=task_name,
+        dataset_id=dataset_id,
         agent_api_url=agent_api_url,
         agent_api_headers=agent_api_headers or {},
         agent_model=agent_model,
         enable_correction=enable_correction,
-        status=TaskStatus.PENDING,
+        status=status,
         total_items=total_items,
         progress_processed=0,
         runs_per_item=runs_per_item,
         timeout_seconds=timeout_seconds,
         use_stream=use_stream,
+        token_budget=token_budget,
+        hedge_requests=hedge_requests,
         created_at=now,
         updated_at=now,
     )
@@ -77,48 +90,56 @@ def bulk_insert_items(
     *,
     task_id: str,
     items: Iterable[dict],
-) -> List[EvaluationItem]:
-    created_items: List[EvaluationItem] = []
+) -> List[str]:
+    """Insert a task's items with one multi-row INSERT and return their ids in row order."""
+    rows: List[dict] = []
     # 使用严格递增的时间戳，保证与上传文件的顺序一致
     base = datetime.now(timezone.utc)
     for index, item in enumerate(items):
-        created_at = base + timedelta(microseconds=index)
-        evaluation_item = EvaluationItem(
-            task_id=task_id,
-            row_index=index + 1,
-            question_id=item["question_id"],
-            question=item["question"],
-            standard_answer=item["standard_answer"],
-            system_prompt=item.get("system_prompt"),
-            user_context=item.get("user_context"),
-            session_group=item.get("session_group"),
-            created_at=created_at,
+        rows.append(
+            {
+                "id": generate_uuid(),
+                "task_id": task_id,
+                "row_index": index + 1,
+                "question_id": item["question_id"],
+                "question": item["question"],
+                "standard_answer": item["standard_answer"],
+                "system_prompt": item.get("system_prompt"),
+                "user_context": item.get("user_context"),
+                "session_group": item.get("session_group"),
+                "answer_pattern": item.get("answer_pattern"),
+                "answer_keywords": item.get("answer_keywords"),
+                "created_at": base + timedelta(microseconds=index),
+            }
         )
-        db.add(evaluation_item)
-        created_items.append(evaluation_item)
-    db.flush()
-    return created_items
+    if rows:
+        db.execute(insert(EvaluationItem), rows)
+    return [row["id"] for row in rows]
 
 
-def create_initial_runs(
+def bulk_create_initial_runs(
     db: Session,
     *,
-    item: EvaluationItem,
+    item_ids: Iterable[str],
     runs_per_item: int,
 ) -> None:
     now = datetime.now(timezone.utc)
-    for idx in range(1, runs_per_item + 1):
-        db.add(
-            EvaluationRun(
-                item_id=item.id,
-                run_index=idx,
-                status=RunStatus.RETRYING,
-                correction_status="PENDING",
-                created_at=now,
-                updated_at=now,
-            )
-        )
-    db.flush()
+    rows = [
+        {
+            "id": generate_uuid(),
+            "item_id": item_id,
+            "run_index": idx,
+            "status": RunStatus.RETRYING,
+            "correction_status": "PENDING",
+            "correction_retries": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for item_id in item_ids
+        for idx in range(1, runs_per_item + 1)
+    ]
+    if rows:
+        db.execute(insert(EvaluationRun), rows)
 
 
 def get_task(db: Session, task_id: str) -> Optional[EvaluationTask]:
@@ -126,14 +147,54 @@ def get_task(db: Session, task_id: str) -> Optional[EvaluationTask]:
     return db.scalar(stmt)
 
 
-def list_items_for_task(db: Session, task_id: str) -> List[EvaluationItem]:
+def lock_task(db: Session, task_id: str) -> Optional[EvaluationTask]:
+    """Row-lock a task until commit and refresh the instance already in the session."""
+    stmt = (
+        select(EvaluationTask)
+        .where(EvaluationTask.id == task_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return db.scalar(stmt)
+
+
+def list_items_for_task(
+    db: Session,
+    task_id: str,
+    *,
+    include_responses: bool = True,
+    include_reasoning: bool = False,
+) -> List[EvaluationItem]:
+    runs_loader = selectinload(EvaluationItem.runs)
+    if not include_responses:
+        # 仅需状态/判定结果时不加载响应正文
+        runs_loader = runs_loader.lazyload(EvaluationRun.response_blob)
+    elif include_reasoning:
+        runs_loader = runs_loader.selectinload(EvaluationRun.reasoning_blob)
+    stmt = (
+        select(EvaluationItem)
+        .where(EvaluationItem.task_id == task_id)
+        .order_by(EvaluationItem.row_index, EvaluationItem.created_at)
+        .options(runs_loader)
+    )
+    return list(db.scalars(stmt))
+
+
+def iter_items_for_task(
+    db: Session, task_id: str, *, batch_size: int = 200
+) -> Iterator[EvaluationItem]:
+    """Stream items in row order through a server-side cursor, loading runs per batch."""
     stmt = (
         select(EvaluationItem)
         .where(EvaluationItem.task_id == task_id)
         .order_by(EvaluationItem.row_index, EvaluationItem.created_at)
         .options(selectinload(EvaluationItem.runs))
+        .execution_options(yield_per=batch_size)
     )
-    return list(db.scalars(stmt))
+    for partition in db.scalars(stmt).partitions():
+        yield from partition
+        # 每批输出后清理会话，避免 identity map 随导出行数增长
+        db.expunge_all()
 
 
 def mark_task_status(
@@ -147,14 +208,125 @@ def mark_task_status(
     if status in {TaskStatus.SUCCEEDED, TaskStatus.FAILED}:
         task.completed_at = now
     db.add(task)
+    task_events.publish_task_event(
+        task.id,
+        "status",
+        {
+            "status": status,
+            "processed": task.progress_processed,
+            "total": task.total_items,
+        },
+    )
+
+
+def count_processed_items(db: Session, task_id: str) -> int:
+    """Count items of a task that have no run left in RETRYING state."""
+    pending = (
+        select(EvaluationRun.id)
+        .where(
+            EvaluationRun.item_id == EvaluationItem.id,
+            EvaluationRun.status == RunStatus.RETRYING,
+        )
+        .exists()
+    )
+    return db.scalar(
+        select(func.count())
+        .select_from(EvaluationItem)
+        .where(EvaluationItem.task_id == task_id, ~pending)
+    ) or 0
+
+
+def count_run_statuses(db: Session, task_id: str) -> dict[str, int]:
+    stmt = (
+        select(EvaluationRun.status, func.count())
+        .join(EvaluationItem, EvaluationRun.item_id == EvaluationItem.id)
+        .where(EvaluationItem.task_id == task_id)
+        .group_by(EvaluationRun.status)
+    )
+    return {run_status: count for run_status, count in db.execute(stmt)}
+
+
+def seed_live_progress(db: Session, task: EvaluationTask) -> None:
+    """Initialise the Redis progress counters of a freshly claimed task from the database."""
+    processed = count_processed_items(db, task.id)
+    live_progress.seed_progress(task.id, processed, count_run_statuses(db, task.id))
+    _checkpoint_task_progress(db, task, processed)
+
+
+def _checkpoint_task_progress(db: Session, task: EvaluationTask, processed: int) -> None:
+    # 直接以绝对值写回（GREATEST 保证单调），不读取行数据，避免热点行读改写竞争
+    processed = min(processed, task.total_items)
+    now = datetime.now(timezone.utc)
+    db.execute(
+        update(EvaluationTask)
+        .where(EvaluationTask.id == task.id)
+        .values(
+            progress_processed=func.greatest(EvaluationTask.progress_processed, processed),
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(task, "progress_processed", max(task.progress_processed, processed))
+    set_committed_value(task, "updated_at", now)
 
 
 def increment_task_progress(
     db: Session, task: EvaluationTask, increment: int = 1
-) -> None:
-    task.progress_processed = min(task.progress_processed + increment, task.total_items)
+) -> int:
+    """Advance task progress and return the live processed count.
+
+    Progress lives in an atomic Redis counter and is only checkpointed to the task row
+    every ``PROGRESS_CHECKPOINT_INTERVAL`` items / ``PROGRESS_CHECKPOINT_SECONDS``.
+    Falls back to updating the row directly when Redis is unavailable.
+    """
+    processed = live_progress.incr_processed(task.id, increment)
+    if processed is None:
+        task.progress_processed = min(task.progress_processed + increment, task.total_items)
+        task.updated_at = datetime.now(timezone.utc)
+        db.add(task)
+        processed = task.progress_processed
+    else:
+        processed = min(processed, task.total_items)
+        if live_progress.should_checkpoint(task.id, processed, task.total_items):
+            _checkpoint_task_progress(db, task, processed)
+    task_events.publish_task_event(
+        task.id,
+        "progress",
+        {
+            "status": task.status,
+            "processed": processed,
+            "total": task.total_items,
+        },
+    )
+    return processed
+
+
+def finalize_task_progress(db: Session, task: EvaluationTask) -> None:
+    """Write the authoritative processed count (from item/run rows) to the task row."""
+    task.progress_processed = min(count_processed_items(db, task.id), task.total_items)
     task.updated_at = datetime.now(timezone.utc)
     db.add(task)
+    live_progress.forget_checkpoint(task.id)
+
+
+def store_response_blob(db: Session, text: Optional[str]) -> Optional[str]:
+    """Store text in the content-addressed blob table and return its hash, reusing an identical blob."""
+    if not text:
+        return None
+    digest = content_hash(text)
+    codec, payload = compress_text(text)
+    db.execute(
+        pg_insert(ResponseBlob)
+        .values(
+            content_hash=digest,
+            codec=codec,
+            payload=payload,
+            raw_size=len(text.encode("utf-8")),
+            created_at=datetime.now(timezone.utc),
+        )
+        .on_conflict_do_nothing(index_elements=[ResponseBlob.content_hash])
+    )
+    return digest
 
 
 def update_run_result(
@@ -166,11 +338,29 @@ def update_run_result(
     latency_ms: Optional[int],
     error_code: Optional[str],
     error_message: Optional[str],
+    reasoning: Optional[str] = None,
+    first_token_ms: Optional[int] = None,
+    tokens_per_second: Optional[float] = None,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    reasoning_tokens: Optional[int] = None,
+    cost: Optional[float] = None,
 ) -> None:
     now = datetime.now(timezone.utc)
     run.status = status
-    run.response_body = response_body
+    run.response_text = None
+    run.response_hash = store_response_blob(db, response_body)
+    run.reasoning_hash = store_response_blob(db, reasoning)
+    # 缓存明文供同一会话读取；blob 行已由 INSERT 写入，不能再挂到关系上重复插入
+    run.cache_response_body(response_body or None)
+    run.cache_reasoning_body(reasoning or None)
     run.latency_ms = latency_ms
+    run.first_token_ms = first_token_ms
+    run.tokens_per_second = tokens_per_second
+    run.prompt_tokens = prompt_tokens
+    run.completion_tokens = completion_tokens
+    run.reasoning_tokens = reasoning_tokens
+    run.cost = cost
     run.error_code = error_code
     run.error_message = error_message
     run.correction_status = "PENDING"
@@ -181,6 +371,25 @@ def update_run_result(
     run.updated_at = now
     db.add(run)
 
+    item = run.item
+    if item is not None:
+        run_status_counts = live_progress.incr_run_status(item.task_id, status)
+        latency_stats = task_events.record_run_latency(item.task_id, run.id, latency_ms)
+        task_events.publish_task_event(
+            item.task_id,
+            "run",
+            {
+                "question_id": item.question_id,
+                "run_index": run.run_index,
+                "status": status,
+                "latency_ms": latency_ms,
+                "first_token_ms": first_token_ms,
+                "error_code": error_code,
+                "latency_stats": latency_stats,
+                "run_status_counts": run_status_counts,
+            },
+        )
+
 
 def update_run_correction(
     db: Session,
@@ -191,13 +400,23 @@ def update_run_correction(
     reason: Optional[str],
     error_message: Optional[str],
     retries: int,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    cost: Optional[float] = None,
+    stage: Optional[str] = None,
+    prompt_truncated: Optional[bool] = None,
 ) -> None:
     now = datetime.now(timezone.utc)
     run.correction_status = status
+    run.correction_stage = stage
+    run.correction_prompt_truncated = prompt_truncated
     run.correction_result = result
     run.correction_reason = reason
     run.correction_error_message = error_message
     run.correction_retries = retries
+    run.correction_prompt_tokens = prompt_tokens
+    run.correction_completion_tokens = completion_tokens
+    run.correction_cost = cost
     run.updated_at = now
     db.add(run)
 
@@ -207,6 +426,83 @@ def update_item_pass_status(db: Session, item: EvaluationItem, is_passed: Option
     db.add(item)
 
 
+def summarize_task_usage(db: Session, task_id: str) -> dict:
+    """Sum agent and judge token usage and cost over all runs of a task."""
+    row = db.execute(
+        select(
+            func.coalesce(func.sum(EvaluationRun.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(EvaluationRun.completion_tokens), 0).label("completion_tokens"),
+            func.coalesce(func.sum(EvaluationRun.reasoning_tokens), 0).label("reasoning_tokens"),
+            func.coalesce(func.sum(EvaluationRun.correction_prompt_tokens), 0).label("correction_prompt_tokens"),
+            func.coalesce(func.sum(EvaluationRun.correction_completion_tokens), 0).label(
+                "correction_completion_tokens"
+            ),
+            func.sum(EvaluationRun.cost).label("agent_cost"),
+            func.sum(EvaluationRun.correction_cost).label("correction_cost"),
+        )
+        .join(EvaluationItem, EvaluationItem.id == EvaluationRun.item_id)
+        .where(EvaluationItem.task_id == task_id)
+    ).one()
+    usage = {key: int(row._mapping[key]) for key in (
+        "prompt_tokens",
+        "completion_tokens",
+        "reasoning_tokens",
+        "correction_prompt_tokens",
+        "correction_completion_tokens",
+    )}
+    usage["total_tokens"] = (
+        usage["prompt_tokens"]
+        + usage["completion_tokens"]
+        + usage["correction_prompt_tokens"]
+        + usage["correction_completion_tokens"]
+    )
+    costs = [value for value in (row.agent_cost, row.correction_cost) if value is not None]
+    usage["agent_cost"] = row.agent_cost
+    usage["correction_cost"] = row.correction_cost
+    usage["total_cost"] = round(sum(costs), 6) if costs else None
+    return usage
+
+
+def store_task_usage(db: Session, task: EvaluationTask) -> dict:
+    usage = summarize_task_usage(db, task.id)
+    task.total_tokens = usage["total_tokens"]
+    task.total_cost = usage["total_cost"]
+    db.add(task)
+    return usage
+
+
+def list_judged_answers(db: Session, *, limit: int = 5000) -> List[tuple]:
+    """Most recent (response_body, standard_answer, correction_result) triples decided by the LLM judge."""
+    stmt = (
+        select(EvaluationRun, EvaluationItem.standard_answer)
+        .join(EvaluationItem, EvaluationItem.id == EvaluationRun.item_id)
+        .where(
+            EvaluationRun.correction_status == "SUCCESS",
+            EvaluationRun.correction_result.is_not(None),
+            # 本地阶段给出的结论不参与标定，早于分阶段记录的数据都来自判定模型
+            or_(EvaluationRun.correction_stage.is_(None), EvaluationRun.correction_stage == "LLM"),
+        )
+        .order_by(EvaluationRun.created_at.desc())
+        .limit(limit)
+    )
+    return [
+        (run.response_body, standard_answer, bool(run.correction_result))
+        for run, standard_answer in db.execute(stmt)
+        if run.response_body
+    ]
+
+
+def correction_stage_counts(db: Session, task_id: str) -> dict:
+    """Number of runs decided by each correction stage, e.g. {"EXACT": 40, "LLM": 12}."""
+    rows = db.execute(
+        select(EvaluationRun.correction_stage, func.count())
+        .join(EvaluationItem, EvaluationItem.id == EvaluationRun.item_id)
+        .where(EvaluationItem.task_id == task_id, EvaluationRun.correction_stage.is_not(None))
+        .group_by(EvaluationRun.correction_stage)
+    ).all()
+    return {stage: int(count) for stage, count in rows}
+
+
 def calculate_accuracy(db: Session, task: EvaluationTask) -> None:
     total = db.scalar(
         select(func.count()).select_from(EvaluationItem).where(EvaluationItem.task_id == task.id)
@@ -223,14 +519,9 @@ def calculate_accuracy(db: Session, task: EvaluationTask) -> None:
     db.add(task)
 
 
-def list_tasks_paginated(
-    db: Session,
-    *,
-    page: int,
-    page_size: int,
-    status_filter: Optional[List[str]] = None,
-    query: Optional[str] = None,
-) -> tuple[List[EvaluationTask], int]:
+def _task_list_statements(
+    *, status_filter: Optional[List[str]] = None, query: Optional[str] = None
+) -> tuple[Select, Select]:
     stmt = select(EvaluationTask)
     count_stmt = select(func.count()).select_from(EvaluationTask)
 
@@ -242,14 +533,40 @@ def list_tasks_paginated(
         stmt = stmt.where(EvaluationTask.task_name.ilike(like))
         count_stmt = count_stmt.where(EvaluationTask.task_name.ilike(like))
 
-    stmt = stmt.order_by(EvaluationTask.created_at.desc())
+    return stmt.order_by(EvaluationTask.created_at.desc()), count_stmt
+
 
+def list_tasks_paginated(
+    db: Session,
+    *,
+    page: int,
+    page_size: int,
+    status_filter: Optional[List[str]] = None,
+    query: Optional[str] = None,
+) -> tuple[List[EvaluationTask], int]:
+    stmt, count_stmt = _task_list_statements(status_filter=status_filter, query=query)
     total = db.scalar(count_stmt) or 0
     offset = (page - 1) * page_size
     items = list(db.scalars(stmt.offset(offset).limit(page_size)))
     return items, total
 
 
+async def list_tasks_paginated_async(
+    db,
+    *,
+    page: int,
+    page_size: int,
+    status_filter: Optional[List[str]] = None,
+    query: Optional[str] = None,
+) -> tuple[List[EvaluationTask], int]:
+    """Same as ``list_tasks_paginated`` with native awaits on an AsyncSession (or ThreadedSession)."""
+    stmt, count_stmt = _task_list_statements(status_filter=status_filter, query=query)
+    total = (await db.execute(count_stmt)).scalar() or 0
+    offset = (page - 1) * page_size
+    items = list((await db.execute(stmt.offset(offset).limit(page_size))).scalars())
+    return items, total
+
+
 def list_task_results_paginated(
     db: Session,
     *,
@@ -257,12 +574,16 @@ def list_task_results_paginated(
     page: int,
     page_size: int,
     question_id: Optional[str] = None,
+    include_reasoning: bool = False,
 ) -> tuple[List[EvaluationItem], int]:
+    runs_loader = selectinload(EvaluationItem.runs)
+    if include_reasoning:
+        runs_loader = runs_loader.selectinload(EvaluationRun.reasoning_blob)
     stmt = (
         select(EvaluationItem)
         .where(EvaluationItem.task_id == task_id)
         .order_by(EvaluationItem.created_at)
-        .options(selectinload(EvaluationItem.runs))
+        .options(runs_loader)
     )
     count_stmt = select(func.count()).select_from(EvaluationItem).where(
         EvaluationItem.task_id == task_id
@@ -276,3 +597,109 @@ def list_task_results_paginated(
     offset = (page - 1) * page_size
     items = list(db.scalars(stmt.offset(offset).limit(page_size)))
     return items, total
+
+
+def list_tasks_due_for_archive(
+    db: Session, *, cutoff: datetime, limit: int
+) -> List[EvaluationTask]:
+    stmt = (
+        select(EvaluationTask)
+        .where(
+            EvaluationTask.status.in_([TaskStatus.SUCCEEDED, TaskStatus.FAILED]),
+            EvaluationTask.archived_at.is_(None),
+            EvaluationTask.updated_at < cutoff,
+        )
+        .order_by(EvaluationTask.updated_at)
+        .limit(limit)
+    )
+    return list(db.scalars(stmt))
+
+
+def delete_task_details(db: Session, task_id: str) -> None:
+    """Drop all items of a task; runs are removed by the ON DELETE CASCADE foreign key."""
+    db.execute(
+        delete(EvaluationItem)
+        .where(EvaluationItem.task_id == task_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.expire_all()
+
+
+def delete_orphan_response_blobs(db: Session) -> int:
+    referenced = select(EvaluationRun.id).where(
+        or_(
+            EvaluationRun.response_hash == ResponseBlob.content_hash,
+            EvaluationRun.reasoning_hash == ResponseBlob.content_hash,
+        )
+    )
+    result = db.execute(
+        delete(ResponseBlob)
+        .where(~referenced.exists())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount or 0
+
+
+def restore_items(db: Session, *, task_id: str, records: Iterable[dict]) -> int:
+    """Re-insert archived items and runs, keeping their original ids and timestamps."""
+    restored = 0
+    for record in records:
+        item = EvaluationItem(
+            id=record["id"],
+            task_id=task_id,
+            row_index=record["row_index"],
+            question_id=record["question_id"],
+            question=record["question"],
+            standard_answer=record["standard_answer"],
+            system_prompt=record.get("system_prompt"),
+            user_context=record.get("user_context"),
+            session_group=record.get("session_group"),
+            answer_pattern=record.get("answer_pattern"),
+            answer_keywords=record.get("answer_keywords"),
+            is_passed=record.get("is_passed"),
+            created_at=_parse_datetime(record.get("created_at")),
+        )
+        db.add(item)
+        for run_record in record.get("runs", []):
+            db.add(
+                EvaluationRun(
+                    id=run_record["id"],
+                    item_id=item.id,
+                    run_index=run_record["run_index"],
+                    status=run_record["status"],
+                    response_hash=store_response_blob(db, run_record.get("response_body")),
+                    reasoning_hash=store_response_blob(db, run_record.get("reasoning_body")),
+                    latency_ms=run_record.get("latency_ms"),
+                    first_token_ms=run_record.get("first_token_ms"),
+                    tokens_per_second=run_record.get("tokens_per_second"),
+                    prompt_tokens=run_record.get("prompt_tokens"),
+                    completion_tokens=run_record.get("completion_tokens"),
+                    reasoning_tokens=run_record.get("reasoning_tokens"),
+                    cost=run_record.get("cost"),
+                    correction_prompt_tokens=run_record.get("correction_prompt_tokens"),
+                    correction_completion_tokens=run_record.get("correction_completion_tokens"),
+                    correction_cost=run_record.get("correction_cost"),
+                    correction_stage=run_record.get("correction_stage"),
+                    correction_prompt_truncated=run_record.get("correction_prompt_truncated"),
+                    error_code=run_record.get("error_code"),
+                    error_message=run_record.get("error_message"),
+                    correction_status=run_record.get("correction_status") or "PENDING",
+                    correction_result=run_record.get("correction_result"),
+                    correction_reason=run_record.get("correction_reason"),
+                    correction_error_message=run_record.get("correction_error_message"),
+                    correction_retries=run_record.get("correction_retries") or 0,
+                    created_at=_parse_datetime(run_record.get("created_at")),
+                    updated_at=_parse_datetime(run_record.get("updated_at")),
+                )
+            )
+        restored += 1
+        if restored % 500 == 0:
+            db.flush()
+    db.flush()
+    return restored
+
+
+def _parse_datetime(value: Optional[str]) -> datetime:
+    if not value:
+        return datetime.now(timezone.utc)
+    return datetime.fromisoformat(value)
@@ -1,10 +1,45 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, declarative_base, scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
 
+try:  # pragma: no cover - optional dependency
+    import asyncpg  # noqa: F401
+    from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+except ImportError:  # pragma: no cover - optional dependency
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _pool_options(pool_size: int | None = None, max_overflow: int | None = None) -> dict:
+    if settings.db_pgbouncer:
+        # PgBouncer 负责连接复用，应用侧不保留长连接
+        return {"poolclass": NullPool}
+    return {
+        "pool_size": settings.db_pool_size if pool_size is None else pool_size,
+        "max_overflow": settings.db_max_overflow if max_overflow is None else max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": True,
+    }
+
+
+def build_engine(pool_size: int | None = None, max_overflow: int | None = None) -> Engine:
+    return create_engine(str(settings.database_url), future=True, **_pool_options(pool_size, max_overflow))
 
-engine = create_engine(str(settings.database_url), future=True, pool_pre_ping=True)
+
+engine = build_engine()
 
 SessionLocal = scoped_session(
     sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
@@ -12,6 +47,13 @@ SessionLocal = scoped_session(
 
 Base = declarative_base()
 
+_async_sessionmaker = None
+
+
+def new_session():
+    """Create a standalone session, e.g. for streaming responses that outlive the request scope."""
+    return SessionLocal.session_factory()
+
 
 def get_db():
     db = SessionLocal()
@@ -19,3 +61,80 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def configure_worker_engine(*, after_fork: bool = False) -> Engine:
+    """Give a Celery worker process its own engine sized by ``worker_db_pool_limits``.
+
+    After a prefork fork the inherited pool is dropped without closing the parent's sockets.
+    """
+    global engine
+    SessionLocal.remove()
+    engine.dispose(close=not after_fork)
+    pool_size, max_overflow = settings.worker_db_pool_limits
+    engine = build_engine(pool_size, max_overflow)
+    SessionLocal.configure(bind=engine)
+    logger.info(
+        "Worker database engine configured (pool_size=%s, max_overflow=%s, pgbouncer=%s)",
+        pool_size,
+        max_overflow,
+        settings.db_pgbouncer,
+    )
+    return engine
+
+
+def async_database_url(url: str) -> str:
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def async_db_available() -> bool:
+    return asyncpg is not None and settings.api_async_db
+
+
+def get_async_sessionmaker():
+    """Lazily build the asyncpg engine used by the API tier; None when it is unavailable."""
+    global _async_sessionmaker
+    if not async_db_available():
+        return None
+    if _async_sessionmaker is None:
+        # 经 PgBouncer 事务池时预编译语句无法跨连接复用，必须关闭缓存
+        cache_size = 0 if settings.db_pgbouncer else settings.db_statement_cache_size
+        async_engine: AsyncEngine = create_async_engine(
+            async_database_url(str(settings.database_url)),
+            connect_args={
+                "statement_cache_size": cache_size,
+                "prepared_statement_cache_size": cache_size,
+            },
+            **_pool_options(),
+        )
+        _async_sessionmaker = async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        )
+        logger.info("API tier using asyncpg engine (pool_size=%s)", settings.db_pool_size)
+    return _async_sessionmaker
+
+
+class ThreadedSession:
+    """Fallback with the AsyncSession.run_sync interface that runs on the sync engine in a thread."""
+
+    def __init__(self, session: Session) -> None:
+        self.sync_session = session
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any):
+        # 与 AsyncSession.execute 一致返回已缓冲的结果，读取行时不再访问连接
+        frozen = await run_in_threadpool(lambda: self.sync_session.execute(statement, *args, **kwargs).freeze())
+        return frozen()
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+def open_async_session():
+    factory: Optional[Any] = get_async_sessionmaker()
+    if factory is not None:
+        return factory()
+    # 线程池中的调用可能落在不同线程上，不能使用线程绑定的 scoped_session
+    return ThreadedSession(new_session())
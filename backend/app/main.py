@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.api.routes.datasets import router as datasets_router
 from app.api.routes.evaluation_tasks import router as evaluation_router
 
 
@@ -17,6 +18,7 @@ def create_app() -> FastAPI:
     )
 
     app.include_router(evaluation_router, prefix="/api/v1")
+    app.include_router(datasets_router, prefix="/api/v1")
 
     @app.get("/healthz", tags=["health"])
     def healthcheck() -> dict[str, str]:
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from pydantic import AnyHttpUrl, BaseModel, Field, field_validator
 
@@ -15,6 +15,8 @@ class TaskCreateRequest(BaseModel):
     agent_api_headers: Optional[Dict[str, Any]] = Field(default=None)
     agent_model: Optional[str] = Field(default=None, max_length=128)
     enable_correction: bool = Field(default=False)
+    token_budget: Optional[int] = Field(default=None, ge=1)
+    hedge_requests: bool = Field(default=False)
 
     @field_validator("agent_model")
     @classmethod
@@ -24,10 +26,24 @@ class TaskCreateRequest(BaseModel):
         return value
 
 
+class TaskFromDatasetRequest(TaskCreateRequest):
+    dataset_id: str = Field(..., min_length=1, max_length=36)
+
+
 class TaskCreateResponse(BaseModel):
     task_id: str = Field(..., alias="task_id")
-    status: Literal["PENDING"]
+    status: Literal["INGESTING", "PENDING"]
     enable_correction: bool
+    dataset_id: Optional[str] = None
+
+
+class DatasetSchema(BaseModel):
+    dataset_id: str
+    filename: str
+    content_hash: str
+    row_count: int
+    created_at: datetime
+    last_used_at: datetime
 
 
 class PaginationMeta(BaseModel):
@@ -36,10 +52,15 @@ class PaginationMeta(BaseModel):
     total: int
 
 
+class DatasetListResponse(BaseModel):
+    items: List[DatasetSchema]
+    pagination: PaginationMeta
+
+
 class TaskListItem(BaseModel):
     task_id: str
     task_name: str
-    status: Literal["PENDING", "RUNNING", "SUCCEEDED", "FAILED"]
+    status: Literal["INGESTING", "PENDING", "RUNNING", "SUCCEEDED", "FAILED"]
     enable_correction: bool
     accuracy_rate: Optional[float] = None
     progress: Dict[str, int]
@@ -47,6 +68,10 @@ class TaskListItem(BaseModel):
     updated_at: datetime
     completed_at: Optional[datetime] = None
     duration_seconds: Optional[float] = None
+    archived_at: Optional[datetime] = None
+    failure_reason: Optional[str] = None
+    total_tokens: Optional[int] = None
+    total_cost: Optional[float] = None
 
 
 class TaskListResponse(BaseModel):
@@ -63,7 +88,14 @@ class EvaluationRunSchema(BaseModel):
         RunStatus.RETRYING,
     ]
     response_body: Optional[str]
+    reasoning_body: Optional[str] = None
     latency_ms: Optional[int]
+    first_token_ms: Optional[int] = None
+    tokens_per_second: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    reasoning_tokens: Optional[int] = None
+    cost: Optional[float] = None
     error_code: Optional[str]
     error_message: Optional[str]
     created_at: datetime
@@ -72,6 +104,11 @@ class EvaluationRunSchema(BaseModel):
     correction_reason: Optional[str] = None
     correction_error_message: Optional[str] = None
     correction_retries: Optional[int] = None
+    correction_prompt_tokens: Optional[int] = None
+    correction_completion_tokens: Optional[int] = None
+    correction_cost: Optional[float] = None
+    correction_stage: Optional[str] = None
+    correction_prompt_truncated: Optional[bool] = None
 
 
 class EvaluationItemSchema(BaseModel):
@@ -92,9 +129,55 @@ class TaskResultResponse(BaseModel):
     pagination: PaginationMeta
 
 
+class ComparedItemSchema(BaseModel):
+    question_id: str
+    change: Literal["REGRESSION", "IMPROVEMENT", "UNCHANGED", "UNKNOWN"]
+    base_passed: Optional[bool] = None
+    candidate_passed: Optional[bool] = None
+    base_latency_ms: Optional[float] = None
+    candidate_latency_ms: Optional[float] = None
+    latency_delta_ms: Optional[float] = None
+    base_failed_runs: int = 0
+    candidate_failed_runs: int = 0
+    base_error_codes: List[str] = Field(default_factory=list)
+    candidate_error_codes: List[str] = Field(default_factory=list)
+
+
+class ComparisonSummary(BaseModel):
+    base_task_id: str
+    candidate_task_id: str
+    matched_items: int
+    base_only_items: int
+    candidate_only_items: int
+    evaluated_items: int
+    regressions: int
+    improvements: int
+    base_accuracy: Optional[float] = None
+    candidate_accuracy: Optional[float] = None
+    base_accuracy_ci: Optional[Tuple[float, float]] = None
+    candidate_accuracy_ci: Optional[Tuple[float, float]] = None
+    accuracy_delta: Optional[float] = None
+    accuracy_delta_ci: Optional[Tuple[float, float]] = None
+    mean_latency_delta_ms: Optional[float] = None
+    median_latency_delta_ms: Optional[float] = None
+    p95_latency_delta_ms: Optional[float] = None
+    base_error_codes: Dict[str, int] = Field(default_factory=dict)
+    candidate_error_codes: Dict[str, int] = Field(default_factory=dict)
+    new_error_codes: Dict[str, int] = Field(default_factory=dict)
+
+
+class TaskComparisonResponse(BaseModel):
+    summary: ComparisonSummary
+    items: List[ComparedItemSchema]
+    pagination: PaginationMeta
+
+
 class ExportFormat(str, Enum):
     CSV = "csv"
     XLSX = "xlsx"
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+    ARROW = "arrow"
 
 
 class ExportQueryParams(BaseModel):
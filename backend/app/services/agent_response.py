@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+THINK_BLOCK_PATTERN = re.compile(r"<think>(.*?)(?:</think>|$)", re.DOTALL)
+
+
+@dataclass
+class AgentResponse:
+    """Result of a single agent call: final answer and reasoning are kept apart."""
+
+    content: str
+    error_code: Optional[str]
+    error_message: Optional[str]
+    latency_ms: int
+    reasoning: Optional[str] = None
+    first_token_ms: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    reasoning_tokens: Optional[int] = None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Completion tokens over the generation window (after the first token when streamed)."""
+        if not self.completion_tokens:
+            return None
+        window_ms = self.latency_ms - (self.first_token_ms or 0)
+        if window_ms <= 0:
+            return None
+        return round(self.completion_tokens * 1000 / window_ms, 2)
+
+
+def split_reasoning(text: Optional[str]) -> tuple[str, Optional[str]]:
+    """Split legacy output that inlines reasoning in ``<think>`` tags into (answer, reasoning)."""
+    if not text or "<think>" not in text:
+        return text or "", None
+    reasoning_parts = [part.strip() for part in THINK_BLOCK_PATTERN.findall(text) if part.strip()]
+    answer = THINK_BLOCK_PATTERN.sub("", text).strip()
+    return answer, "\n\n".join(reasoning_parts) or None
+
+
+def compose_judge_input(answer: Optional[str], reasoning: Optional[str], *, include_reasoning: bool) -> str:
+    if include_reasoning and reasoning:
+        return f"<think>\n{reasoning}\n</think>\n{answer or ''}".strip()
+    return (answer or "").strip()
+
+
+__all__ = ["AgentResponse", "split_reasoning", "compose_judge_input"]
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional, Tuple
+
+from app.services.agent_response import split_reasoning
+
+logger = logging.getLogger(__name__)
+
+STAGE_EXACT = "EXACT"
+STAGE_NUMERIC = "NUMERIC"
+STAGE_DATE = "DATE"
+STAGE_PATTERN = "PATTERN"
+STAGE_KEYWORDS = "KEYWORDS"
+STAGE_SIMILARITY = "SIMILARITY"
+STAGE_LLM = "LLM"
+
+NUMBER_PATTERN = re.compile(r"^[+-]?\d+(?:\.\d+)?%?$")
+DATE_PATTERN = re.compile(r"^(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})日?$")
+KEYWORD_SEPARATORS = re.compile(r"[|,，;；\n]+")
+TRAILING_PUNCTUATION = "。.!！?？;；,，"
+
+
+@dataclass(frozen=True)
+class MatchVerdict:
+    is_correct: bool
+    stage: str
+    reason: str
+
+
+def _is_ignorable(char: str) -> bool:
+    category = unicodedata.category(char)
+    return category.startswith("P") or category.startswith("Z") or char.isspace()
+
+
+def normalize_answer(text: Optional[str]) -> str:
+    """NFKC-fold full-width characters, lowercase and drop whitespace and punctuation.
+
+    Punctuation between two digits (``1.5``, ``10:30``) is kept so numbers stay distinct.
+    """
+    folded = unicodedata.normalize("NFKC", text or "").lower()
+    kept: List[str] = []
+    for index, char in enumerate(folded):
+        if _is_ignorable(char):
+            between_digits = (
+                0 < index < len(folded) - 1 and folded[index - 1].isdigit() and folded[index + 1].isdigit()
+            )
+            if not (between_digits and not char.isspace()):
+                continue
+        kept.append(char)
+    return "".join(kept)
+
+
+def _compact(text: str) -> str:
+    # 数字/日期比较只去掉空白、千分位与句末标点，保留小数点与分隔符
+    folded = unicodedata.normalize("NFKC", text).strip().rstrip(TRAILING_PUNCTUATION)
+    return re.sub(r"\s+", "", folded).replace(",", "")
+
+
+def _as_number(text: str) -> Optional[Decimal]:
+    compact = _compact(text)
+    if not NUMBER_PATTERN.match(compact):
+        return None
+    try:
+        value = Decimal(compact.rstrip("%"))
+    except InvalidOperation:
+        return None
+    # 百分数按比例比较：50% 等于 0.5，不等于 50
+    return value / 100 if compact.endswith("%") else value
+
+
+def _as_date(text: str) -> Optional[Tuple[int, int, int]]:
+    match = DATE_PATTERN.match(_compact(text))
+    if not match:
+        return None
+    year, month, day = (int(part) for part in match.groups())
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return None
+    return year, month, day
+
+
+def split_keywords(raw: Optional[str]) -> List[str]:
+    return [part.strip() for part in KEYWORD_SEPARATORS.split(raw or "") if part.strip()]
+
+
+def deterministic_verdict(
+    agent_output: str,
+    standard_answer: str,
+    *,
+    answer_pattern: Optional[str] = None,
+    answer_keywords: Optional[str] = None,
+) -> Optional[MatchVerdict]:
+    """Judge the answer locally when that is unambiguous; None means the LLM judge must decide.
+
+    Text and rule stages only confirm matches. Numbers and dates are also rejected locally
+    when both sides are bare values that differ.
+    """
+    answer, _ = split_reasoning(agent_output)
+    if not answer.strip():
+        return None
+
+    expected_number, actual_number = _as_number(standard_answer), _as_number(answer)
+    if expected_number is not None and actual_number is not None:
+        if expected_number == actual_number:
+            return MatchVerdict(True, STAGE_NUMERIC, "数值与标准答案相等")
+        return MatchVerdict(False, STAGE_NUMERIC, f"数值 {actual_number} 与标准答案 {expected_number} 不一致")
+
+    expected_date, actual_date = _as_date(standard_answer), _as_date(answer)
+    if expected_date is not None and actual_date is not None:
+        if expected_date == actual_date:
+            return MatchVerdict(True, STAGE_DATE, "日期与标准答案一致")
+        return MatchVerdict(False, STAGE_DATE, "日期与标准答案不一致")
+
+    normalized = normalize_answer(answer)
+    if normalized and normalized == normalize_answer(standard_answer):
+        return MatchVerdict(True, STAGE_EXACT, "规范化后与标准答案完全一致")
+
+    if answer_pattern:
+        try:
+            if re.search(answer_pattern, unicodedata.normalize("NFKC", answer), re.IGNORECASE):
+                return MatchVerdict(True, STAGE_PATTERN, f"命中答案规则 {answer_pattern}")
+        except re.error as exc:
+            logger.warning("Invalid answer_pattern %r: %s", answer_pattern, exc)
+
+    # 只含标点/空白的关键词规范化后为空串，会命中任何回答，直接忽略
+    keywords = [keyword for keyword in split_keywords(answer_keywords) if normalize_answer(keyword)]
+    if keywords and all(normalize_answer(keyword) in normalized for keyword in keywords):
+        return MatchVerdict(True, STAGE_KEYWORDS, f"包含全部关键词：{'、'.join(keywords)}")
+
+    return None
+
+
+__all__ = [
+    "MatchVerdict",
+    "STAGE_DATE",
+    "STAGE_EXACT",
+    "STAGE_KEYWORDS",
+    "STAGE_LLM",
+    "STAGE_NUMERIC",
+    "STAGE_PATTERN",
+    "STAGE_SIMILARITY",
+    "deterministic_verdict",
+    "normalize_answer",
+    "split_keywords",
+]
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+from collections import Counter
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.answer_matching import STAGE_SIMILARITY, MatchVerdict, normalize_answer
+from app.services.agent_response import split_reasoning
+
+try:  # pragma: no cover - optional dependency
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # pragma: no cover - optional dependency
+    SentenceTransformer = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+
+class NgramSimilarity:
+    """Character n-gram TF-IDF cosine similarity; document frequencies come from the task's answers."""
+
+    name = "ngram"
+    # 字符重合度低的同义改写（如"可以"与"没问题"）得分接近 0，不能据此判错
+    default_reject_threshold: Optional[float] = None
+
+    def __init__(self, corpus: Iterable[str] = (), ngram_range: Tuple[int, int] = (1, 3)) -> None:
+        self.ngram_range = ngram_range
+        self._document_frequency: Counter = Counter()
+        self._documents = 0
+        for text in corpus:
+            self._document_frequency.update(set(self._grams(text)))
+            self._documents += 1
+
+    def _grams(self, text: Optional[str]) -> List[str]:
+        normalized = normalize_answer(text)
+        low, high = self.ngram_range
+        return [
+            normalized[start : start + size]
+            for size in range(low, high + 1)
+            for start in range(len(normalized) - size + 1)
+        ]
+
+    def _idf(self, gram: str) -> float:
+        return math.log((1 + self._documents) / (1 + self._document_frequency[gram])) + 1.0
+
+    def score(self, reference: str, candidates: Sequence[str]) -> np.ndarray:
+        counts = [Counter(self._grams(text)) for text in (reference, *candidates)]
+        vocabulary = {gram: index for index, gram in enumerate(set().union(*counts))}
+        matrix = np.zeros((len(counts), len(vocabulary)), dtype=np.float32)
+        for row, counter in enumerate(counts):
+            for gram, count in counter.items():
+                matrix[row, vocabulary[gram]] = count * self._idf(gram)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+        return matrix[1:] @ matrix[0]
+
+
+class EmbeddingSimilarity:
+    """Cosine similarity of sentence embeddings from a locally loaded CPU model."""
+
+    name = "embedding"
+    default_reject_threshold: Optional[float] = 0.1
+
+    def __init__(self, model) -> None:
+        self.model = model
+
+    def score(self, reference: str, candidates: Sequence[str]) -> np.ndarray:
+        embeddings = self.model.encode(
+            [reference, *candidates],
+            batch_size=settings.similarity_batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return embeddings[1:] @ embeddings[0]
+
+
+@lru_cache(maxsize=2)
+def _load_embedding_model(name: str):
+    # 模型只在进程内加载一次，任务之间复用
+    return SentenceTransformer(name, device="cpu")
+
+
+def build_similarity_scorer(corpus: Iterable[str] = ()):
+    """Scorer used by the similarity stage: the configured embedding model, else n-gram TF-IDF."""
+    model_name = (settings.similarity_model or "").strip()
+    if model_name:
+        if SentenceTransformer is None:
+            logger.warning("SIMILARITY_MODEL 已配置但未安装 sentence-transformers，改用字符 n-gram 相似度")
+        else:
+            try:
+                return EmbeddingSimilarity(_load_embedding_model(model_name))
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("加载相似度模型 %s 失败，改用字符 n-gram 相似度: %s", model_name, exc)
+    return NgramSimilarity(corpus)
+
+
+def similarity_verdict(
+    score: Optional[float],
+    *,
+    answer: str,
+    standard_answer: str,
+    accept_threshold: Optional[float] = None,
+    reject_threshold: Optional[float] = None,
+    scorer=None,
+) -> Optional[MatchVerdict]:
+    """Accept above the high threshold, reject below the low one; the band in between goes to the LLM.
+
+    Without a configured ``SIMILARITY_REJECT_THRESHOLD`` the reject band comes from ``scorer``;
+    the n-gram fallback has none, so it never rejects on its own.
+    """
+    if score is None:
+        return None
+    accept = settings.similarity_accept_threshold if accept_threshold is None else accept_threshold
+    reject = settings.similarity_reject_threshold if reject_threshold is None else reject_threshold
+    if reject is None:
+        reject = getattr(scorer, "default_reject_threshold", None)
+    if score >= accept:
+        return MatchVerdict(True, STAGE_SIMILARITY, f"与标准答案相似度 {score:.3f} ≥ {accept}")
+    if reject is None:
+        return None
+    # 标准答案原文出现在回答中时不做自动判错，交给判定模型
+    expected = normalize_answer(standard_answer)
+    if score <= reject < accept and not (expected and expected in normalize_answer(answer)):
+        return MatchVerdict(False, STAGE_SIMILARITY, f"与标准答案相似度 {score:.3f} ≤ {reject}")
+    return None
+
+
+def score_pairs(scorer, pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    """Score (answer, standard_answer) pairs, batching every answer that shares a standard answer."""
+    grouped: Dict[str, List[int]] = {}
+    for index, (_, reference) in enumerate(pairs):
+        grouped.setdefault(reference, []).append(index)
+    scores = [0.0] * len(pairs)
+    for reference, indexes in grouped.items():
+        for index, value in zip(indexes, scorer.score(reference, [pairs[i][0] for i in indexes])):
+            scores[index] = float(value)
+    return scores
+
+
+@dataclass
+class SimilarityCalibration:
+    samples: int
+    accept_threshold: Optional[float]
+    reject_threshold: Optional[float]
+    auto_accept_rate: float
+    auto_reject_rate: float
+
+
+def _widest_threshold(ordered: Sequence[Tuple[float, bool]], *, target: float, min_samples: int) -> Tuple[Optional[float], int]:
+    # ordered 按"越可信越靠前"排序；取满足精度要求的最长前缀，只在分数变化处切分
+    threshold, covered, agreeing = None, 0, 0
+    for index, (score, agrees) in enumerate(ordered, start=1):
+        agreeing += agrees
+        at_boundary = index == len(ordered) or ordered[index][0] != score
+        if at_boundary and index >= min_samples and agreeing / index >= target:
+            threshold, covered = score, index
+    return threshold, covered
+
+
+def calibrate_thresholds(
+    scores: Sequence[float],
+    verdicts: Sequence[bool],
+    *,
+    target_precision: float = 0.98,
+    min_samples: int = 20,
+) -> SimilarityCalibration:
+    """Pick the widest accept/reject thresholds whose agreement with past judge verdicts meets the target."""
+    pairs = list(zip(scores, verdicts))
+    total = len(pairs)
+    accept, accepted = _widest_threshold(
+        sorted(((score, bool(verdict)) for score, verdict in pairs), key=lambda p: -p[0]),
+        target=target_precision,
+        min_samples=min_samples,
+    )
+    reject, rejected = _widest_threshold(
+        sorted(((score, not verdict) for score, verdict in pairs), key=lambda p: p[0]),
+        target=target_precision,
+        min_samples=min_samples,
+    )
+    if accept is not None and reject is not None and reject >= accept:
+        reject, rejected = None, 0
+    return SimilarityCalibration(
+        samples=total,
+        accept_threshold=round(accept, 4) if accept is not None else None,
+        reject_threshold=round(reject, 4) if reject is not None else None,
+        auto_accept_rate=round(accepted / total, 4) if total else 0.0,
+        auto_reject_rate=round(rejected / total, 4) if total else 0.0,
+    )
+
+
+def calibrate_from_history(db, *, limit: int = 5000, target_precision: float = 0.98) -> SimilarityCalibration:
+    """Calibrate against judge verdicts already stored in ``evaluation_runs``."""
+    from app.db.repositories import evaluation_tasks as repo
+
+    judged = repo.list_judged_answers(db, limit=limit)
+    pairs = [(split_reasoning(response)[0], standard_answer) for response, standard_answer, _ in judged]
+    scorer = build_similarity_scorer({standard_answer for _, standard_answer in pairs})
+    return calibrate_thresholds(
+        score_pairs(scorer, pairs),
+        [verdict for _, _, verdict in judged],
+        target_precision=target_precision,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="根据历史判定结果标定相似度阈值")
+    parser.add_argument("--limit", type=int, default=5000, help="最多读取的历史判定条数")
+    parser.add_argument("--target-precision", type=float, default=0.98, help="自动判定与模型结论的最低一致率")
+    args = parser.parse_args(argv)
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        calibration = calibrate_from_history(db, limit=args.limit, target_precision=args.target_precision)
+    finally:
+        db.close()
+    print(json.dumps(asdict(calibration), ensure_ascii=False, indent=2))
+
+
+__all__ = [
+    "EmbeddingSimilarity",
+    "NgramSimilarity",
+    "SimilarityCalibration",
+    "build_similarity_scorer",
+    "calibrate_from_history",
+    "calibrate_thresholds",
+    "score_pairs",
+    "similarity_verdict",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import csv
+import io
+import math
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette import status
+
+from app.db.models.evaluation_task import EvaluationTask, TaskStatus
+from app.db.repositories import comparisons as comparison_repo
+from app.db.repositories import evaluation_tasks as repo
+
+# 95% 置信水平对应的正态分位数
+Z_95 = 1.96
+
+EXPORT_HEADERS = [
+    "question_id",
+    "change",
+    "base_passed",
+    "candidate_passed",
+    "base_latency_ms",
+    "candidate_latency_ms",
+    "latency_delta_ms",
+    "base_failed_runs",
+    "candidate_failed_runs",
+    "base_error_codes",
+    "candidate_error_codes",
+]
+
+
+def wilson_interval(passed: int, total: int, z: float = Z_95) -> Optional[Tuple[float, float]]:
+    """Wilson score interval for a single task's pass rate, in percent."""
+    if total <= 0:
+        return None
+    p = passed / total
+    denom = 1 + z * z / total
+    centre = (p + z * z / (2 * total)) / denom
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denom
+    return round(max(0.0, centre - margin) * 100, 2), round(min(1.0, centre + margin) * 100, 2)
+
+
+def paired_delta_interval(
+    total: int, regressions: int, improvements: int, z: float = Z_95
+) -> Optional[Tuple[float, float]]:
+    """Interval for the accuracy delta of two runs over the same questions, in percent.
+
+    Both tasks answer the same items, so only discordant pairs contribute to the variance.
+    """
+    if total <= 0:
+        return None
+    delta = (improvements - regressions) / total
+    variance = ((improvements + regressions) - (improvements - regressions) ** 2 / total) / (total * total)
+    margin = z * math.sqrt(max(variance, 0.0))
+    return round((delta - margin) * 100, 2), round((delta + margin) * 100, 2)
+
+
+def _round(value: Any) -> Optional[float]:
+    return round(float(value), 1) if value is not None else None
+
+
+def load_comparable_task(db: Session, task_id: str) -> EvaluationTask:
+    task = repo.get_task(db, task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "TASK_NOT_FOUND", "message": f"任务 {task_id} 不存在"},
+        )
+    if task.status != TaskStatus.SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"code": "TASK_NOT_FINISHED", "message": f"任务 {task_id} 尚未完成"},
+        )
+    return task
+
+
+def ensure_distinct_tasks(base_task_id: str, candidate_task_id: str) -> None:
+    if base_task_id == candidate_task_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "COMPARISON_SAME_TASK", "message": "不能与任务自身进行对比"},
+        )
+
+
+def build_comparison_summary(db: Session, base: EvaluationTask, candidate: EvaluationTask) -> Dict[str, Any]:
+    stats = comparison_repo.summarize_comparison(db, base.id, candidate.id)
+    matched = stats["matched"] or 0
+    evaluated = stats["evaluated"] or 0
+    base_passed = stats["base_passed"] or 0
+    candidate_passed = stats["candidate_passed"] or 0
+    regressions = stats["regressions"] or 0
+    improvements = stats["improvements"] or 0
+
+    base_accuracy = base_passed / evaluated * 100 if evaluated else None
+    candidate_accuracy = candidate_passed / evaluated * 100 if evaluated else None
+    accuracy_delta = (
+        candidate_accuracy - base_accuracy
+        if base_accuracy is not None and candidate_accuracy is not None
+        else None
+    )
+
+    base_errors = comparison_repo.error_code_counts(db, base.id)
+    candidate_errors = comparison_repo.error_code_counts(db, candidate.id)
+    new_error_codes = {
+        code: count for code, count in sorted(candidate_errors.items()) if code not in base_errors
+    }
+
+    return {
+        "base_task_id": base.id,
+        "candidate_task_id": candidate.id,
+        "matched_items": matched,
+        "base_only_items": comparison_repo.count_items(db, base.id) - matched,
+        "candidate_only_items": comparison_repo.count_items(db, candidate.id) - matched,
+        "evaluated_items": evaluated,
+        "regressions": regressions,
+        "improvements": improvements,
+        "base_accuracy": _round(base_accuracy),
+        "candidate_accuracy": _round(candidate_accuracy),
+        "base_accuracy_ci": wilson_interval(base_passed, evaluated),
+        "candidate_accuracy_ci": wilson_interval(candidate_passed, evaluated),
+        "accuracy_delta": _round(accuracy_delta),
+        "accuracy_delta_ci": paired_delta_interval(evaluated, regressions, improvements),
+        "mean_latency_delta_ms": _round(stats["mean_latency_delta_ms"]),
+        "median_latency_delta_ms": _round(stats["median_latency_delta_ms"]),
+        "p95_latency_delta_ms": _round(stats["p95_latency_delta_ms"]),
+        "base_error_codes": base_errors,
+        "candidate_error_codes": candidate_errors,
+        "new_error_codes": new_error_codes,
+    }
+
+
+def normalize_compared_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "question_id": row["question_id"],
+        "change": row["change"],
+        "base_passed": row["base_passed"],
+        "candidate_passed": row["candidate_passed"],
+        "base_latency_ms": _round(row["base_latency_ms"]),
+        "candidate_latency_ms": _round(row["candidate_latency_ms"]),
+        "latency_delta_ms": _round(row["latency_delta_ms"]),
+        "base_failed_runs": row["base_failed_runs"] or 0,
+        "candidate_failed_runs": row["candidate_failed_runs"] or 0,
+        "base_error_codes": sorted(row["base_error_codes"] or []),
+        "candidate_error_codes": sorted(row["candidate_error_codes"] or []),
+    }
+
+
+def iter_comparison_csv(rows: Iterable[Dict[str, Any]], *, flush_chars: int = 64 * 1024) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+    for row in rows:
+        item = normalize_compared_item(row)
+        writer.writerow(
+            [
+                "|".join(item[key]) if key.endswith("_error_codes") else ("" if item[key] is None else item[key])
+                for key in EXPORT_HEADERS
+            ]
+        )
+        if buffer.tell() >= flush_chars:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
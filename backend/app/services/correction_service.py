@@ -2,25 +2,83 @@ from __future__ import annotations
 
 import json
 import logging
+import random
 import time
 from dataclasses import dataclass
 import re
 from pathlib import Path
 from typing import Optional
 
-from zai import ZhipuAiClient
-
 from app.core.config import settings
+from app.services.agent_response import split_reasoning
+from app.services.answer_matching import STAGE_LLM, deterministic_verdict
+from app.services.answer_similarity import similarity_verdict
+from app.services.judge_prompt import compact_judge_input, estimate_tokens
+from app.services.usage import TokenUsage, normalize_usage
+from app.services.zhipu_runner import get_shared_client, is_timeout_error, llm_timeout, model_semaphore
+from app.utils.deadlines import Deadline
 
 logger = logging.getLogger(__name__)
 
 PROMPT_PATH = Path(__file__).resolve().parents[1] / "prompts" / "correction_prompt.txt"
 
 
+JUDGE_SYSTEM_PROMPT = "你是一名严格的答案判定专家。"
+REPAIR_PROMPT = '上一条回复无法解析。请只输出一个 JSON 对象，例如 {"is_correct": true, "reason": "简短理由"}，不要输出其他内容。'
+
+ERROR_RATE_LIMIT = "RATE_LIMIT"
+ERROR_TIMEOUT = "TIMEOUT"
+ERROR_PARSE = "PARSE"
+ERROR_FATAL = "FATAL"
+ERROR_TRANSIENT = "TRANSIENT"
+ERROR_DEADLINE = "DEADLINE"
+
+
 class CorrectionConfigurationError(RuntimeError):
     """Raised when correction service cannot be configured."""
 
 
+class JudgeParseError(ValueError):
+    """Judge replied but the verdict JSON could not be read; ``raw`` keeps the reply for a repair pass."""
+
+    def __init__(self, message: str, raw: str) -> None:
+        super().__init__(message)
+        self.raw = raw
+
+
+def classify_error(exc: Exception) -> str:
+    """Bucket a judge call failure so each kind gets its own retry policy."""
+    if isinstance(exc, JudgeParseError):
+        return ERROR_PARSE
+    status = getattr(exc, "status_code", None)
+    name = type(exc).__name__
+    if status == 429 or name in {"APIReachLimitError", "APIServerFlowExceedError"}:
+        return ERROR_RATE_LIMIT
+    if is_timeout_error(exc):
+        return ERROR_TIMEOUT
+    if status in {400, 401, 403, 404} or name in {"APIAuthenticationError", "APIRequestFailedError"}:
+        return ERROR_FATAL
+    return ERROR_TRANSIENT
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, *, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter, never shorter than the server's Retry-After."""
+    ceiling = min(settings.correction_backoff_max_seconds, settings.correction_backoff_base_seconds * 2**attempt)
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, settings.correction_backoff_max_seconds))
+    return delay
+
+
 @dataclass
 class CorrectionOutcome:
     status: str
@@ -28,18 +86,29 @@ class CorrectionOutcome:
     reason: Optional[str]
     error_message: Optional[str]
     retries: int
+    usage: Optional[TokenUsage] = None
+    stage: str = STAGE_LLM
+    prompt_truncated: bool = False
 
 
 class CorrectionService:
     def __init__(self) -> None:
         if not settings.zhipu_api_key:
             raise CorrectionConfigurationError("ZHIPU_API_KEY 未配置，无法执行矫正")
-        self.client = ZhipuAiClient(api_key=settings.zhipu_api_key)
+        # 重试由下方按错误类型处理，关闭 SDK 自带的立即重试，避免叠加
+        self.client = get_shared_client(max_retries=0)
         self.model_id = settings.correction_model_id
         self.temperature = settings.correction_temperature
         self.max_tokens = settings.correction_max_tokens
         self.max_retries = settings.correction_max_retries
+        self.timeout = settings.correction_timeout_seconds
         self._prompt_template = self._load_prompt()
+        # 提示词模板与系统消息本身占用的 token，压缩输入时从预算中扣除
+        self._overhead_tokens = estimate_tokens(
+            JUDGE_SYSTEM_PROMPT + self._prompt_template.format(question="", standard_answer="", agent_output="")
+        )
+        # 由评测任务按需设置（见 build_similarity_scorer），为空时跳过相似度阶段
+        self.similarity = None
 
     def _load_prompt(self) -> str:
         try:
@@ -53,16 +122,29 @@ class CorrectionService:
             "仅返回 JSON，例如 {\"is_correct\": true, \"reason\": \"...\"}。"
         )
 
-    def _build_messages(self, question: str, standard_answer: str, agent_output: str) -> list[dict[str, str]]:
+    def _build_messages(
+        self, question: str, standard_answer: str, agent_output: str
+    ) -> tuple[list[dict[str, str]], bool]:
+        """Judge messages with the inputs compacted to CORRECTION_PROMPT_MAX_TOKENS; also returns whether anything was cut."""
+        compact = compact_judge_input(
+            question,
+            standard_answer,
+            agent_output,
+            max_tokens=settings.correction_prompt_max_tokens,
+            overhead_tokens=self._overhead_tokens,
+            include_reasoning=settings.correction_include_reasoning,
+        )
         prompt = self._prompt_template.format(
-            question=question,
-            standard_answer=standard_answer,
-            agent_output=agent_output,
+            question=compact.question,
+            standard_answer=compact.standard_answer,
+            agent_output=compact.agent_output,
         )
+        if compact.truncated:
+            logger.info("Correction prompt truncated to ~%s tokens", compact.estimated_tokens)
         return [
-            {"role": "system", "content": "你是一名严格的答案判定专家。"},
+            {"role": "system", "content": JUDGE_SYSTEM_PROMPT},
             {"role": "user", "content": prompt},
-        ]
+        ], compact.truncated
 
     @staticmethod
     def _extract_raw_text(choice) -> str:
@@ -143,7 +225,17 @@ class CorrectionService:
 
         return None, None, "Missing is_correct field"
 
-    def evaluate(self, *, question: str, standard_answer: str, agent_output: str) -> CorrectionOutcome:
+    def evaluate(
+        self,
+        *,
+        question: str,
+        standard_answer: str,
+        agent_output: str,
+        answer_pattern: Optional[str] = None,
+        answer_keywords: Optional[str] = None,
+        similarity: Optional[float] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> CorrectionOutcome:
         if not agent_output:
             return CorrectionOutcome(
                 status="FAILED",
@@ -153,22 +245,56 @@ class CorrectionService:
                 retries=0,
             )
 
-        messages = self._build_messages(question, standard_answer, agent_output)
+        # 能在本地确定结论的答案不再调用判定模型；相似度分数由调用方批量计算后传入
+        verdict = None
+        if settings.correction_precheck_enabled:
+            verdict = deterministic_verdict(
+                agent_output,
+                standard_answer,
+                answer_pattern=answer_pattern,
+                answer_keywords=answer_keywords,
+            )
+        if verdict is None:
+            verdict = similarity_verdict(
+                similarity,
+                answer=split_reasoning(agent_output)[0],
+                standard_answer=standard_answer,
+                scorer=self.similarity,
+            )
+        if verdict is not None:
+            return CorrectionOutcome(
+                status="SUCCESS",
+                is_correct=verdict.is_correct,
+                reason=verdict.reason,
+                error_message=None,
+                retries=0,
+                stage=verdict.stage,
+            )
+
+        messages, prompt_truncated = self._build_messages(question, standard_answer, agent_output)
+        temperature = self.temperature
         retries = 0
         last_error = None
+        # 每次重试都会计费，usage 按所有尝试累加
+        usage: Optional[TokenUsage] = None
         start = time.perf_counter()
 
         for attempt in range(self.max_retries + 1):
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model_id,
-                    messages=messages,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                    # 强制 JSON 输出，若服务端支持该参数，将提升可解析性
-                    response_format={"type": "json_object"},
-                    thinking={"type": "disabled"},
-                )
+                with model_semaphore(self.model_id):
+                    response = self.client.chat.completions.create(
+                        model=self.model_id,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=self.max_tokens,
+                        # 强制 JSON 输出，若服务端支持该参数，将提升可解析性
+                        response_format={"type": "json_object"},
+                        thinking={"type": "disabled"},
+                        timeout=llm_timeout(self.timeout, deadline),
+                    )
+                attempt_usage = normalize_usage(getattr(response, "usage", None))
+                if attempt_usage is not None:
+                    usage = attempt_usage if usage is None else usage + attempt_usage
                 response_dump = response.model_dump()
                 # 用 info 级别记录一次，便于现场排查
                 logger.info(
@@ -179,15 +305,15 @@ class CorrectionService:
 
                 choice = response.choices[0] if getattr(response, "choices", None) else None
                 if not choice:
-                    raise ValueError("Response missing choices")
+                    raise JudgeParseError("Response missing choices", "")
 
                 content = self._extract_raw_text(choice)
                 if not content:
-                    raise ValueError("Empty response content")
+                    raise JudgeParseError("Empty response content", "")
 
                 is_correct, reason, error_message = self._parse_content(content)
                 if error_message:
-                    raise ValueError(error_message)
+                    raise JudgeParseError(error_message, content)
                 logger.info(
                     "Correction succeeded (attempt %s, latency=%sms)",
                     attempt + 1,
@@ -199,16 +325,26 @@ class CorrectionService:
                     reason=reason,
                     error_message=None,
                     retries=retries,
+                    usage=usage,
+                    prompt_truncated=prompt_truncated,
                 )
             except Exception as exc:  # noqa: BLE001
-                last_error = str(exc)
-                logger.warning(
-                    "Correction attempt %s failed: %s | raw=%r",
-                    attempt + 1,
-                    last_error,
-                    content if 'content' in locals() else None,
-                )
+                kind = classify_error(exc)
+                last_error = f"{kind}: {exc}"
+                logger.warning("Correction attempt %s failed (%s): %s", attempt + 1, kind, exc)
                 retries = attempt + 1
+                if kind == ERROR_FATAL or attempt >= self.max_retries:
+                    break
+                if deadline is not None and deadline.expired:
+                    last_error = f"{ERROR_DEADLINE}: 超过{deadline.label}，停止重试（{last_error}）"
+                    break
+                if kind == ERROR_PARSE:
+                    # 同样的温度重试很少能修正格式：带上原输出要求只返回 JSON，并把温度降到 0
+                    messages = self._repair_messages(messages, getattr(exc, "raw", ""))
+                    temperature = 0.0
+                else:
+                    delay = backoff_delay(attempt, retry_after=_retry_after(exc))
+                    time.sleep(deadline.cap(delay) if deadline is not None else delay)
 
         return CorrectionOutcome(
             status="FAILED",
@@ -216,7 +352,25 @@ class CorrectionService:
             reason=None,
             error_message=last_error,
             retries=retries,
+            usage=usage,
+            prompt_truncated=prompt_truncated,
         )
 
+    @staticmethod
+    def _repair_messages(messages: list[dict[str, str]], raw: str) -> list[dict[str, str]]:
+        # 只保留原始判定请求，避免多轮修复时消息不断变长
+        return [
+            *messages[:2],
+            {"role": "assistant", "content": raw or "（空）"},
+            {"role": "user", "content": REPAIR_PROMPT},
+        ]
+
 
-__all__ = ["CorrectionService", "CorrectionOutcome", "CorrectionConfigurationError"]
+__all__ = [
+    "CorrectionService",
+    "CorrectionOutcome",
+    "CorrectionConfigurationError",
+    "JudgeParseError",
+    "backoff_delay",
+    "classify_error",
+]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from pathlib import Path
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette import status
+
+from app.core.config import settings
+from app.db.models.evaluation_task import Dataset
+from app.db.repositories import datasets as dataset_repo
+from app.utils.dataset_loader import parse_dataset
+from app.utils.storage import save_dataset_blob
+
+logger = logging.getLogger(__name__)
+
+
+def _ensure_within_row_limit(dataset: Dataset) -> None:
+    # 数据集可能在调低 MAX_DATASET_ROWS 之前登记，复用时重新校验
+    if dataset.row_count > settings.max_dataset_rows:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "code": "DATASET_TOO_MANY_ROWS",
+                "message": f"文件最多支持 {settings.max_dataset_rows} 行",
+            },
+        )
+
+
+def register_dataset_bytes(db: Session, *, filename: str, raw: bytes) -> Dataset:
+    """Return the registered dataset for a file, parsing and storing it only the first time."""
+    digest = hashlib.sha256(raw).hexdigest()
+
+    existing = dataset_repo.get_dataset_by_hash(db, digest)
+    if existing is not None:
+        _ensure_within_row_limit(existing)
+        dataset_repo.touch_dataset(db, existing)
+        logger.info("Reusing dataset %s for upload %s", existing.id, filename)
+        return existing
+
+    extension = Path(filename).suffix.lower()
+    records = parse_dataset(extension, raw)
+    path = save_dataset_blob(digest, extension, raw)
+    return dataset_repo.create_dataset(
+        db,
+        content_hash=digest,
+        filename=filename,
+        file_path=str(path),
+        records=records,
+    )
+
+
+def get_dataset_for_task(db: Session, dataset_id: str) -> Dataset:
+    dataset = dataset_repo.get_dataset(db, dataset_id)
+    if dataset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "DATASET_NOT_FOUND", "message": "数据集不存在"},
+        )
+    _ensure_within_row_limit(dataset)
+    dataset_repo.touch_dataset(db, dataset)
+    return dataset
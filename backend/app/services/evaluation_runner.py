@@ -3,8 +3,9 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import threading
 import time
-from typing import Any, Dict, Tuple, Optional
+from typing import Any, Callable, Dict, Tuple, Optional
 
 import httpx
 from sqlalchemy.orm import Session
@@ -14,7 +15,13 @@ from app.core.config import settings
 from app.db.models.evaluation_task import RunStatus, TaskStatus
 from app.db.repositories import evaluation_tasks as repo
 from app.db.session import SessionLocal
-from app.services.zhipu_runner import ZhipuConfigurationError, ZhipuRunner
+from app.services.agent_response import AgentResponse, compose_judge_input, split_reasoning
+from app.services.answer_similarity import build_similarity_scorer
+from app.services.export_cache import warm_export_cache
+from app.services.hedging import HedgePolicy, RequestCancelled, run_hedged
+from app.services.usage import TokenBudget, TokenBudgetExceeded, TokenUsage, normalize_usage, usage_cost
+from app.services.zhipu_runner import ZhipuConfigurationError, ZhipuRunner, llm_timeout
+from app.utils.deadlines import Deadline, DeadlineExceeded
 from app.services.correction_service import (
     CorrectionConfigurationError,
     CorrectionOutcome,
@@ -23,6 +30,9 @@ from app.services.correction_service import (
 
 logger = logging.getLogger(__name__)
 
+# 单次调用超时与单题时限耗尽都记为 RunStatus.TIMEOUT，错误码区分两者
+TIMEOUT_ERROR_CODES = {"TIMEOUT", "ITEM_DEADLINE"}
+
 
 def _prepare_payload(item: Any, task, *, session_id: str | None = None) -> Dict[str, Any]:
     payload: Dict[str, Any] = {
@@ -42,11 +52,23 @@ def _prepare_payload(item: Any, task, *, session_id: str | None = None) -> Dict[
     return {k: v for k, v in payload.items() if v not in (None, "") or k == "stream"}
 
 
-def _parse_stream_response(response: httpx.Response) -> Tuple[str, str | None, str]:
+def _parse_stream_response(
+    response: httpx.Response,
+    on_first_token: Optional[Callable[[], None]] = None,
+    on_usage: Optional[Callable[[Any], None]] = None,
+    deadline: Optional[Deadline] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Tuple[str, str | None, str | None, str]:
     content_parts: list[str] = []
+    reasoning_parts: list[str] = []
     raw_segments: list[str] = []
     error_message = None
     for raw_line in response.iter_lines():
+        # 读超时只限制两次读之间的间隔，持续输出的流由总时限截断
+        if deadline is not None and deadline.expired:
+            raise httpx.ReadTimeout(f"Agent stream exceeded {deadline.label}")
+        if cancel is not None and cancel.is_set():
+            raise RequestCancelled()
         if not raw_line:
             continue
         if isinstance(raw_line, bytes):
@@ -67,6 +89,8 @@ def _parse_stream_response(response: httpx.Response) -> Tuple[str, str | None, s
 
         event = event_payload.get("event")
         data = event_payload.get("data", {})
+        if on_usage is not None and isinstance(data, dict) and data.get("usage"):
+            on_usage(data["usage"])
         if event in {"llm_chunk", "reasoning_chunk"}:
             delta = (
                 data.get("choices", [{}])[0]
@@ -74,11 +98,10 @@ def _parse_stream_response(response: httpx.Response) -> Tuple[str, str | None, s
                 .get("content")
             )
             if delta:
-                content_parts.append(delta)
-        elif event == "reasoning_start":
-            content_parts.append("<think>\n")
-        elif event == "reasoning_end":
-            content_parts.append("</think>\n")
+                if on_first_token is not None and not (content_parts or reasoning_parts):
+                    on_first_token()
+                # 推理过程与最终答案分开收集，推理单独存储，不进入判定输入
+                (reasoning_parts if event == "reasoning_chunk" else content_parts).append(delta)
         elif event == "node_finished":
             output = data.get("output")
             if isinstance(output, dict):
@@ -91,10 +114,14 @@ def _parse_stream_response(response: httpx.Response) -> Tuple[str, str | None, s
         elif event == "llm_error":
             error_message = data.get("error_message") or "Agent returned llm_error event"
 
-    return "".join(content_parts).strip(), error_message, "\n".join(raw_segments)
+    reasoning = "".join(reasoning_parts).strip() or None
+    return "".join(content_parts).strip(), reasoning, error_message, "\n".join(raw_segments)
 
 
-def _parse_json_response(raw_text: str) -> Tuple[str, str | None]:
+def _parse_json_response(
+    raw_text: str,
+    on_usage: Optional[Callable[[Any], None]] = None,
+) -> Tuple[str, str | None]:
     try:
         data = json.loads(raw_text, strict=False)
     except json.JSONDecodeError:
@@ -111,6 +138,9 @@ def _parse_json_response(raw_text: str) -> Tuple[str, str | None]:
             if msg:
                 error_message = str(msg)
         outer_data = data.get("data", {}) if isinstance(data.get("data"), dict) else {}
+        usage = data.get("usage") or outer_data.get("usage")
+        if on_usage is not None and usage:
+            on_usage(usage)
         text = outer_data.get("text")
         if isinstance(text, list):
             output_lines.extend([str(item) for item in text])
@@ -131,6 +161,25 @@ def _parse_json_response(raw_text: str) -> Tuple[str, str | None]:
     return "\n".join(line for line in output_lines if line).strip(), error_message
 
 
+def _read_body(
+    response: httpx.Response,
+    *,
+    deadline: Optional[Deadline] = None,
+    cancel: Optional[threading.Event] = None,
+) -> str:
+    """Read a non-stream body chunk by chunk, stopping once the deadline passes or the request is cancelled."""
+    chunks: list[bytes] = []
+    for chunk in response.iter_bytes():
+        if deadline is not None and deadline.expired:
+            raise httpx.ReadTimeout(f"Agent response exceeded {deadline.label}")
+        if cancel is not None and cancel.is_set():
+            raise RequestCancelled()
+        chunks.append(chunk)
+    if cancel is not None and cancel.is_set():
+        raise RequestCancelled()
+    return b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+
+
 def _perform_request(
     client: httpx.Client,
     task,
@@ -139,8 +188,13 @@ def _perform_request(
     *,
     headers: Dict[str, str],
     session_id: str | None = None,
-) -> Tuple[str, str | None, str | None]:
+    on_first_token: Optional[Callable[[], None]] = None,
+    on_usage: Optional[Callable[[Any], None]] = None,
+    deadline: Optional[Deadline] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Tuple[str, str | None, str | None, str | None]:
     payload = _prepare_payload(item, task, session_id=session_id)
+    timeout = llm_timeout(settings.timeout_seconds, deadline)
     if "Content-Type" not in headers:
         headers["Content-Type"] = "application/json"
 
@@ -149,7 +203,7 @@ def _perform_request(
     )
 
     if task.use_stream:
-        with client.stream("POST", task.agent_api_url, json=payload, headers=headers) as response:
+        with client.stream("POST", task.agent_api_url, json=payload, headers=headers, timeout=timeout) as response:
             if response.status_code != 200:
                 body = response.text
                 logger.info(
@@ -158,19 +212,18 @@ def _perform_request(
                     response.status_code,
                     body,
                 )
-                return "", f"HTTP_{response.status_code}", body
-            content, err, raw_dump = _parse_stream_response(response)
+                return "", None, f"HTTP_{response.status_code}", body
+            content, reasoning, err, raw_dump = _parse_stream_response(
+                response, on_first_token, on_usage, deadline=deadline, cancel=cancel
+            )
             logger.info("Agent response (stream) [%s]: %s", context, raw_dump or "<empty>")
             if err:
-                return "", "AGENT_ERROR", err
-            return content or "", None, None
+                return "", None, "AGENT_ERROR", err
+            return content or "", reasoning, None, None
 
-    response = client.post(
-        task.agent_api_url,
-        json=payload,
-        headers=headers,
-    )
-    raw_text = response.text
+    # 非流式响应也按块读取，对冲落败或超过总时限时可中途关闭连接
+    with client.stream("POST", task.agent_api_url, json=payload, headers=headers, timeout=timeout) as response:
+        raw_text = _read_body(response, deadline=deadline, cancel=cancel)
     logger.info(
         "Agent response (json) [%s] status=%s body=%s",
         context,
@@ -178,11 +231,70 @@ def _perform_request(
         raw_text or "<empty>",
     )
     if response.status_code != 200:
-        return "", f"HTTP_{response.status_code}", raw_text
-    content, err = _parse_json_response(raw_text)
+        return "", None, f"HTTP_{response.status_code}", raw_text
+    content, err = _parse_json_response(raw_text, on_usage)
     if err:
-        return "", "AGENT_ERROR", err
-    return content, None, None
+        return "", None, "AGENT_ERROR", err
+    content, reasoning = split_reasoning(content)
+    return content, reasoning, None, None
+
+
+def _attempt_request(
+    client: httpx.Client,
+    task,
+    item,
+    run,
+    *,
+    session_id: str | None = None,
+    deadline: Optional[Deadline] = None,
+    cancel: Optional[threading.Event] = None,
+) -> AgentResponse:
+    started = time.perf_counter()
+    first_token_at: list[float] = []
+    reported_usage: list[Any] = []
+    try:
+        content, reasoning, error_code, error_message = _perform_request(
+            client,
+            task,
+            item,
+            run,
+            headers={**(task.agent_api_headers or {})},
+            session_id=session_id,
+            on_first_token=lambda: first_token_at.append(time.perf_counter()),
+            on_usage=reported_usage.append,
+            deadline=deadline,
+            cancel=cancel,
+        )
+    except httpx.TimeoutException:
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        return AgentResponse("", "TIMEOUT", f"Agent request timed out after {latency_ms}ms", latency_ms)
+    except httpx.TransportError as exc:
+        return AgentResponse("", "NETWORK_ERROR", str(exc), int((time.perf_counter() - started) * 1000))
+    except RequestCancelled:
+        return AgentResponse("", "CANCELLED", "Hedged request lost the race", int((time.perf_counter() - started) * 1000))
+
+    latency_ms = int((time.perf_counter() - started) * 1000)
+    if error_code or error_message:
+        return AgentResponse("", error_code or "AGENT_ERROR", error_message, latency_ms)
+    logger.info(
+        "Agent parsed content [%s]: %s",
+        f"task={task.id} item={item.question_id} run={run.run_index}",
+        (content[:200] + "..." if len(content) > 200 else content),
+    )
+    first_token_ms = int((first_token_at[0] - started) * 1000) if first_token_at else None
+    # 智能体若在响应中附带 usage（流式取最后一次），一并记录
+    usage = normalize_usage(reported_usage[-1]) if reported_usage else None
+    return AgentResponse(
+        content,
+        None,
+        None,
+        latency_ms,
+        reasoning=reasoning,
+        first_token_ms=first_token_ms,
+        prompt_tokens=usage.prompt_tokens if usage else None,
+        completion_tokens=usage.completion_tokens if usage else None,
+        reasoning_tokens=usage.reasoning_tokens if usage else None,
+    )
 
 
 def _execute_single_run(
@@ -192,47 +304,64 @@ def _execute_single_run(
     run,
     *,
     session_id: str | None = None,
-) -> Tuple[str, str | None, str | None, int]:
+    deadline: Optional[Deadline] = None,
+    hedge: Optional[HedgePolicy] = None,
+) -> AgentResponse:
     attempts = 0
     max_attempts = settings.request_max_retries + 1
-    last_error_code: str | None = None
-    last_error_message: str | None = None
+    result: AgentResponse | None = None
 
     while attempts < max_attempts:
+        if deadline is not None and deadline.expired:
+            if result is None:
+                return AgentResponse("", "ITEM_DEADLINE", f"超过{deadline.label}，未发起调用", 0)
+            break
         attempts += 1
-        started = time.perf_counter()
-        try:
-            content, error_code, error_message = _perform_request(
-                client,
-                task,
-                item,
-                run,
-                headers={**(task.agent_api_headers or {})},
-                session_id=session_id,
+        call_deadline = Deadline.earliest(deadline, Deadline(settings.llm_total_timeout_seconds, "单次调用时限"))
+
+        def attempt(cancel: threading.Event) -> AgentResponse:
+            return _attempt_request(
+                client, task, item, run, session_id=session_id, deadline=call_deadline, cancel=cancel
             )
-            latency_ms = int((time.perf_counter() - started) * 1000)
-            if error_code or error_message:
-                last_error_code = error_code or "AGENT_ERROR"
-                last_error_message = error_message
-            else:
-                logger.info(
-                    "Agent parsed content [%s]: %s",
-                    f"task={task.id} item={item.question_id} run={run.run_index}",
-                    (content[:200] + "..." if len(content) > 200 else content),
-                )
-                return content, None, None, latency_ms
-        except httpx.TimeoutException:
-            last_error_code = "TIMEOUT"
-            last_error_message = f"Agent request timed out after {settings.timeout_seconds}s"
-        except httpx.TransportError as exc:
-            last_error_code = "NETWORK_ERROR"
-            last_error_message = str(exc)
+
+        # 对冲只用于声明幂等的任务：慢请求超过历史延迟分位数时再发一份，取先成功者
+        result = run_hedged(attempt, hedge) if hedge is not None else attempt(threading.Event())
+        if not result.error_code:
+            return result
 
         if attempts < max_attempts:
-            time.sleep(1)  # 指数退避可后续扩展
+            time.sleep(deadline.cap(1) if deadline is not None else 1)  # 指数退避可后续扩展
 
-    latency_ms = int((time.perf_counter() - started) * 1000)
-    return "", last_error_code, last_error_message, latency_ms
+    return result
+
+
+def _run_status_for(result: AgentResponse) -> str:
+    if result.error_code:
+        return RunStatus.TIMEOUT if result.error_code in TIMEOUT_ERROR_CODES else RunStatus.FAILED
+    return RunStatus.SUCCEEDED
+
+
+def _run_metrics(result: AgentResponse, model_id: str | None) -> Dict[str, Any]:
+    return {
+        "first_token_ms": result.first_token_ms,
+        "tokens_per_second": result.tokens_per_second,
+        "prompt_tokens": result.prompt_tokens,
+        "completion_tokens": result.completion_tokens,
+        "reasoning_tokens": result.reasoning_tokens,
+        "cost": usage_cost(model_id, _result_usage(result)),
+    }
+
+
+def _result_usage(result: AgentResponse) -> TokenUsage | None:
+    if result.prompt_tokens is None and result.completion_tokens is None:
+        return None
+    return TokenUsage(result.prompt_tokens, result.completion_tokens, result.reasoning_tokens)
+
+
+def _charge(budget: TokenBudget | None, usage: TokenUsage | None) -> None:
+    # 只累加；预算在整题（或整组）完成后检查，避免题目停在半完成状态
+    if budget is not None and usage is not None:
+        budget.add(usage.total_tokens)
 
 
 def _build_group_session_id(task_id: str, session_group: str, run_index: int) -> str:
@@ -246,6 +375,8 @@ def _run_corrections_for_item(
     task,
     item,
     correction_service: Optional[CorrectionService],
+    budget: TokenBudget | None = None,
+    deadline: Deadline | None = None,
 ) -> None:
     runs = sorted(item.runs, key=lambda r: r.run_index)
     if not correction_service:
@@ -263,6 +394,15 @@ def _run_corrections_for_item(
         logger.warning("Task %s question %s: correction skipped (service unavailable)", task.id, item.question_id)
         return
 
+    # 相似度阶段：同一题的所有回答与标准答案一次批量打分
+    scorer = getattr(correction_service, "similarity", None)
+    similarities: Dict[int, float] = {}
+    if scorer is not None:
+        answered = [run for run in runs if run.status == RunStatus.SUCCEEDED and run.response_body]
+        if answered:
+            scores = scorer.score(item.standard_answer, [split_reasoning(run.response_body)[0] for run in answered])
+            similarities = {run.run_index: float(score) for run, score in zip(answered, scores)}
+
     all_correct = True
     for run in runs:
         if run.status != RunStatus.SUCCEEDED or not run.response_body:
@@ -278,10 +418,34 @@ def _run_corrections_for_item(
             all_correct = False
             continue
 
+        if deadline is not None and deadline.expired:
+            repo.update_run_correction(
+                db,
+                run,
+                status="FAILED",
+                result=False,
+                reason=None,
+                error_message=f"DEADLINE: 超过{deadline.label}，未执行判定",
+                retries=0,
+            )
+            all_correct = False
+            continue
+
+        # 默认仅将最终答案送入判定；历史数据中内联的 <think> 块在此拆出
+        answer, inline_reasoning = split_reasoning(run.response_body)
+        reasoning = inline_reasoning
+        if settings.correction_include_reasoning:
+            reasoning = getattr(run, "reasoning_body", None) or inline_reasoning
         outcome: CorrectionOutcome = correction_service.evaluate(
             question=item.question,
             standard_answer=item.standard_answer,
-            agent_output=run.response_body,
+            agent_output=compose_judge_input(
+                answer, reasoning, include_reasoning=settings.correction_include_reasoning
+            ),
+            answer_pattern=getattr(item, "answer_pattern", None),
+            answer_keywords=getattr(item, "answer_keywords", None),
+            similarity=similarities.get(run.run_index),
+            deadline=deadline,
         )
         repo.update_run_correction(
             db,
@@ -291,7 +455,13 @@ def _run_corrections_for_item(
             reason=outcome.reason,
             error_message=outcome.error_message,
             retries=outcome.retries,
+            prompt_tokens=outcome.usage.prompt_tokens if outcome.usage else None,
+            completion_tokens=outcome.usage.completion_tokens if outcome.usage else None,
+            cost=usage_cost(settings.correction_model_id, outcome.usage),
+            stage=outcome.stage,
+            prompt_truncated=outcome.prompt_truncated,
         )
+        _charge(budget, outcome.usage)
         if outcome.status != "SUCCESS" or not outcome.is_correct:
             all_correct = False
 
@@ -307,6 +477,8 @@ def _process_single_item(
     zhipu_runner: ZhipuRunner | None,
     client: httpx.Client | None,
     correction_service: CorrectionService | None,
+    budget: TokenBudget | None = None,
+    hedge: HedgePolicy | None = None,
 ) -> None:
     runs = sorted(item.runs, key=lambda r: r.run_index)
     pending_runs = [run for run in runs if run.status == RunStatus.RETRYING]
@@ -318,47 +490,62 @@ def _process_single_item(
         )
         return
 
-    for run in pending_runs:
+    # 单题时限覆盖该题全部运行与判定，用尽后剩余运行记为超时、判定记为失败
+    deadline = Deadline(settings.item_deadline_seconds, "单题时限")
+    model_id = zhipu_runner.model_id if use_zhipu and zhipu_runner else getattr(task, "agent_model", None)
+    # 智谱模式下同一题的多次运行并发调用，结果仍在当前线程按顺序写库
+    zhipu_results: Dict[int, AgentResponse] = {}
+    if use_zhipu and zhipu_runner is not None:
         logger.info(
-            "Task %s question %s run #%s started",
+            "Task %s question %s: dispatching %s runs concurrently",
             task.id,
             item.question_id,
-            run.run_index,
+            len(pending_runs),
         )
+        results = zhipu_runner.execute_many(task, item, pending_runs, deadline=deadline)
+        zhipu_results = {run.run_index: result for run, result in zip(pending_runs, results)}
+
+    for run in pending_runs:
         if use_zhipu and zhipu_runner is not None:
-            content, error_code, error_message, latency_ms = zhipu_runner.execute(
-                task, item, run
-            )
+            result = zhipu_results[run.run_index]
         else:
+            logger.info(
+                "Task %s question %s run #%s started",
+                task.id,
+                item.question_id,
+                run.run_index,
+            )
             if client is None:
                 raise RuntimeError("HTTP client is not available for agent execution")
-            content, error_code, error_message, latency_ms = _execute_single_run(
+            result = _execute_single_run(
                 client,
                 task,
                 item,
                 run,
+                deadline=deadline,
+                hedge=hedge,
             )
-        if error_code:
-            status = RunStatus.TIMEOUT if error_code == "TIMEOUT" else RunStatus.FAILED
-        else:
-            status = RunStatus.SUCCEEDED
+        status = _run_status_for(result)
         repo.update_run_result(
             db,
             run,
             status=status,
-            response_body=content or None,
-            latency_ms=latency_ms,
-            error_code=error_code,
-            error_message=error_message,
+            response_body=result.content or None,
+            reasoning=result.reasoning,
+            latency_ms=result.latency_ms,
+            error_code=result.error_code,
+            error_message=result.error_message,
+            **_run_metrics(result, model_id),
         )
+        _charge(budget, _result_usage(result))
         logger.info(
             "Task %s question %s run #%s finished status=%s latency=%sms error_code=%s",
             task.id,
             item.question_id,
             run.run_index,
             status,
-            latency_ms,
-            error_code or "",
+            result.latency_ms,
+            result.error_code or "",
         )
         db.commit()
 
@@ -368,16 +555,18 @@ def _process_single_item(
             task=task,
             item=item,
             correction_service=correction_service,
+            budget=budget,
+            deadline=deadline,
         )
         db.commit()
 
-    repo.increment_task_progress(db, task)
+    processed = repo.increment_task_progress(db, task)
     db.commit()
     logger.info(
         "Task %s: question %s finished, progress=%s/%s",
         task.id,
         item.question_id,
-        task.progress_processed,
+        processed,
         task.total_items,
     )
 
@@ -391,6 +580,7 @@ def _process_multi_turn_group(
     client: httpx.Client | None,
     use_zhipu: bool,
     correction_service: CorrectionService | None,
+    budget: TokenBudget | None = None,
 ) -> None:
     if use_zhipu:
         raise RuntimeError("Multi-turn session groups require HTTP agent mode")
@@ -411,6 +601,8 @@ def _process_multi_turn_group(
         )
         return
 
+    # 多轮会话组按题数放大单题时限
+    deadline = Deadline(settings.item_deadline_seconds * len(items), "会话组时限")
     for run_index in range(1, task.runs_per_item + 1):
         if not any(
             run_lookup[item.id].get(run_index) and run_lookup[item.id][run_index].status == RunStatus.RETRYING
@@ -437,26 +629,27 @@ def _process_multi_turn_group(
                 )
                 continue
 
-            content, error_code, error_message, latency_ms = _execute_single_run(
+            result = _execute_single_run(
                 client,
                 task,
                 item,
                 run,
                 session_id=session_id,
+                deadline=deadline,
             )
-            if error_code:
-                status = RunStatus.TIMEOUT if error_code == "TIMEOUT" else RunStatus.FAILED
-            else:
-                status = RunStatus.SUCCEEDED
+            status = _run_status_for(result)
             repo.update_run_result(
                 db,
                 run,
                 status=status,
-                response_body=content or None,
-                latency_ms=latency_ms,
-                error_code=error_code,
-                error_message=error_message,
+                response_body=result.content or None,
+                reasoning=result.reasoning,
+                latency_ms=result.latency_ms,
+                error_code=result.error_code,
+                error_message=result.error_message,
+                **_run_metrics(result, getattr(task, "agent_model", None)),
             )
+            _charge(budget, _result_usage(result))
             logger.info(
                 "Task %s session_group %s question %s run #%s finished status=%s latency=%sms error_code=%s",
                 task.id,
@@ -464,8 +657,8 @@ def _process_multi_turn_group(
                 item.question_id,
                 run_index,
                 status,
-                latency_ms,
-                error_code or "",
+                result.latency_ms,
+                result.error_code or "",
             )
             db.commit()
 
@@ -476,18 +669,20 @@ def _process_multi_turn_group(
                 task=task,
                 item=item,
                 correction_service=correction_service,
+                budget=budget,
+                deadline=deadline,
             )
             db.commit()
 
     for item in items:
         if pending_flags.get(item.id):
-            repo.increment_task_progress(db, task)
+            processed = repo.increment_task_progress(db, task)
             db.commit()
             logger.info(
                 "Task %s: question %s finished, progress=%s/%s",
                 task.id,
                 item.question_id,
-                task.progress_processed,
+                processed,
                 task.total_items,
             )
 
@@ -498,6 +693,8 @@ def _process_task(db: Session, task_id: str) -> None:
         logger.info("Task %s already claimed or finished, skipping execution", task_id)
         return
     db.commit()
+    repo.seed_live_progress(db, task)
+    db.commit()
 
     use_zhipu = False
     zhipu_runner: ZhipuRunner | None = None
@@ -513,7 +710,7 @@ def _process_task(db: Session, task_id: str) -> None:
             db.commit()
             return
 
-    timeout = httpx.Timeout(settings.timeout_seconds, read=settings.timeout_seconds)
+    timeout = llm_timeout(settings.timeout_seconds)
     client: httpx.Client | None = None
     if not use_zhipu:
         client = httpx.Client(timeout=timeout)
@@ -526,9 +723,21 @@ def _process_task(db: Session, task_id: str) -> None:
             logger.error("矫正服务初始化失败：%s", exc)
             correction_service = None
 
+    # 续跑时从已落库的用量开始累计
+    budget = TokenBudget(
+        task.token_budget,
+        used=repo.summarize_task_usage(db, task.id)["total_tokens"] if task.token_budget else 0,
+    )
+    # 任务时限在题目（或会话组）之间检查，单次调用由各自的超时约束
+    task_deadline = Deadline(settings.task_deadline_seconds, "任务时限")
+    # 对冲请求需任务显式声明智能体幂等；多轮会话组带会话状态，不做对冲
+    hedge = HedgePolicy(task.id) if getattr(task, "hedge_requests", False) and not use_zhipu else None
+
     try:
         items = repo.list_items_for_task(db, task_id)
         total_items = len(items)
+        if correction_service is not None and settings.correction_similarity_enabled:
+            correction_service.similarity = build_similarity_scorer(item.standard_answer for item in items)
         group_map: dict[str, list] = {}
         for item in items:
             if item.session_group:
@@ -564,8 +773,11 @@ def _process_task(db: Session, task_id: str) -> None:
                     client=client,
                     use_zhipu=use_zhipu,
                     correction_service=correction_service,
+                    budget=budget,
                 )
                 processed_groups.add(group_key)
+                budget.check()
+                task_deadline.check()
                 continue
 
             logger.info(
@@ -583,15 +795,33 @@ def _process_task(db: Session, task_id: str) -> None:
                 zhipu_runner=zhipu_runner,
                 client=client,
                 correction_service=correction_service,
+                budget=budget,
+                hedge=hedge,
             )
+            budget.check()
+            task_deadline.check()
 
+        repo.finalize_task_progress(db, task)
+        repo.store_task_usage(db, task)
         repo.mark_task_status(db, task, TaskStatus.SUCCEEDED)
         db.commit()
         if task.enable_correction:
             repo.calculate_accuracy(db, task)
             db.commit()
-    except Exception:
+        warm_export_cache(task_id)
+    except (TokenBudgetExceeded, DeadlineExceeded) as exc:
+        db.rollback()
+        repo.finalize_task_progress(db, task)
+        repo.store_task_usage(db, task)
+        task.failure_reason = str(exc)
+        repo.mark_task_status(db, task, TaskStatus.FAILED)
+        db.commit()
+        logger.warning("Task %s stopped: %s", task_id, exc)
+    except Exception as exc:
         db.rollback()
+        repo.finalize_task_progress(db, task)
+        repo.store_task_usage(db, task)
+        task.failure_reason = f"评测执行异常: {exc}"[:1000]
         repo.mark_task_status(db, task, TaskStatus.FAILED)
         db.commit()
         logger.exception("Failed to process evaluation task %s", task_id)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.redis import get_available_redis_client, mark_redis_unavailable
+from app.db.models.evaluation_task import EvaluationTask, TaskStatus
+from app.db.repositories import evaluation_tasks as repo
+from app.db.session import SessionLocal
+from app.services.retention import restore_task
+from app.utils.exporter import EXPORT_WRITERS
+from app.utils.storage import get_export_path
+
+logger = logging.getLogger(__name__)
+
+BUILD_LOCK_PREFIX = "evaluation-task-export-build"
+BUILD_LOCK_TTL_SECONDS = 600
+
+
+def _build_lock_key(task_id: str, fmt: str, include_errors: bool) -> str:
+    return f"{BUILD_LOCK_PREFIX}:{task_id}:{fmt}:{int(include_errors)}"
+
+
+def get_cached_export(task_id: str, fmt: str, include_errors: bool) -> Optional[Path]:
+    if not settings.export_cache_enabled:
+        return None
+    path = get_export_path(task_id, fmt, include_errors)
+    return path if path.is_file() else None
+
+
+def write_export_artifact(db: Session, task: EvaluationTask, fmt: str, include_errors: bool) -> Path:
+    """Render an export to a temp file and atomically move it into the cache slot."""
+    writer = EXPORT_WRITERS[fmt]
+    path = get_export_path(task.id, fmt, include_errors)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    items = repo.iter_items_for_task(db, task.id, batch_size=settings.export_batch_size)
+    try:
+        with tmp_path.open("wb") as fh:
+            for chunk in writer(task, items, include_errors=include_errors):
+                fh.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return path
+
+
+def request_export_build(task_id: str, fmt: str, include_errors: bool) -> None:
+    """Enqueue a background build unless one is already in flight for the same artifact."""
+    if not settings.export_cache_enabled:
+        return
+    client = get_available_redis_client()
+    if client is not None:
+        try:
+            if not client.set(_build_lock_key(task_id, fmt, include_errors), "1", nx=True, ex=BUILD_LOCK_TTL_SECONDS):
+                return
+        except Exception as exc:  # pragma: no cover - redis failure path
+            mark_redis_unavailable(exc)
+    try:
+        build_export_artifact_job.delay(task_id, fmt, include_errors)
+    except Exception:
+        logger.exception("Failed to enqueue export build for task %s (%s)", task_id, fmt)
+
+
+def warm_export_cache(task_id: str) -> None:
+    """Pre-build the default export formats right after a task succeeds."""
+    if not settings.export_cache_enabled:
+        return
+    for fmt in settings.export_prewarm_format_list:
+        if fmt not in EXPORT_WRITERS:
+            logger.warning("Ignoring unknown export prewarm format %s", fmt)
+            continue
+        # 覆盖可能在任务完成前生成的旧文件（例如准确率尚未写入时）
+        get_export_path(task_id, fmt, True).unlink(missing_ok=True)
+        request_export_build(task_id, fmt, True)
+
+
+@celery_app.task(name="app.services.export_cache.build_export_artifact_job")
+def build_export_artifact_job(task_id: str, fmt: str, include_errors: bool = True) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        task = repo.get_task(db, task_id)
+        if not task or task.status != TaskStatus.SUCCEEDED:
+            return None
+        if task.archived_at:
+            restore_task(db, task)
+            db.commit()
+        path = write_export_artifact(db, task, fmt, include_errors)
+        logger.info("Export artifact for task %s written to %s", task_id, path)
+        return str(path)
+    except Exception:
+        db.rollback()
+        logger.exception("Failed to build %s export for task %s", fmt, task_id)
+        return None
+    finally:
+        db.close()
+        client = get_available_redis_client()
+        if client is not None:
+            try:
+                client.delete(_build_lock_key(task_id, fmt, include_errors))
+            except Exception as exc:  # pragma: no cover - redis failure path
+                mark_redis_unavailable(exc)
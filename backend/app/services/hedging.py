@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.services.agent_response import AgentResponse
+from app.utils import task_events
+
+logger = logging.getLogger(__name__)
+
+# 延迟阈值按此间隔从 Redis 刷新，避免每次运行都查询
+DELAY_REFRESH_SECONDS = 10.0
+
+
+class RequestCancelled(Exception):
+    """Raised inside a request that lost the hedge race so it stops reading."""
+
+
+class HedgePolicy:
+    """Per-task hedging state: delay from observed latency, hedges capped at a share of requests."""
+
+    def __init__(
+        self,
+        task_id: str,
+        *,
+        percentile: Optional[float] = None,
+        max_ratio: Optional[float] = None,
+        min_samples: Optional[int] = None,
+    ) -> None:
+        self.task_id = task_id
+        self.percentile = settings.hedge_percentile if percentile is None else percentile
+        self.max_ratio = settings.hedge_max_ratio if max_ratio is None else max_ratio
+        self.min_samples = settings.hedge_min_samples if min_samples is None else min_samples
+        self.requests = 0
+        self.hedged = 0
+        self._delay: Optional[float] = None
+        self._delay_checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def delay_seconds(self) -> Optional[float]:
+        """Latency percentile of the task's finished runs, or None until enough runs were seen."""
+        now = time.monotonic()
+        if self._delay_checked_at is None or now - self._delay_checked_at >= DELAY_REFRESH_SECONDS:
+            self._delay_checked_at = now
+            observed = task_events.get_latency_percentile(self.task_id, self.percentile)
+            self._delay = observed[1] / 1000 if observed and observed[0] >= self.min_samples else None
+        return self._delay
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_ratio * self.requests:
+                return False
+            self.hedged += 1
+            return True
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+
+def run_hedged(call: Callable[[threading.Event], AgentResponse], policy: HedgePolicy) -> AgentResponse:
+    """Run ``call``; if it is still running after the policy delay, race a duplicate and keep the first success.
+
+    ``call`` receives a cancel event and must stop reading once it is set. Latencies of the
+    returned response are measured from the first request, not from the hedge.
+    """
+    policy.record_request()
+    delay = policy.delay_seconds()
+    if delay is None:
+        return call(threading.Event())
+
+    started = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+    cancels = {}
+    offsets = {}
+
+    def submit() -> None:
+        cancel = threading.Event()
+        future = pool.submit(call, cancel)
+        cancels[future] = cancel
+        offsets[future] = int((time.perf_counter() - started) * 1000)
+
+    try:
+        submit()
+        done, _ = wait(list(cancels), timeout=delay)
+        if not done and policy.try_acquire():
+            logger.info("Task %s: no response after %.2fs, sending hedged request", policy.task_id, delay)
+            submit()
+
+        winner = None
+        pending = set(cancels)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if winner is None or (winner[1].error_code and not result.error_code):
+                    winner = (future, result)
+            if not winner[1].error_code:
+                break
+        # 未完成的请求收到取消信号后自行关闭连接
+        for future, cancel in cancels.items():
+            if not future.done():
+                cancel.set()
+    finally:
+        pool.shutdown(wait=False)
+
+    future, result = winner
+    offset = offsets[future]
+    if not offset:
+        return result
+    return dataclasses.replace(
+        result,
+        latency_ms=result.latency_ms + offset,
+        first_token_ms=result.first_token_ms + offset if result.first_token_ms is not None else None,
+    )
+
+
+__all__ = ["HedgePolicy", "RequestCancelled", "run_hedged"]
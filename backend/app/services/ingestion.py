@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette import status
+
+from app.celery_app import celery_app
+from app.db.models.evaluation_task import Dataset, EvaluationTask, TaskStatus
+from app.db.repositories import evaluation_tasks as repo
+from app.db.session import SessionLocal
+from app.services.dataset_service import register_dataset_bytes
+from app.services.evaluation_runner import run_evaluation_task
+
+logger = logging.getLogger(__name__)
+
+
+def populate_task_from_dataset(db: Session, task: EvaluationTask, dataset: Dataset) -> int:
+    """Bulk insert a task's items and initial runs from a registered dataset."""
+    records = dataset.records
+    if not records:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"code": "DATASET_EMPTY", "message": "文件没有有效的问题数据"},
+        )
+    item_ids = repo.bulk_insert_items(db, task_id=task.id, items=records)
+    repo.bulk_create_initial_runs(db, item_ids=item_ids, runs_per_item=task.runs_per_item)
+    task.dataset_id = dataset.id
+    task.total_items = len(item_ids)
+    db.add(task)
+    return len(item_ids)
+
+
+def _failure_reason(exc: Exception) -> str:
+    if isinstance(exc, HTTPException) and isinstance(exc.detail, dict):
+        return str(exc.detail.get("message") or exc.detail.get("code"))
+    return f"数据集导入失败: {exc}"
+
+
+def enqueue_evaluation(task_id: str) -> None:
+    try:
+        run_evaluation_task.delay(task_id)
+    except Exception as exc:  # pragma: no cover - Celery backend might be unavailable
+        logger.exception("failed to enqueue evaluation task %s: %s", task_id, exc)
+
+
+def ingest_spooled_dataset(db: Session, task_id: str, spool_path: str) -> bool:
+    """Parse, validate and insert a spooled upload, then hand the task to the evaluation queue."""
+    task = repo.get_task(db, task_id)
+    if not task or task.status != TaskStatus.INGESTING:
+        return False
+
+    path = Path(spool_path)
+    try:
+        dataset = register_dataset_bytes(db, filename=path.name, raw=path.read_bytes())
+        total = populate_task_from_dataset(db, task, dataset)
+        repo.mark_task_status(db, task, TaskStatus.PENDING)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        if not isinstance(exc, HTTPException):
+            logger.exception("Failed to ingest dataset for task %s", task_id)
+        task = repo.get_task(db, task_id)
+        if task is not None:
+            task.failure_reason = _failure_reason(exc)
+            repo.mark_task_status(db, task, TaskStatus.FAILED)
+            db.commit()
+        return False
+    finally:
+        path.unlink(missing_ok=True)
+
+    logger.info("Task %s ingested %s items from dataset %s", task_id, total, task.dataset_id)
+    enqueue_evaluation(task_id)
+    return True
+
+
+@celery_app.task(name="app.services.ingestion.ingest_task_dataset")
+def ingest_task_dataset(task_id: str, spool_path: str) -> bool:
+    db = SessionLocal()
+    try:
+        return ingest_spooled_dataset(db, task_id, spool_path)
+    finally:
+        db.close()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
+
+from app.services.agent_response import compose_judge_input, split_reasoning
+
+try:  # pragma: no cover - optional dependency
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None  # type: ignore[assignment]
+
+CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+TRUNCATION_MARKER = "\n…（中间 {omitted} 字已省略）…\n"
+# 短行（如"好的""1."）重复出现是正常内容，只对足够长的块去重
+MIN_DEDUPE_LENGTH = 8
+# 去重前先把回答截到预算的若干倍，超长输出不会拖慢去重
+DEDUPE_HEADROOM = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # noqa: BLE001 - 离线环境无法下载词表时退回估算
+        return None
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Token count from tiktoken when available, else ~1 token per CJK char and per 4 other chars."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def dedupe_blocks(text: str) -> str:
+    """Drop repeated lines, e.g. ``node_finished`` outputs that echo the streamed answer."""
+    kept: List[str] = []
+    seen: Set[str] = set()
+    for line in text.splitlines():
+        stripped = line.strip()
+        if len(stripped) >= MIN_DEDUPE_LENGTH:
+            if stripped in seen:
+                continue
+            seen.add(stripped)
+        kept.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def truncate_to_tokens(text: str, limit: int) -> Tuple[str, bool]:
+    """Keep the head and tail of ``text`` within ``limit`` tokens; the conclusion is usually at the end."""
+    total = estimate_tokens(text)
+    if total <= limit:
+        return text, False
+    keep = int(len(text) * limit / total)
+    while keep > 0:
+        head = keep * 2 // 3
+        tail = keep - head
+        candidate = text[:head] + TRUNCATION_MARKER.format(omitted=len(text) - keep) + (text[-tail:] if tail else "")
+        if estimate_tokens(candidate) <= limit:
+            return candidate, True
+        keep = int(keep * 0.9)
+    return "", True
+
+
+@dataclass
+class JudgeInput:
+    question: str
+    standard_answer: str
+    agent_output: str
+    estimated_tokens: int
+    truncated: bool
+
+
+def compact_judge_input(
+    question: str,
+    standard_answer: str,
+    agent_output: str,
+    *,
+    max_tokens: int,
+    overhead_tokens: int = 0,
+    include_reasoning: bool = False,
+) -> JudgeInput:
+    """Strip reasoning, dedupe repeated blocks and fit the three fields into ``max_tokens``.
+
+    The agent answer gets whatever the question and standard answer (each capped at a quarter
+    of the budget) leave; reasoning, when kept, only uses what the answer does not.
+    """
+    answer, reasoning = split_reasoning(agent_output)
+    budget = max(max_tokens - overhead_tokens, 0)
+    answer, precut = truncate_to_tokens(answer, budget * DEDUPE_HEADROOM)
+    answer = dedupe_blocks(answer)
+
+    question, question_cut = truncate_to_tokens(question or "", budget // 4)
+    standard_answer, standard_cut = truncate_to_tokens(standard_answer or "", budget // 4)
+    remaining = budget - estimate_tokens(question) - estimate_tokens(standard_answer)
+    answer, answer_cut = truncate_to_tokens(answer, remaining)
+
+    reasoning_cut = False
+    if include_reasoning and reasoning:
+        reasoning, reasoning_cut = truncate_to_tokens(reasoning, remaining - estimate_tokens(answer))
+    output = compose_judge_input(answer, reasoning, include_reasoning=include_reasoning)
+    return JudgeInput(
+        question=question,
+        standard_answer=standard_answer,
+        agent_output=output,
+        estimated_tokens=overhead_tokens
+        + estimate_tokens(question)
+        + estimate_tokens(standard_answer)
+        + estimate_tokens(output),
+        truncated=precut or question_cut or standard_cut or answer_cut or reasoning_cut,
+    )
+
+
+__all__ = ["JudgeInput", "compact_judge_input", "dedupe_blocks", "estimate_tokens", "truncate_to_tokens"]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PromptRegistry:
+    """Process-wide cache of prompt files, re-read only when a file's mtime changes."""
+
+    def __init__(self) -> None:
+        self._cache: Dict[Path, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, *, warn_missing: bool = True) -> str:
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            with self._lock:
+                self._cache.pop(path, None)
+            if warn_missing:
+                logger.warning("Prompt file not found: %s", path)
+            return ""
+        except OSError as exc:
+            logger.warning("Failed to stat prompt file %s: %s", path, exc)
+            return ""
+
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        try:
+            text = path.read_text(encoding="utf-8").strip()
+        except OSError as exc:
+            logger.warning("Failed to read prompt file %s: %s", path, exc)
+            return ""
+        with self._lock:
+            self._cache[path] = (mtime_ns, text)
+        return text
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+prompt_registry = PromptRegistry()
+
+__all__ = ["PromptRegistry", "prompt_registry"]
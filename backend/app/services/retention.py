@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette import status
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db.models.evaluation_task import EvaluationItem, EvaluationTask
+from app.db.repositories import evaluation_tasks as repo
+from app.db.session import SessionLocal
+from app.services.statistics import CorrectionAggregator
+from app.utils.storage import get_archive_path, remove_task_upload_dir
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = "evaluation-task-archive"
+ARCHIVE_VERSION = 1
+
+
+class ArchiveError(RuntimeError):
+    """Raised when an archive file is missing or cannot be restored."""
+
+
+def _iso(dt: datetime | None) -> str | None:
+    return dt.isoformat() if dt else None
+
+
+def _item_record(item: EvaluationItem) -> Dict[str, Any]:
+    return {
+        "id": item.id,
+        "row_index": item.row_index,
+        "question_id": item.question_id,
+        "question": item.question,
+        "standard_answer": item.standard_answer,
+        "system_prompt": item.system_prompt,
+        "user_context": item.user_context,
+        "session_group": item.session_group,
+        "answer_pattern": item.answer_pattern,
+        "answer_keywords": item.answer_keywords,
+        "is_passed": item.is_passed,
+        "created_at": _iso(item.created_at),
+        "runs": [
+            {
+                "id": run.id,
+                "run_index": run.run_index,
+                "status": run.status,
+                "response_body": run.response_body,
+                "reasoning_body": run.reasoning_body,
+                "latency_ms": run.latency_ms,
+                "first_token_ms": run.first_token_ms,
+                "tokens_per_second": run.tokens_per_second,
+                "prompt_tokens": run.prompt_tokens,
+                "completion_tokens": run.completion_tokens,
+                "reasoning_tokens": run.reasoning_tokens,
+                "cost": run.cost,
+                "correction_prompt_tokens": run.correction_prompt_tokens,
+                "correction_completion_tokens": run.correction_completion_tokens,
+                "correction_cost": run.correction_cost,
+                "correction_stage": run.correction_stage,
+                "correction_prompt_truncated": run.correction_prompt_truncated,
+                "error_code": run.error_code,
+                "error_message": run.error_message,
+                "correction_status": run.correction_status,
+                "correction_result": run.correction_result,
+                "correction_reason": run.correction_reason,
+                "correction_error_message": run.correction_error_message,
+                "correction_retries": run.correction_retries,
+                "created_at": _iso(run.created_at),
+                "updated_at": _iso(run.updated_at),
+            }
+            for run in sorted(item.runs, key=lambda r: r.run_index)
+        ],
+    }
+
+
+def build_summary_stats(items: list[EvaluationItem]) -> Dict[str, Any]:
+    """Summary kept on the task row once its detail rows are archived."""
+    aggregator = CorrectionAggregator()
+    run_status_counts: Dict[str, int] = {}
+    latencies: list[int] = []
+    for item in items:
+        aggregator.observe_item(item)
+        for run in item.runs:
+            run_status_counts[run.status] = run_status_counts.get(run.status, 0) + 1
+            if run.latency_ms is not None:
+                latencies.append(run.latency_ms)
+    stats = aggregator.to_stats()
+    latencies.sort()
+    return {
+        "total_items": stats.total_items,
+        "passed": stats.passed,
+        "partial_error_count": stats.partial_error_count,
+        "correction_failed_count": stats.correction_failed_count,
+        "run_status_counts": run_status_counts,
+        "latency_avg_ms": int(sum(latencies) / len(latencies)) if latencies else None,
+        "latency_p95_ms": latencies[math.ceil(len(latencies) * 0.95) - 1] if latencies else None,
+    }
+
+
+def archive_task(db: Session, task: EvaluationTask) -> Path:
+    """Export a task's items/runs to a gzip JSONL file and drop the detail rows."""
+    items = repo.list_items_for_task(db, task.id, include_reasoning=True)
+    path = get_archive_path(task.id)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+        header = {"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION, "task_id": task.id}
+        fh.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for item in items:
+            fh.write(json.dumps(_item_record(item), ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+    task.summary_stats = build_summary_stats(items)
+    task.archive_path = str(path)
+    task.archived_at = datetime.now(timezone.utc)
+    db.add(task)
+    db.flush()
+    repo.delete_task_details(db, task.id)
+    return path
+
+
+def _read_archive(path: Path, task_id: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        header = json.loads(fh.readline() or "{}")
+        if header.get("format") != ARCHIVE_FORMAT or header.get("task_id") != task_id:
+            raise ArchiveError(f"Archive {path} does not belong to task {task_id}")
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def restore_task(db: Session, task: EvaluationTask) -> int:
+    """Re-hydrate an archived task's detail rows from its archive file."""
+    if not task.archived_at:
+        return 0
+    path = Path(task.archive_path or get_archive_path(task.id))
+    if not path.exists():
+        raise ArchiveError(f"Archive file missing for task {task.id}: {path}")
+    restored = repo.restore_items(db, task_id=task.id, records=_read_archive(path, task.id))
+    task.archived_at = None
+    task.archive_path = None
+    # 重新计入保留期，避免刚恢复就被再次归档
+    task.updated_at = datetime.now(timezone.utc)
+    db.add(task)
+    db.flush()
+    logger.info("Task %s restored from archive %s (%s items)", task.id, path, restored)
+    return restored
+
+
+def ensure_task_hydrated(db: Session, task: EvaluationTask) -> None:
+    """Restore an archived task on read; concurrent readers wait on the row lock and skip the restore."""
+    if not task.archived_at:
+        return
+    try:
+        locked = repo.lock_task(db, task.id)
+        if locked is None or not locked.archived_at:
+            # 其他请求已完成恢复，释放行锁即可
+            db.commit()
+            return
+        restore_task(db, locked)
+        db.commit()
+    except IntegrityError:
+        # 不支持行锁的数据库上可能并发插入同一批明细；对方已恢复时继续读取
+        db.rollback()
+        db.refresh(task)
+        if task.archived_at:
+            raise
+    except ArchiveError as exc:
+        db.rollback()
+        logger.error("Failed to restore archived task %s: %s", task.id, exc)
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail={"code": "TASK_ARCHIVE_UNAVAILABLE", "message": "任务明细已归档且归档文件不可用"},
+        ) from exc
+    except Exception:
+        db.rollback()
+        raise
+
+
+def archive_expired_tasks(db: Session, *, now: datetime | None = None) -> int:
+    if settings.retention_days <= 0:
+        return 0
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=settings.retention_days)
+    archived = 0
+    for task in repo.list_tasks_due_for_archive(db, cutoff=cutoff, limit=settings.retention_batch_size):
+        try:
+            path = archive_task(db, task)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to archive task %s", task.id)
+            continue
+        remove_task_upload_dir(task.id)
+        archived += 1
+        logger.info("Task %s archived to %s", task.id, path)
+    if archived:
+        removed = repo.delete_orphan_response_blobs(db)
+        db.commit()
+        logger.info("Retention sweep archived %s tasks, removed %s orphan response blobs", archived, removed)
+    return archived
+
+
+@celery_app.task(name="app.services.retention.archive_expired_tasks_job")
+def archive_expired_tasks_job() -> int:
+    db = SessionLocal()
+    try:
+        return archive_expired_tasks(db)
+    finally:
+        db.close()
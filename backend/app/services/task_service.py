@@ -3,20 +3,22 @@ from __future__ import annotations
 import json
 import logging
 from typing import Optional
-from urllib.parse import urlparse
-
 from pathlib import Path
+from urllib.parse import urlparse
 
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from starlette import status
 
 from app.core.config import settings
+from app.db.models.evaluation_task import EvaluationTask, TaskStatus
 from app.db.repositories import evaluation_tasks as repo
 from app.schemas.evaluation_task import TaskCreateRequest, TaskCreateResponse
-from app.services.evaluation_runner import run_evaluation_task
-from app.utils.dataset_loader import load_dataset
-from app.utils.storage import save_dataset_file
+from app.services.dataset_service import get_dataset_for_task
+from app.services.ingestion import enqueue_evaluation, ingest_task_dataset, populate_task_from_dataset
+from app.utils.dataset_loader import read_dataset_upload
+from app.utils.storage import spool_dataset_upload
 
 logger = logging.getLogger(__name__)
 
@@ -66,60 +68,95 @@ def parse_headers(raw_headers: Optional[str]) -> Optional[dict]:
     return parsed
 
 
+def _new_task(db: Session, *, payload: TaskCreateRequest, status_value: str) -> EvaluationTask:
+    headers = dict(payload.agent_api_headers) if payload.agent_api_headers else {}
+    if not headers and settings.default_agent_headers:
+        headers = dict(settings.default_agent_headers)
+
+    return repo.create_task(
+        db,
+        task_name=payload.task_name.strip(),
+        agent_api_url=str(payload.agent_api_url).strip(),
+        agent_api_headers=headers,
+        agent_model=payload.agent_model.strip() if payload.agent_model else None,
+        enable_correction=payload.enable_correction,
+        runs_per_item=settings.runs_per_item,
+        timeout_seconds=settings.timeout_seconds,
+        use_stream=settings.use_stream,
+        total_items=0,
+        status=status_value,
+        token_budget=payload.token_budget or settings.task_token_budget or None,
+        hedge_requests=payload.hedge_requests,
+    )
+
+
+def _accept_upload(
+    db: Session,
+    *,
+    payload: TaskCreateRequest,
+    filename: str,
+    raw: bytes,
+) -> TaskCreateResponse:
+    spool_path = None
+    try:
+        task = _new_task(db, payload=payload, status_value=TaskStatus.INGESTING)
+        spool_path = spool_dataset_upload(task.id, filename, raw)
+        db.commit()
+    except Exception:
+        db.rollback()
+        if spool_path is not None:
+            spool_path.unlink(missing_ok=True)
+        raise
+
+    try:
+        ingest_task_dataset.delay(task.id, str(spool_path))
+    except Exception as exc:  # pragma: no cover - Celery backend might be unavailable
+        logger.exception("failed to enqueue dataset ingestion for task %s: %s", task.id, exc)
+
+    return TaskCreateResponse(
+        task_id=task.id,
+        status="INGESTING",
+        enable_correction=payload.enable_correction,
+    )
+
+
 async def create_evaluation_task(
     db: Session,
     *,
     payload: TaskCreateRequest,
     dataset_file: UploadFile,
 ) -> TaskCreateResponse:
-    agent_api_url = str(payload.agent_api_url)
-    _validate_agent_url(agent_api_url)
+    """Accept an upload and return immediately; parsing and inserts run in a background job."""
+    _validate_agent_url(str(payload.agent_api_url))
 
-    dataset_records, raw_file = await load_dataset(dataset_file)
-    total_items = len(dataset_records)
-    if total_items == 0:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail={"code": "DATASET_EMPTY", "message": "文件没有有效的问题数据"},
-        )
-
-    headers = dict(payload.agent_api_headers) if payload.agent_api_headers else {}
-    if not headers and settings.default_agent_headers:
-        headers = dict(settings.default_agent_headers)
+    extension, raw = await read_dataset_upload(dataset_file)
+    filename = Path(dataset_file.filename or f"dataset{extension}").name
+    # 数据库写入是同步调用，放到线程池中执行，避免阻塞事件循环
+    return await run_in_threadpool(_accept_upload, db, payload=payload, filename=filename, raw=raw)
 
-    try:
-        task = repo.create_task(
-            db,
-            task_name=payload.task_name.strip(),
-            agent_api_url=agent_api_url.strip(),
-            agent_api_headers=headers,
-            agent_model=payload.agent_model.strip() if payload.agent_model else None,
-            enable_correction=payload.enable_correction,
-            runs_per_item=settings.runs_per_item,
-            timeout_seconds=settings.timeout_seconds,
-            use_stream=settings.use_stream,
-            total_items=total_items,
-        )
 
-        items = repo.bulk_insert_items(db, task_id=task.id, items=dataset_records)
-        for item in items:
-            repo.create_initial_runs(db, item=item, runs_per_item=settings.runs_per_item)
+def create_task_from_dataset(
+    db: Session,
+    *,
+    payload: TaskCreateRequest,
+    dataset_id: str,
+) -> TaskCreateResponse:
+    """Start a task on an already registered dataset without re-uploading it."""
+    _validate_agent_url(str(payload.agent_api_url))
 
+    try:
+        dataset = get_dataset_for_task(db, dataset_id)
+        task = _new_task(db, payload=payload, status_value=TaskStatus.PENDING)
+        populate_task_from_dataset(db, task, dataset)
         db.commit()
     except Exception:
         db.rollback()
         raise
 
-    original_name = Path(dataset_file.filename or "dataset.csv").name
-    save_dataset_file(task.id, original_name, raw_file)
-
-    try:
-        run_evaluation_task.delay(task.id)
-    except Exception as exc:  # pragma: no cover - Celery backend might be unavailable
-        logger.exception("failed to enqueue evaluation task %s: %s", task.id, exc)
-
+    enqueue_evaluation(task.id)
     return TaskCreateResponse(
         task_id=task.id,
         status="PENDING",
         enable_correction=payload.enable_correction,
+        dataset_id=task.dataset_id,
     )
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.core.config import settings
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """Raised when a task has consumed more tokens than its budget allows."""
+
+    def __init__(self, used: int, budget: int) -> None:
+        super().__init__(f"token 预算耗尽：已使用 {used}，预算 {budget}")
+        self.used = used
+        self.budget = budget
+
+
+@dataclass(frozen=True)
+class TokenUsage:
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    reasoning_tokens: Optional[int] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return (self.prompt_tokens or 0) + (self.completion_tokens or 0)
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        def _sum(left: Optional[int], right: Optional[int]) -> Optional[int]:
+            if left is None and right is None:
+                return None
+            return (left or 0) + (right or 0)
+
+        return TokenUsage(
+            _sum(self.prompt_tokens, other.prompt_tokens),
+            _sum(self.completion_tokens, other.completion_tokens),
+            _sum(self.reasoning_tokens, other.reasoning_tokens),
+        )
+
+
+def _field(raw: Any, name: str) -> Any:
+    if isinstance(raw, dict):
+        return raw.get(name)
+    return getattr(raw, name, None)
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_usage(raw: Any) -> Optional[TokenUsage]:
+    """Read an OpenAI-style ``usage`` block from an SDK object or a decoded JSON dict."""
+    if raw is None:
+        return None
+    details = _field(raw, "completion_tokens_details")
+    usage = TokenUsage(
+        prompt_tokens=_as_int(_field(raw, "prompt_tokens")),
+        completion_tokens=_as_int(_field(raw, "completion_tokens")),
+        reasoning_tokens=_as_int(_field(details, "reasoning_tokens")) if details is not None else None,
+    )
+    if usage.prompt_tokens is None and usage.completion_tokens is None:
+        return None
+    return usage
+
+
+def usage_cost(model_id: Optional[str], usage: Optional[TokenUsage]) -> Optional[float]:
+    """Cost from MODEL_PRICING (price per 1K tokens); None when the model has no price."""
+    if usage is None or not model_id:
+        return None
+    pricing = settings.token_pricing.get(model_id)
+    if not pricing:
+        return None
+    cost = (usage.prompt_tokens or 0) * pricing.get("prompt", 0.0)
+    cost += (usage.completion_tokens or 0) * pricing.get("completion", 0.0)
+    return round(cost / 1000, 6)
+
+
+class TokenBudget:
+    """Running token total of one task; ``limit`` of None or 0 means unlimited."""
+
+    def __init__(self, limit: Optional[int], used: int = 0) -> None:
+        self.limit = limit or None
+        self.used = used
+
+    def add(self, tokens: int) -> None:
+        self.used += tokens
+
+    def check(self) -> None:
+        if self.limit is not None and self.used > self.limit:
+            raise TokenBudgetExceeded(self.used, self.limit)
+
+
+__all__ = [
+    "TokenBudget",
+    "TokenBudgetExceeded",
+    "TokenUsage",
+    "normalize_usage",
+    "usage_cost",
+]
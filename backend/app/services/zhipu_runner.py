@@ -2,13 +2,21 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Sequence, Tuple
 
+import httpx
 from zai import ZhipuAiClient
 
 from app.core.config import settings
+from app.services.agent_response import AgentResponse
+from app.services.prompt_registry import prompt_registry
+from app.services.usage import TokenUsage, normalize_usage
+from app.utils.deadlines import Deadline
 
 logger = logging.getLogger(__name__)
 
@@ -22,22 +30,57 @@ class ZhipuConfigurationError(RuntimeError):
     """Raised when Zhipu runner cannot be configured properly."""
 
 
-def _read_text_file(path: Path) -> str:
-    try:
-        return path.read_text(encoding="utf-8").strip()
-    except FileNotFoundError:
-        logger.warning("Zhipu prompt file not found: %s", path)
-        return ""
-    except OSError as exc:
-        logger.warning("Failed to read prompt file %s: %s", path, exc)
-        return ""
+_client_lock = threading.Lock()
+_shared_clients: Dict[Tuple[int, str, int | None], ZhipuAiClient] = {}
+_model_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+
+def get_shared_client(*, max_retries: int | None = None) -> ZhipuAiClient:
+    """Return the process-wide Zhipu client so its HTTP connection pool is reused across tasks.
+
+    ``max_retries`` overrides the SDK's built-in retries; callers with their own retry policy pass 0.
+    """
+    if not settings.zhipu_api_key:
+        raise ZhipuConfigurationError("ZHIPU_API_KEY 未配置，无法调用智谱模型")
+    # fork 出的子进程不能复用父进程的连接，按进程号与密钥区分
+    key = (os.getpid(), settings.zhipu_api_key, max_retries)
+    with _client_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            options = {} if max_retries is None else {"max_retries": max_retries}
+            for stale in [k for k in _shared_clients if k[:2] != key[:2]]:
+                del _shared_clients[stale]
+            client = ZhipuAiClient(
+                api_key=settings.zhipu_api_key,
+                timeout=llm_timeout(settings.zhipu_timeout_seconds),
+                **options,
+            )
+            _shared_clients[key] = client
+        return client
+
+
+def llm_timeout(read_seconds: float, deadline: Deadline | None = None) -> httpx.Timeout:
+    """Connect/read timeouts for one LLM call, shrunk so the call cannot outlive ``deadline``."""
+    read = deadline.cap(read_seconds) if deadline is not None else read_seconds
+    return httpx.Timeout(read, connect=min(settings.llm_connect_timeout_seconds, read))
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    return isinstance(exc, (TimeoutError, httpx.TimeoutException)) or "Timeout" in type(exc).__name__
+
 
+def model_semaphore(model_id: str) -> threading.BoundedSemaphore:
+    """Process-wide cap on in-flight requests per model, shared by every task in the worker."""
+    with _client_lock:
+        semaphore = _model_semaphores.get(model_id)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(settings.zhipu_max_concurrency_per_model)
+            _model_semaphores[model_id] = semaphore
+        return semaphore
 
-def _resolve_prompt_text(task, item) -> str:
-    # Priority: per-item system prompt → task header prompt → prompt file → default.
-    if getattr(item, "system_prompt", None):
-        return item.system_prompt.strip()
 
+def _resolve_task_prompt(task) -> str:
+    # Priority: task header prompt → prompt file → default; per-item prompts are applied per run.
     headers: Dict[str, str] = getattr(task, "agent_api_headers", {}) or {}
     direct_prompt = headers.get("prompt_override") or headers.get("prompt")
     if isinstance(direct_prompt, str) and direct_prompt.strip():
@@ -48,12 +91,13 @@ def _resolve_prompt_text(task, item) -> str:
         prompt_path = Path(prompt_path_value.strip())
         if not prompt_path.is_absolute():
             prompt_path = PROJECT_ROOT / prompt_path
-        return _read_text_file(prompt_path)
+        return prompt_registry.get(prompt_path)
 
-    if DEFAULT_PROMPT_PATH.exists():
-        return _read_text_file(DEFAULT_PROMPT_PATH)
+    return prompt_registry.get(DEFAULT_PROMPT_PATH, warn_missing=False)
 
-    return ""
+
+def _system_messages(prompt_text: str) -> Tuple[Dict[str, str], ...]:
+    return ({"role": "system", "content": prompt_text},) if prompt_text else ()
 
 
 def _build_user_message(item) -> str:
@@ -68,10 +112,11 @@ def _build_user_message(item) -> str:
     return question
 
 
-def _extract_content(choice) -> Tuple[str, str | None]:
+def _extract_content(choice) -> Tuple[str, str | None, str | None]:
+    """Return (answer, reasoning, warning); reasoning is kept out of the answer text."""
     message = getattr(choice, "message", None)
     if message is None:
-        return "", "Response missing message field"
+        return "", None, "Response missing message field"
 
     collected: List[str] = []
     content = getattr(message, "content", None)
@@ -86,42 +131,78 @@ def _extract_content(choice) -> Tuple[str, str | None]:
                 collected.append(block)
 
     reasoning = getattr(message, "reasoning_content", None)
-    if isinstance(reasoning, str) and reasoning.strip():
-        collected.append(f"<think>\n{reasoning.strip()}\n</think>")
+    reasoning_text = reasoning.strip() if isinstance(reasoning, str) and reasoning.strip() else None
+
+    answer = "\n\n".join(part for part in collected if part.strip())
+    if answer or reasoning_text:
+        return answer, reasoning_text, None
+
+    return "", None, "Empty response content"
+
+
+def _usage_fields(raw) -> Dict[str, int | None]:
+    usage = normalize_usage(raw) or TokenUsage()
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "reasoning_tokens": usage.reasoning_tokens,
+    }
 
-    if collected:
-        return "\n\n".join(part for part in collected if part.strip()), None
 
-    return "", "Empty response content"
+def _log_metrics(context: str, result: AgentResponse) -> None:
+    logger.info(
+        "Zhipu response [%s]: latency=%sms first_token=%sms tokens=%s/%s tokens_per_s=%s",
+        context,
+        result.latency_ms,
+        result.first_token_ms,
+        result.prompt_tokens,
+        result.completion_tokens,
+        result.tokens_per_second,
+    )
 
 
 class ZhipuRunner:
     def __init__(self) -> None:
-        if not settings.zhipu_api_key:
-            raise ZhipuConfigurationError("ZHIPU_API_KEY 未配置，无法调用智谱模型")
-        self.client = ZhipuAiClient(api_key=settings.zhipu_api_key)
+        # SDK 自带重试会让每次重试重新获得完整读超时，绕过单次调用与单题时限，这里关闭
+        self.client = get_shared_client(max_retries=0)
         self.model_id = settings.zhipu_model_id
         self.max_tokens = settings.zhipu_max_tokens
         self.temperature = settings.zhipu_temperature
         self.dialog_mode = settings.zhipu_dialog_mode
         self.thinking_type = settings.zhipu_thinking_type
-
-    def execute(self, task, item, run) -> Tuple[str, str | None, str | None, int]:
+        self._prefixes: Dict[str, Tuple[Dict[str, str], ...]] = {}
+        self._prefix_lock = threading.Lock()
+
+    def message_prefix(self, task) -> Tuple[Dict[str, str], ...]:
+        """System messages shared by every run of a task, resolved once per task."""
+        prefix = self._prefixes.get(task.id)
+        if prefix is None:
+            with self._prefix_lock:
+                prefix = self._prefixes.get(task.id)
+                if prefix is None:
+                    prefix = _system_messages(_resolve_task_prompt(task))
+                    self._prefixes[task.id] = prefix
+        return prefix
+
+    def execute(self, task, item, run, *, deadline: Deadline | None = None) -> AgentResponse:
         started = time.perf_counter()
         context = f"task={task.id} item={item.question_id} run={run.run_index}"
-        prompt_text = _resolve_prompt_text(task, item)
+        if deadline is not None and deadline.expired:
+            return AgentResponse("", "ITEM_DEADLINE", f"超过{deadline.label}，未发起调用", 0)
+        # 单次调用的总时限：读超时只限制两次读之间的间隔，流式输出需要额外的总时限
+        call_deadline = Deadline.earliest(deadline, Deadline(settings.llm_total_timeout_seconds, "单次调用时限"))
         user_message = _build_user_message(item)
 
         if not user_message:
             logger.warning("Zhipu request [%s] user message为空，跳过调用", context)
             latency_ms = int((time.perf_counter() - started) * 1000)
-            return "", "INVALID_INPUT", "Question content is empty", latency_ms
+            return AgentResponse("", "INVALID_INPUT", "Question content is empty", latency_ms)
 
-        messages: List[Dict[str, str]] = []
-        if prompt_text:
-            messages.append({"role": "system", "content": prompt_text})
-        messages.append({"role": "user", "content": user_message})
+        item_prompt = (getattr(item, "system_prompt", None) or "").strip()
+        prefix = _system_messages(item_prompt) if item_prompt else self.message_prefix(task)
+        messages: List[Dict[str, str]] = [*prefix, {"role": "user", "content": user_message}]
 
+        stream = bool(getattr(task, "use_stream", False)) or self.thinking_type == "sse"
         request_payload: Dict[str, object] = {
             "model": self.model_id,
             "messages": messages,
@@ -129,31 +210,125 @@ class ZhipuRunner:
             "temperature": self.temperature,
         }
         if self.thinking_type not in {"", "disabled", "off"}:
-            request_payload["thinking"] = {"type": self.thinking_type}
+            # sse 表示开启深度思考并以流式返回
+            request_payload["thinking"] = {"type": "enabled" if self.thinking_type == "sse" else self.thinking_type}
+        if stream:
+            request_payload["stream"] = True
 
-        logger.info("Zhipu request [%s]: %s", context, json.dumps(request_payload, ensure_ascii=False))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Zhipu request [%s]: %s", context, json.dumps(request_payload, ensure_ascii=False))
 
         try:
-            response = self.client.chat.completions.create(**request_payload)
+            queued = time.perf_counter()
+            with model_semaphore(self.model_id):
+                # 耗时从拿到并发槽开始计，排队时间单独记日志，保证与 HTTP 智能体的指标可比
+                started = time.perf_counter()
+                wait_ms = int((started - queued) * 1000)
+                if wait_ms:
+                    logger.debug("Zhipu request [%s] 等待模型并发槽 %dms", context, wait_ms)
+                response = self.client.chat.completions.create(
+                    **request_payload, timeout=llm_timeout(settings.zhipu_timeout_seconds, call_deadline)
+                )
+                if stream:
+                    return self._collect_stream(response, started=started, context=context, deadline=call_deadline)
         except Exception as exc:  # noqa: BLE001
             latency_ms = int((time.perf_counter() - started) * 1000)
+            if is_timeout_error(exc):
+                logger.warning("Zhipu request超时 [%s]: %s", context, exc)
+                return AgentResponse("", "TIMEOUT", f"Zhipu request timed out: {exc}", latency_ms)
             logger.exception("Zhipu request失败 [%s]: %s", context, exc)
-            return "", "ZHIPU_ERROR", str(exc), latency_ms
+            return AgentResponse("", "ZHIPU_ERROR", str(exc), latency_ms)
 
         latency_ms = int((time.perf_counter() - started) * 1000)
-        response_dump = json.dumps(response.model_dump(), ensure_ascii=False)
-        logger.info("Zhipu response [%s]: %s", context, response_dump)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Zhipu response [%s]: %s", context, json.dumps(response.model_dump(), ensure_ascii=False))
 
         choice = response.choices[0] if getattr(response, "choices", None) else None
         if not choice:
-            return "", "ZHIPU_ERROR", "Response missing choices", latency_ms
+            return AgentResponse("", "ZHIPU_ERROR", "Response missing choices", latency_ms)
 
-        content, warning = _extract_content(choice)
+        content, reasoning, warning = _extract_content(choice)
         if warning:
             logger.warning("Zhipu response内容异常 [%s]: %s", context, warning)
-            return "", "ZHIPU_EMPTY", warning, latency_ms
-
-        return content, None, None, latency_ms
+            return AgentResponse("", "ZHIPU_EMPTY", warning, latency_ms)
+
+        result = AgentResponse(
+            content,
+            None,
+            None,
+            latency_ms,
+            reasoning=reasoning,
+            **_usage_fields(getattr(response, "usage", None)),
+        )
+        _log_metrics(context, result)
+        return result
+
+    def _collect_stream(
+        self, chunks: Iterable, *, started: float, context: str, deadline: Deadline | None = None
+    ) -> AgentResponse:
+        """Assemble a streamed completion incrementally, timing the first token."""
+        content_parts: List[str] = []
+        reasoning_parts: List[str] = []
+        first_token_ms: int | None = None
+        usage = None
+        for chunk in chunks:
+            if deadline is not None and deadline.expired:
+                close = getattr(chunks, "close", None)
+                if callable(close):
+                    close()
+                latency_ms = int((time.perf_counter() - started) * 1000)
+                logger.warning("Zhipu stream超过%s [%s]", deadline.label, context)
+                return AgentResponse(
+                    "", "TIMEOUT", f"Zhipu stream exceeded {deadline.label}", latency_ms, first_token_ms=first_token_ms
+                )
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            choices = getattr(chunk, "choices", None) or []
+            delta = getattr(choices[0], "delta", None) if choices else None
+            if delta is None:
+                continue
+            reasoning_delta = getattr(delta, "reasoning_content", None)
+            content_delta = getattr(delta, "content", None)
+            if (reasoning_delta or content_delta) and first_token_ms is None:
+                first_token_ms = int((time.perf_counter() - started) * 1000)
+            if reasoning_delta:
+                reasoning_parts.append(reasoning_delta)
+            if content_delta:
+                content_parts.append(content_delta)
 
-
-__all__ = ["ZhipuRunner", "ZhipuConfigurationError"]
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        content = "".join(content_parts).strip()
+        reasoning = "".join(reasoning_parts).strip() or None
+        if not content and not reasoning:
+            logger.warning("Zhipu stream内容为空 [%s]", context)
+            return AgentResponse("", "ZHIPU_EMPTY", "Empty response content", latency_ms, first_token_ms=first_token_ms)
+
+        result = AgentResponse(
+            content,
+            None,
+            None,
+            latency_ms,
+            reasoning=reasoning,
+            first_token_ms=first_token_ms,
+            **_usage_fields(usage),
+        )
+        _log_metrics(context, result)
+        return result
+
+    def execute_many(self, task, item, runs: Sequence, *, deadline: Deadline | None = None) -> List[AgentResponse]:
+        """Execute several runs of one item concurrently; results keep the order of ``runs``."""
+        workers = min(settings.zhipu_run_concurrency, len(runs))
+        if workers <= 1:
+            return [self.execute(task, item, run, deadline=deadline) for run in runs]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zhipu-run") as pool:
+            return list(pool.map(lambda run: self.execute(task, item, run, deadline=deadline), runs))
+
+
+__all__ = [
+    "ZhipuRunner",
+    "ZhipuConfigurationError",
+    "get_shared_client",
+    "is_timeout_error",
+    "llm_timeout",
+    "model_semaphore",
+]
@@ -0,0 +1,206 @@
+"""Columnar (Parquet / Arrow IPC) exports in long format: one row per run."""
+
+from __future__ import annotations
+
+from datetime import timezone
+from typing import Any, Dict, Iterable, Iterator, List
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+from app.db.models.evaluation_task import EvaluationItem, EvaluationTask
+
+# 每累计多少行运行记录写出一个 RecordBatch / Parquet row group
+ROWS_PER_BATCH = 5000
+
+BASE_FIELDS = [
+    ("task_id", "string"),
+    ("task_name", "string"),
+    ("question_id", "string"),
+    ("question", "string"),
+    ("standard_answer", "string"),
+    ("session_group", "string"),
+    ("is_passed", "bool_"),
+    ("run_index", "int32"),
+    ("output", "string"),
+]
+ERROR_FIELDS = [
+    ("status", "string"),
+    ("latency_ms", "int32"),
+    ("first_token_ms", "int32"),
+    ("tokens_per_second", "float64"),
+    ("prompt_tokens", "int32"),
+    ("completion_tokens", "int32"),
+    ("reasoning_tokens", "int32"),
+    ("cost", "float64"),
+    ("error_code", "string"),
+    ("error_message", "string"),
+    ("correction_status", "string"),
+    ("correction_result", "bool_"),
+    ("correction_reason", "string"),
+    ("correction_error", "string"),
+    ("correction_retries", "int32"),
+    ("correction_prompt_tokens", "int32"),
+    ("correction_completion_tokens", "int32"),
+    ("correction_cost", "float64"),
+    ("correction_stage", "string"),
+    ("correction_prompt_truncated", "bool_"),
+]
+
+
+def pyarrow_available() -> bool:
+    return pa is not None
+
+
+def _schema(include_errors: bool):
+    fields = BASE_FIELDS + (ERROR_FIELDS if include_errors else [])
+    arrow_fields = [pa.field(name, getattr(pa, type_name)()) for name, type_name in fields]
+    arrow_fields.append(pa.field("run_created_at", pa.timestamp("ms", tz="UTC")))
+    return pa.schema(arrow_fields)
+
+
+def _run_rows(task: EvaluationTask, item: EvaluationItem, include_errors: bool) -> Iterator[Dict[str, Any]]:
+    for run in sorted(item.runs, key=lambda r: r.run_index):
+        created_at = getattr(run, "created_at", None)
+        if created_at is not None and created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        row: Dict[str, Any] = {
+            "task_id": task.id,
+            "task_name": task.task_name,
+            "question_id": item.question_id,
+            "question": item.question,
+            "standard_answer": item.standard_answer,
+            "session_group": getattr(item, "session_group", None),
+            "is_passed": item.is_passed,
+            "run_index": run.run_index,
+            "output": run.response_body,
+            "run_created_at": created_at,
+        }
+        if include_errors:
+            row.update(
+                {
+                    "status": run.status,
+                    "latency_ms": run.latency_ms,
+                    "first_token_ms": getattr(run, "first_token_ms", None),
+                    "tokens_per_second": getattr(run, "tokens_per_second", None),
+                    "prompt_tokens": getattr(run, "prompt_tokens", None),
+                    "completion_tokens": getattr(run, "completion_tokens", None),
+                    "reasoning_tokens": getattr(run, "reasoning_tokens", None),
+                    "cost": getattr(run, "cost", None),
+                    "error_code": run.error_code,
+                    "error_message": getattr(run, "error_message", None),
+                    "correction_status": getattr(run, "correction_status", None),
+                    "correction_result": getattr(run, "correction_result", None),
+                    "correction_reason": getattr(run, "correction_reason", None),
+                    "correction_error": getattr(run, "correction_error_message", None),
+                    "correction_retries": getattr(run, "correction_retries", None),
+                    "correction_prompt_tokens": getattr(run, "correction_prompt_tokens", None),
+                    "correction_completion_tokens": getattr(run, "correction_completion_tokens", None),
+                    "correction_cost": getattr(run, "correction_cost", None),
+                    "correction_stage": getattr(run, "correction_stage", None),
+                    "correction_prompt_truncated": getattr(run, "correction_prompt_truncated", None),
+                }
+            )
+        yield row
+
+
+def _record_batches(task: EvaluationTask, items: Iterable[EvaluationItem], schema, include_errors: bool):
+    columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+    size = 0
+    for item in items:
+        for row in _run_rows(task, item, include_errors):
+            for name in schema.names:
+                columns[name].append(row.get(name))
+            size += 1
+            if size >= ROWS_PER_BATCH:
+                yield pa.RecordBatch.from_pydict(columns, schema=schema)
+                columns = {name: [] for name in schema.names}
+                size = 0
+    if size:
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+class _ChunkSink:
+    """File-like object pyarrow writes into; the generator drains it after each batch."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for parquet/arrow exports")
+
+
+def iter_parquet_bytes(
+    task: EvaluationTask,
+    items: Iterable[EvaluationItem],
+    *,
+    include_errors: bool = True,
+) -> Iterator[bytes]:
+    _require_pyarrow()
+    schema = _schema(include_errors)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in _record_batches(task, items, schema, include_errors):
+            writer.write_batch(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def iter_arrow_bytes(
+    task: EvaluationTask,
+    items: Iterable[EvaluationItem],
+    *,
+    include_errors: bool = True,
+) -> Iterator[bytes]:
+    """Arrow IPC streaming format, readable incrementally with ``pyarrow.ipc.open_stream``."""
+    _require_pyarrow()
+    schema = _schema(include_errors)
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in _record_batches(task, items, schema, include_errors):
+            writer.write_batch(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
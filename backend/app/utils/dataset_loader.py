@@ -13,7 +13,14 @@ from app.core.config import settings
 
 
 REQUIRED_COLUMNS = {"question", "standard_answer"}
-OPTIONAL_COLUMNS = {"question_id", "system_prompt", "user_context", "session_group"}
+OPTIONAL_COLUMNS = {
+    "question_id",
+    "system_prompt",
+    "user_context",
+    "session_group",
+    "answer_pattern",
+    "answer_keywords",
+}
 SUPPORTED_EXTENSIONS = {".csv", ".xls", ".xlsx"}
 
 
@@ -138,6 +145,8 @@ def dataset_to_records(df: pd.DataFrame) -> List[dict]:
     for record in records:
         record.setdefault("system_prompt", None)
         record.setdefault("user_context", None)
+        for rule_column in ("answer_pattern", "answer_keywords"):
+            record[rule_column] = str(record.get(rule_column) or "").strip() or None
         raw_group = record.get("session_group")
         if raw_group is None:
             record["session_group"] = None
@@ -147,15 +156,18 @@ def dataset_to_records(df: pd.DataFrame) -> List[dict]:
     return records
 
 
-async def load_dataset(upload: UploadFile) -> Tuple[List[dict], bytes]:
+async def read_dataset_upload(upload: UploadFile) -> Tuple[str, bytes]:
+    """Validate the upload's extension and size and return (extension, raw bytes)."""
     extension = _guess_extension(upload.filename)
     _validate_extension(extension)
 
     raw = await upload.read()
     _validate_filesize(raw)
+    return extension, raw
 
+
+def parse_dataset(extension: str, raw: bytes) -> List[dict]:
     df = _load_dataframe(extension, raw)
     df = _normalize_columns(df)
     _ensure_required_columns(df)
-    records = dataset_to_records(df)
-    return records, raw
+    return dataset_to_records(df)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when a task runs past its wall-clock deadline."""
+
+
+class Deadline:
+    """Monotonic wall-clock deadline; ``seconds`` of 0 or None never expires."""
+
+    def __init__(self, seconds: Optional[float], label: str = "deadline") -> None:
+        self.seconds = seconds or None
+        self.label = label
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    @classmethod
+    def earliest(cls, *deadlines: Optional["Deadline"]) -> Optional["Deadline"]:
+        active = [deadline for deadline in deadlines if deadline is not None and deadline.expires_at is not None]
+        return min(active, key=lambda deadline: deadline.expires_at) if active else None
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def cap(self, timeout: float) -> float:
+        """Shrink a per-call timeout so the call cannot outlive this deadline."""
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def check(self) -> None:
+        if self.expired:
+            raise DeadlineExceeded(f"超过{self.label} {self.seconds:g} 秒，已停止")
+
+
+__all__ = ["Deadline", "DeadlineExceeded"]
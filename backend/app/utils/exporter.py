@@ -1,16 +1,21 @@
 import csv
 import io
+import json
 import re
 from urllib.parse import quote
 from datetime import datetime, timezone
-from typing import Iterable, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List
 from zoneinfo import ZoneInfo
 
 from fastapi.responses import StreamingResponse
 
 from app.db.models.evaluation_task import EvaluationItem, EvaluationRun, EvaluationTask
+from app.utils.columnar_export import iter_arrow_bytes, iter_parquet_bytes
+from app.utils.xlsx_stream import stream_xlsx
 
 BEIJING_TZ = ZoneInfo("Asia/Shanghai")
+# CSV 按缓冲区大小批量输出，避免每行一次 encode/yield
+CSV_FLUSH_THRESHOLD_CHARS = 64 * 1024
 
 
 def _to_beijing_iso(dt: datetime | None, *, basic: bool = False) -> str:
@@ -157,101 +162,195 @@ def _metadata_rows(task: EvaluationTask) -> List[List[str]]:
     return rows
 
 
-def build_csv_stream_response(
+def _content_disposition(filename: str, filename_star: str) -> str:
+    # RFC 5987 encoding to preserve non-ASCII filename for modern browsers
+    return f'attachment; filename="{filename}"; ' f"filename*=UTF-8''{quote(filename_star, safe='')}"
+
+
+def export_content_disposition(task: EvaluationTask, fmt: str) -> str:
+    ascii_name = _ascii_fallback(task.task_name)
+    if fmt == "csv":
+        return _content_disposition(f"{ascii_name}_report.csv", f"{task.task_name}_评测报告.csv")
+    return _content_disposition(f"{ascii_name}_report.{fmt}", f"{task.task_name}_report.{fmt}")
+
+
+def comparison_content_disposition(base: EvaluationTask, candidate: EvaluationTask) -> str:
+    ascii_name = f"{_ascii_fallback(base.task_name)}_vs_{_ascii_fallback(candidate.task_name)}"
+    return _content_disposition(
+        f"{ascii_name}_comparison.csv", f"{base.task_name}_vs_{candidate.task_name}_对比报告.csv"
+    )
+
+
+def iter_csv_bytes(
     task: EvaluationTask,
     items: Iterable[EvaluationItem],
     *,
     include_errors: bool = True,
-) -> StreamingResponse:
+) -> Iterator[bytes]:
     headers = _build_headers(task, include_errors)
+    metadata_rows = _metadata_rows(task)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
 
-    def row_generator() -> Iterable[bytes]:
-        yield "\ufeff".encode("utf-8")
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
 
-        buffer = io.StringIO()
-        writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerows(metadata_rows)
+    writer.writerow([])
+    writer.writerow(headers)
+    # 表头立即输出，让下载在首批数据查询完成前就开始
+    yield drain()
 
-        for row in _metadata_rows(task):
-            writer.writerow(row)
-            yield buffer.getvalue().encode("utf-8")
-            buffer.seek(0)
-            buffer.truncate(0)
+    for item in items:
+        writer.writerow(_build_row(task, item, include_errors))
+        if buffer.tell() >= CSV_FLUSH_THRESHOLD_CHARS:
+            yield drain()
 
-        writer.writerow([])
-        yield buffer.getvalue().encode("utf-8")
-        buffer.seek(0)
-        buffer.truncate(0)
+    tail = drain()
+    if tail:
+        yield tail
+
+
+def _info_rows(task: EvaluationTask) -> List[List[object]]:
+    return [
+        ["属性", "值"],
+        ["任务名称", task.task_name],
+        ["任务状态", task.status],
+        ["运行次数", task.runs_per_item],
+        ["调用超时(s)", task.timeout_seconds],
+        ["任务创建时间", _to_beijing_iso(task.created_at)],
+        ["任务完成时间", _to_beijing_iso(task.completed_at)],
+        ["Token 总量", getattr(task, "total_tokens", None)],
+        ["总费用", getattr(task, "total_cost", None)],
+    ]
 
-        writer.writerow(headers)
-        yield buffer.getvalue().encode("utf-8")
-        buffer.seek(0)
-        buffer.truncate(0)
 
+def iter_xlsx_bytes(
+    task: EvaluationTask,
+    items: Iterable[EvaluationItem],
+    *,
+    include_errors: bool = True,
+) -> Iterator[bytes]:
+    headers = _build_headers(task, include_errors)
+    info_rows = _info_rows(task)
+
+    def result_rows() -> Iterator[List[str]]:
+        yield headers
         for item in items:
-            writer.writerow(_build_row(task, item, include_errors))
+            yield _build_row(task, item, include_errors)
+
+    return stream_xlsx([("Evaluation Results", result_rows()), ("Info", info_rows)])
+
+
+def _jsonl_record(item: EvaluationItem, include_errors: bool) -> Dict[str, Any]:
+    runs = []
+    for run in sorted(item.runs, key=lambda r: r.run_index):
+        record: Dict[str, Any] = {"run_index": run.run_index, "output": run.response_body or ""}
+        if include_errors:
+            record.update(
+                {
+                    "status": run.status,
+                    "latency_ms": run.latency_ms,
+                    "first_token_ms": getattr(run, "first_token_ms", None),
+                    "tokens_per_second": getattr(run, "tokens_per_second", None),
+                    "prompt_tokens": getattr(run, "prompt_tokens", None),
+                    "completion_tokens": getattr(run, "completion_tokens", None),
+                    "reasoning_tokens": getattr(run, "reasoning_tokens", None),
+                    "cost": getattr(run, "cost", None),
+                    "correction_prompt_tokens": getattr(run, "correction_prompt_tokens", None),
+                    "correction_completion_tokens": getattr(run, "correction_completion_tokens", None),
+                    "correction_cost": getattr(run, "correction_cost", None),
+                    "error_code": run.error_code,
+                    "correction_status": getattr(run, "correction_status", None),
+                    "correction_result": getattr(run, "correction_result", None),
+                    "correction_reason": getattr(run, "correction_reason", None),
+                    "correction_error": getattr(run, "correction_error_message", None),
+                    "correction_retries": getattr(run, "correction_retries", None),
+                    "correction_stage": getattr(run, "correction_stage", None),
+                    "correction_prompt_truncated": getattr(run, "correction_prompt_truncated", None),
+                }
+            )
+        runs.append(record)
+    return {
+        "question_id": item.question_id,
+        "question": item.question,
+        "standard_answer": item.standard_answer,
+        "system_prompt": item.system_prompt,
+        "user_context": item.user_context,
+        "session_group": getattr(item, "session_group", None),
+        "is_passed": item.is_passed,
+        "runs": runs,
+    }
+
+
+def iter_jsonl_bytes(
+    task: EvaluationTask,
+    items: Iterable[EvaluationItem],
+    *,
+    include_errors: bool = True,
+) -> Iterator[bytes]:
+    """One JSON object per item with its runs nested, for programmatic consumers."""
+    buffer = io.StringIO()
+    for item in items:
+        buffer.write(json.dumps(_jsonl_record(item, include_errors), ensure_ascii=False))
+        buffer.write("\n")
+        if buffer.tell() >= CSV_FLUSH_THRESHOLD_CHARS:
             yield buffer.getvalue().encode("utf-8")
             buffer.seek(0)
             buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
 
-    ascii_name = _ascii_fallback(task.task_name)
-    filename = f"{ascii_name}_report.csv"
-    # RFC 5987 encoding to preserve non-ASCII filename for modern browsers
-    filename_star = quote(f"{task.task_name}_评测报告.csv", safe="")
+
+EXPORT_WRITERS: Dict[str, Callable[..., Iterator[bytes]]] = {
+    "csv": iter_csv_bytes,
+    "xlsx": iter_xlsx_bytes,
+    "jsonl": iter_jsonl_bytes,
+    "parquet": iter_parquet_bytes,
+    "arrow": iter_arrow_bytes,
+}
+COLUMNAR_FORMATS = {"parquet", "arrow"}
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def build_export_stream_response(
+    task: EvaluationTask,
+    items: Iterable[EvaluationItem],
+    fmt: str,
+    *,
+    include_errors: bool = True,
+) -> StreamingResponse:
+    writer = EXPORT_WRITERS[fmt]
     return StreamingResponse(
-        row_generator(),
-        media_type="text/csv; charset=utf-8",
-        headers={
-            "Content-Disposition": (
-                f'attachment; filename="{filename}"; '
-                f"filename*=UTF-8''{filename_star}"
-            )
-        },
+        writer(task, items, include_errors=include_errors),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": export_content_disposition(task, fmt)},
     )
 
 
-def build_xlsx_response(
+def build_csv_stream_response(
     task: EvaluationTask,
     items: Iterable[EvaluationItem],
     *,
     include_errors: bool = True,
-):
-    try:
-        from openpyxl import Workbook
-    except ImportError as exc:  # pragma: no cover
-        raise RuntimeError("openpyxl is required for XLSX export") from exc
+) -> StreamingResponse:
+    return build_export_stream_response(task, items, "csv", include_errors=include_errors)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Evaluation Results"
 
-    headers = _build_headers(task, include_errors)
-    ws.append(headers)
-
-    for item in items:
-        ws.append(_build_row(task, item, include_errors))
-
-    info_sheet = wb.create_sheet("Info")
-    info_sheet.append(["属性", "值"])
-    info_sheet.append(["任务名称", task.task_name])
-    info_sheet.append(["任务状态", task.status])
-    info_sheet.append(["运行次数", task.runs_per_item])
-    info_sheet.append(["调用超时(s)", task.timeout_seconds])
-    info_sheet.append(["任务创建时间", _to_beijing_iso(task.created_at)])
-    info_sheet.append(["任务完成时间", _to_beijing_iso(task.completed_at)])
-
-    stream = io.BytesIO()
-    wb.save(stream)
-    data = stream.getvalue()
-    ascii_name = _ascii_fallback(task.task_name)
-    filename = f"{ascii_name}_report.xlsx"
-    filename_star = quote(f"{task.task_name}_report.xlsx", safe="")
-    return StreamingResponse(
-        iter([data]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": (
-                f'attachment; filename="{filename}"; '
-                f"filename*=UTF-8''{filename_star}"
-            )
-        },
-    )
+def build_xlsx_response(
+    task: EvaluationTask,
+    items: Iterable[EvaluationItem],
+    *,
+    include_errors: bool = True,
+) -> StreamingResponse:
+    return build_export_stream_response(task, items, "xlsx", include_errors=include_errors)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import time
+from typing import Dict, Iterable, Optional
+
+from app.core.config import settings
+from app.core.redis import get_available_redis_client, mark_redis_unavailable
+
+PROGRESS_KEY_PREFIX = "evaluation-task-progress"
+PROCESSED_FIELD = "processed"
+RUN_STATUS_FIELD_PREFIX = "runs:"
+
+
+def _progress_key(task_id: str) -> str:
+    return f"{PROGRESS_KEY_PREFIX}:{task_id}"
+
+
+def seed_progress(task_id: str, processed: int, run_status_counts: Dict[str, int]) -> bool:
+    """Reset the live counters of a task to authoritative values (called when a worker claims it)."""
+    client = get_available_redis_client()
+    if client is None:
+        return False
+    key = _progress_key(task_id)
+    mapping = {PROCESSED_FIELD: processed}
+    for run_status, count in run_status_counts.items():
+        mapping[f"{RUN_STATUS_FIELD_PREFIX}{run_status}"] = count
+    try:
+        pipe = client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, settings.task_events_ttl_seconds)
+        pipe.execute()
+    except Exception as exc:  # noqa: BLE001 - counters are an optimisation only
+        mark_redis_unavailable(exc)
+        return False
+    _last_checkpoint[task_id] = (processed, time.monotonic())
+    return True
+
+
+def incr_processed(task_id: str, increment: int = 1) -> Optional[int]:
+    """Atomically bump the processed-item counter; returns None when Redis is unavailable."""
+    client = get_available_redis_client()
+    if client is None:
+        return None
+    key = _progress_key(task_id)
+    try:
+        pipe = client.pipeline()
+        pipe.hincrby(key, PROCESSED_FIELD, increment)
+        pipe.expire(key, settings.task_events_ttl_seconds)
+        processed, _ = pipe.execute()
+    except Exception as exc:  # noqa: BLE001
+        mark_redis_unavailable(exc)
+        return None
+    return int(processed)
+
+
+def incr_run_status(task_id: str, run_status: str) -> Optional[Dict[str, int]]:
+    """Atomically bump the per-status run counter and return all run status counts."""
+    client = get_available_redis_client()
+    if client is None:
+        return None
+    key = _progress_key(task_id)
+    try:
+        pipe = client.pipeline()
+        pipe.hincrby(key, f"{RUN_STATUS_FIELD_PREFIX}{run_status}", 1)
+        pipe.expire(key, settings.task_events_ttl_seconds)
+        pipe.hgetall(key)
+        _, _, raw = pipe.execute()
+    except Exception as exc:  # noqa: BLE001
+        mark_redis_unavailable(exc)
+        return None
+    return _run_status_counts(raw)
+
+
+def _run_status_counts(raw: Dict[str, str]) -> Dict[str, int]:
+    return {
+        field[len(RUN_STATUS_FIELD_PREFIX):]: int(value)
+        for field, value in raw.items()
+        if field.startswith(RUN_STATUS_FIELD_PREFIX)
+    }
+
+
+def get_progress(task_id: str) -> Optional[Dict[str, object]]:
+    client = get_available_redis_client()
+    if client is None:
+        return None
+    try:
+        raw = client.hgetall(_progress_key(task_id))
+    except Exception as exc:  # noqa: BLE001
+        mark_redis_unavailable(exc)
+        return None
+    if not raw:
+        return None
+    return {
+        "processed": int(raw.get(PROCESSED_FIELD, 0)),
+        "run_status_counts": _run_status_counts(raw),
+    }
+
+
+def get_processed_many(task_ids: Iterable[str]) -> Dict[str, int]:
+    """Return live processed counters for the given tasks in one round trip (missing ones omitted)."""
+    ids = list(task_ids)
+    client = get_available_redis_client()
+    if client is None or not ids:
+        return {}
+    try:
+        pipe = client.pipeline()
+        for task_id in ids:
+            pipe.hget(_progress_key(task_id), PROCESSED_FIELD)
+        values = pipe.execute()
+    except Exception as exc:  # noqa: BLE001
+        mark_redis_unavailable(exc)
+        return {}
+    return {task_id: int(value) for task_id, value in zip(ids, values) if value is not None}
+
+
+_last_checkpoint: Dict[str, tuple[int, float]] = {}
+
+
+def should_checkpoint(task_id: str, processed: int, total: int) -> bool:
+    """Decide whether the live counter should be written back to the task row now."""
+    last_processed, last_at = _last_checkpoint.get(task_id, (0, 0.0))
+    now = time.monotonic()
+    due = (
+        processed >= total
+        or processed - last_processed >= settings.progress_checkpoint_interval
+        or now - last_at >= settings.progress_checkpoint_seconds
+    )
+    if due:
+        _last_checkpoint[task_id] = (processed, now)
+    return due
+
+
+def forget_checkpoint(task_id: str) -> None:
+    _last_checkpoint.pop(task_id, None)
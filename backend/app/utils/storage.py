@@ -1,3 +1,4 @@
+import shutil
 from pathlib import Path
 
 from app.core.config import settings
@@ -10,8 +11,38 @@ def get_task_upload_dir(task_id: str) -> Path:
     return task_dir
 
 
-def save_dataset_file(task_id: str, filename: str, content: bytes) -> Path:
-    task_dir = get_task_upload_dir(task_id)
-    path = task_dir / filename
+def save_dataset_blob(content_hash: str, extension: str, content: bytes) -> Path:
+    """Store a registered dataset file once, named by its content hash."""
+    root = Path(settings.datasets_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / f"{content_hash}{extension}"
+    if not path.exists():
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(content)
+        tmp_path.replace(path)
+    return path
+
+
+def remove_task_upload_dir(task_id: str) -> None:
+    task_dir = Path(settings.uploads_dir) / task_id
+    shutil.rmtree(task_dir, ignore_errors=True)
+
+
+def get_archive_path(task_id: str) -> Path:
+    root = Path(settings.archive_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    return root / f"{task_id}.jsonl.gz"
+
+
+def get_export_path(task_id: str, fmt: str, include_errors: bool) -> Path:
+    export_dir = get_task_upload_dir(task_id) / "exports"
+    export_dir.mkdir(parents=True, exist_ok=True)
+    variant = "full" if include_errors else "outputs"
+    return export_dir / f"report-{variant}.{fmt}"
+
+
+def spool_dataset_upload(task_id: str, filename: str, content: bytes) -> Path:
+    """Write an accepted upload next to the task so the ingestion job can pick it up."""
+    path = get_task_upload_dir(task_id) / Path(filename).name
     path.write_bytes(content)
     return path
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import (
+    create_async_redis_client,
+    get_available_redis_client,
+    mark_redis_unavailable,
+)
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "evaluation-task-events"
+LATENCY_KEY_PREFIX = "evaluation-task-latency"
+TERMINAL_STATUSES = {"SUCCEEDED", "FAILED"}
+
+
+def task_channel(task_id: str) -> str:
+    return f"{CHANNEL_PREFIX}:{task_id}"
+
+
+def _latency_key(task_id: str) -> str:
+    return f"{LATENCY_KEY_PREFIX}:{task_id}"
+
+
+def _get_client():
+    if not settings.task_events_enabled:
+        return None
+    return get_available_redis_client()
+
+
+def publish_task_event(task_id: str, event: str, payload: Dict[str, Any]) -> None:
+    """Publish a task event on the task's pub/sub channel (best effort)."""
+    client = _get_client()
+    if client is None:
+        return
+    message = json.dumps({"event": event, "task_id": task_id, **payload}, ensure_ascii=False, default=str)
+    try:
+        client.publish(task_channel(task_id), message)
+    except Exception as exc:  # noqa: BLE001 - events must never break evaluation
+        mark_redis_unavailable(exc)
+
+
+def _rank(count: int, percentile: float) -> int:
+    return max(0, min(count - 1, math.ceil(count * percentile) - 1))
+
+
+def record_run_latency(task_id: str, run_id: str, latency_ms: Optional[int]) -> Optional[Dict[str, int]]:
+    """Record a run latency and return running stats (count/p50/p95/max) for the task."""
+    if latency_ms is None:
+        return get_latency_stats(task_id)
+    client = _get_client()
+    if client is None:
+        return None
+    key = _latency_key(task_id)
+    try:
+        pipe = client.pipeline()
+        pipe.zadd(key, {run_id: latency_ms})
+        pipe.expire(key, settings.task_events_ttl_seconds)
+        pipe.execute()
+    except Exception as exc:  # noqa: BLE001
+        mark_redis_unavailable(exc)
+        return None
+    return get_latency_stats(task_id)
+
+
+def get_latency_percentile(task_id: str, percentile: float) -> Optional[Tuple[int, int]]:
+    """(sample count, latency in ms at ``percentile``) of the task's recorded runs."""
+    client = _get_client()
+    if client is None:
+        return None
+    key = _latency_key(task_id)
+    try:
+        count = client.zcard(key)
+        if not count:
+            return 0, 0
+        entry = client.zrange(key, _rank(count, percentile), _rank(count, percentile), withscores=True)
+    except Exception as exc:  # noqa: BLE001
+        mark_redis_unavailable(exc)
+        return None
+    return int(count), int(entry[0][1]) if entry else 0
+
+
+def get_latency_stats(task_id: str) -> Optional[Dict[str, int]]:
+    client = _get_client()
+    if client is None:
+        return None
+    key = _latency_key(task_id)
+    try:
+        count = client.zcard(key)
+        if not count:
+            return {"count": 0}
+        pipe = client.pipeline()
+        for rank in (_rank(count, 0.5), _rank(count, 0.95), count - 1):
+            pipe.zrange(key, rank, rank, withscores=True)
+        p50, p95, slowest = pipe.execute()
+    except Exception as exc:  # noqa: BLE001
+        mark_redis_unavailable(exc)
+        return None
+    return {
+        "count": int(count),
+        "p50_ms": int(p50[0][1]) if p50 else 0,
+        "p95_ms": int(p95[0][1]) if p95 else 0,
+        "max_ms": int(slowest[0][1]) if slowest else 0,
+    }
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    body = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {body}\n\n"
+
+
+async def stream_task_events(
+    task_id: str,
+    *,
+    snapshot: Dict[str, Any],
+    is_disconnected=None,
+) -> AsyncIterator[str]:
+    """Yield SSE frames for a task: an initial snapshot, then live pub/sub events.
+
+    The stream closes once the task reaches a terminal status or the client disconnects.
+    """
+    yield format_sse("snapshot", snapshot)
+    if snapshot.get("status") in TERMINAL_STATUSES:
+        return
+
+    client = create_async_redis_client()
+    if client is None:
+        yield format_sse("error", {"message": "Redis client unavailable"})
+        return
+
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(task_channel(task_id))
+        last_sent = time.monotonic()
+        while True:
+            if is_disconnected is not None and await is_disconnected():
+                return
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None:
+                if time.monotonic() - last_sent >= settings.task_events_heartbeat_seconds:
+                    last_sent = time.monotonic()
+                    yield ": keep-alive\n\n"
+                continue
+            try:
+                data = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+            last_sent = time.monotonic()
+            yield format_sse(data.get("event", "message"), data)
+            if data.get("event") == "status" and data.get("status") in TERMINAL_STATUSES:
+                return
+    finally:
+        try:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to close task event subscription for %s", task_id)
@@ -0,0 +1,168 @@
+"""Minimal streaming XLSX writer.
+
+Rows are serialised straight into a deflated zip stream and handed to the caller as
+bytes chunks, so memory stays constant regardless of how many rows are written.
+Only inline strings and numbers are supported, which is all the exporter needs.
+"""
+
+from __future__ import annotations
+
+import re
+import zipfile
+from typing import Iterable, Iterator, List, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# Excel 单元格最多容纳 32767 个字符
+MAX_CELL_CHARS = 32767
+FLUSH_THRESHOLD_BYTES = 256 * 1024
+ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+CONTENT_TYPES_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "{sheets}"
+    "</Types>"
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_FOOTER = "</sheetData></worksheet>"
+
+
+class _ChunkSink:
+    """Write-only file object collecting zip output until the generator drains it."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell_xml(ref: str, value: object) -> str:
+    if value is None or value == "":
+        return ""
+    if isinstance(value, bool):
+        value = "TRUE" if value else "FALSE"
+    elif isinstance(value, (int, float)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    text = ILLEGAL_XML_CHARS.sub("", str(value))[:MAX_CELL_CHARS]
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _row_xml(row_number: int, values: Sequence[object]) -> str:
+    cells = "".join(
+        _cell_xml(f"{_column_letter(col)}{row_number}", value)
+        for col, value in enumerate(values, start=1)
+    )
+    return f'<row r="{row_number}">{cells}</row>'
+
+
+def _workbook_parts(sheet_names: List[str]) -> List[Tuple[str, str]]:
+    sheets = "".join(
+        f'<sheet name="{escape(name)}" sheetId="{idx}" r:id="rId{idx}"/>'
+        for idx, name in enumerate(sheet_names, start=1)
+    )
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f"<sheets>{sheets}</sheets></workbook>"
+    )
+    rels = "".join(
+        f'<Relationship Id="rId{idx}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{idx}.xml"/>'
+        for idx in range(1, len(sheet_names) + 1)
+    )
+    styles_id = len(sheet_names) + 1
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f"{rels}"
+        f'<Relationship Id="rId{styles_id}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        "</Relationships>"
+    )
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{idx}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for idx in range(1, len(sheet_names) + 1)
+    )
+    return [
+        ("[Content_Types].xml", CONTENT_TYPES_TEMPLATE.format(sheets=overrides)),
+        ("_rels/.rels", ROOT_RELS),
+        ("xl/workbook.xml", workbook),
+        ("xl/_rels/workbook.xml.rels", workbook_rels),
+        ("xl/styles.xml", STYLES),
+    ]
+
+
+def stream_xlsx(sheets: Sequence[Tuple[str, Iterable[Sequence[object]]]]) -> Iterator[bytes]:
+    """Yield an XLSX file as byte chunks; ``sheets`` is a list of (name, rows) pairs."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _workbook_parts([name for name, _ in sheets]):
+            archive.writestr(name, content)
+        for idx, (_, rows) in enumerate(sheets, start=1):
+            with archive.open(f"xl/worksheets/sheet{idx}.xml", mode="w") as sheet:
+                sheet.write(SHEET_HEADER.encode("utf-8"))
+                for row_number, values in enumerate(rows, start=1):
+                    sheet.write(_row_xml(row_number, values).encode("utf-8"))
+                    if sink.size >= FLUSH_THRESHOLD_BYTES:
+                        yield sink.drain()
+                sheet.write(SHEET_FOOTER.encode("utf-8"))
+            if sink.size:
+                yield sink.drain()
+    tail = sink.drain()
+    if tail:
+        yield tail
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.models.evaluation_task import RunStatus, TaskStatus
+from app.services import evaluation_runner
+
+
+class _ProcessTaskDB:
+    def add(self, obj):
+        return None
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+
+@pytest.fixture
+def run_process_task(monkeypatch):
+    """Run ``_process_task`` against in-memory repo fakes; returns the task and written run results."""
+
+    def run(runner_cls, *, total_items=3, token_budget=0):
+        task = SimpleNamespace(
+            id="task-1",
+            agent_model="zhipu",
+            agent_api_url="zhipu://glm",
+            enable_correction=False,
+            token_budget=token_budget,
+            total_items=total_items,
+            failure_reason=None,
+            status=TaskStatus.RUNNING,
+        )
+        items = [
+            SimpleNamespace(
+                id=f"item-{index}",
+                question_id=f"q{index}",
+                session_group=None,
+                runs=[SimpleNamespace(run_index=1, status=RunStatus.RETRYING)],
+            )
+            for index in range(total_items)
+        ]
+        written = []
+        repo = evaluation_runner.repo
+        monkeypatch.setattr(repo, "try_claim_task", lambda db, task_id: task)
+        monkeypatch.setattr(repo, "seed_live_progress", lambda db, t: None)
+        monkeypatch.setattr(repo, "list_items_for_task", lambda db, task_id: items)
+        monkeypatch.setattr(repo, "summarize_task_usage", lambda db, task_id: {"total_tokens": 0})
+        monkeypatch.setattr(repo, "update_run_result", lambda db, run, **kwargs: written.append(kwargs))
+        monkeypatch.setattr(repo, "increment_task_progress", lambda db, t: len(written))
+        monkeypatch.setattr(repo, "finalize_task_progress", lambda db, t: None)
+        monkeypatch.setattr(repo, "store_task_usage", lambda db, t: None)
+        monkeypatch.setattr(repo, "mark_task_status", lambda db, t, status, **kwargs: setattr(t, "status", status))
+        monkeypatch.setattr(evaluation_runner, "ZhipuRunner", runner_cls)
+        monkeypatch.setattr(evaluation_runner, "warm_export_cache", lambda task_id: None)
+
+        evaluation_runner._process_task(_ProcessTaskDB(), task.id)
+        return task, written
+
+    return run
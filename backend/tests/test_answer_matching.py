@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import correction_service as correction_module
+from app.services.answer_matching import (
+    STAGE_DATE,
+    STAGE_EXACT,
+    STAGE_KEYWORDS,
+    STAGE_NUMERIC,
+    STAGE_PATTERN,
+    deterministic_verdict,
+    normalize_answer,
+)
+
+
+def test_normalize_answer_folds_width_case_and_punctuation():
+    assert normalize_answer("  Ｐａｒｉｓ。 ") == "paris"
+    assert normalize_answer("1.5") != normalize_answer("15")
+
+
+@pytest.mark.parametrize(
+    ("output", "expected", "stage", "is_correct"),
+    [
+        ("巴黎。", "巴黎", STAGE_EXACT, True),
+        ("1,000", "1000.0", STAGE_NUMERIC, True),
+        ("1.5", "15", STAGE_NUMERIC, False),
+        ("50%", "0.5", STAGE_NUMERIC, True),
+        ("50%", "50", STAGE_NUMERIC, False),
+        ("2024年3月5日", "2024-03-05", STAGE_DATE, True),
+        ("2024-03-06", "2024/3/5", STAGE_DATE, False),
+    ],
+)
+def test_deterministic_verdict_stages(output, expected, stage, is_correct):
+    verdict = deterministic_verdict(output, expected)
+    assert verdict is not None
+    assert (verdict.stage, verdict.is_correct) == (stage, is_correct)
+
+
+def test_rules_only_confirm_matches():
+    assert deterministic_verdict("答案是 B 选项", "B", answer_pattern=r"\bB\b").stage == STAGE_PATTERN
+    verdict = deterministic_verdict("首都是巴黎，位于法国北部", "巴黎", answer_keywords="巴黎|法国")
+    assert verdict.stage == STAGE_KEYWORDS
+    # 规则未命中时交给判定模型，而不是直接判错
+    assert deterministic_verdict("首都是里昂", "巴黎", answer_keywords="巴黎") is None
+    assert deterministic_verdict("价格是1.5元", "价格是15元") is None
+    assert deterministic_verdict("答案", "答案", answer_pattern="(") is not None
+    # 只含标点的关键词不能让任意回答通过
+    assert deterministic_verdict("不对", "巴黎", answer_keywords="?") is None
+    assert deterministic_verdict("不对", "巴黎", answer_keywords="? | ，") is None
+
+
+def test_correction_service_skips_llm_when_decided_locally(monkeypatch):
+    calls = []
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: calls.append(kwargs)))
+    )
+    monkeypatch.setattr(correction_module.settings, "zhipu_api_key", "key")
+    monkeypatch.setattr(correction_module, "get_shared_client", lambda **kwargs: client)
+    service = correction_module.CorrectionService()
+
+    outcome = service.evaluate(question="1+1?", standard_answer="2", agent_output="2")
+
+    assert outcome.status == "SUCCESS" and outcome.is_correct is True
+    assert outcome.stage == STAGE_NUMERIC
+    assert outcome.usage is None
+    assert calls == []
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.models.evaluation_task import RunStatus
+from app.services import answer_similarity
+from app.services.answer_matching import STAGE_SIMILARITY
+from app.services.correction_service import CorrectionOutcome
+from app.services.evaluation_runner import _run_corrections_for_item
+
+
+def test_ngram_similarity_ranks_paraphrase_above_unrelated():
+    scorer = answer_similarity.NgramSimilarity(["光合作用把光能转化为化学能", "巴黎"])
+
+    scores = scorer.score(
+        "光合作用把光能转化为化学能",
+        ["光合作用将光能转化成化学能", "巴黎是法国首都", ""],
+    )
+
+    assert scores.shape == (3,)
+    assert scores[0] > 0.6 > scores[1]
+    assert scores[2] == 0
+
+
+def test_similarity_verdict_bands(monkeypatch):
+    monkeypatch.setattr(answer_similarity.settings, "similarity_accept_threshold", 0.9)
+    monkeypatch.setattr(answer_similarity.settings, "similarity_reject_threshold", 0.2)
+
+    accepted = answer_similarity.similarity_verdict(0.95, answer="x", standard_answer="y")
+    rejected = answer_similarity.similarity_verdict(0.1, answer="里昂", standard_answer="巴黎")
+
+    assert (accepted.stage, accepted.is_correct) == (STAGE_SIMILARITY, True)
+    assert (rejected.stage, rejected.is_correct) == (STAGE_SIMILARITY, False)
+    assert answer_similarity.similarity_verdict(0.5, answer="x", standard_answer="y") is None
+    assert answer_similarity.similarity_verdict(None, answer="x", standard_answer="y") is None
+    # 回答包含标准答案原文时不自动判错
+    assert answer_similarity.similarity_verdict(0.1, answer="答案是巴黎，因为……", standard_answer="巴黎") is None
+
+
+@pytest.mark.parametrize(
+    ("answer", "standard_answer"),
+    [("七天内可以无条件退", "支持7天无理由退货"), ("可以", "没问题")],
+)
+def test_ngram_fallback_sends_short_paraphrases_to_the_judge(monkeypatch, answer, standard_answer):
+    monkeypatch.setattr(answer_similarity.settings, "similarity_reject_threshold", None)
+    scorer = answer_similarity.NgramSimilarity([standard_answer])
+    score = float(scorer.score(standard_answer, [answer])[0])
+
+    assert score < 0.1
+    assert answer_similarity.similarity_verdict(
+        score, answer=answer, standard_answer=standard_answer, scorer=scorer
+    ) is None
+    # 向量模型或显式标定的阈值仍可自动判错
+    embedding = answer_similarity.EmbeddingSimilarity(model=None)
+    assert answer_similarity.similarity_verdict(
+        0.05, answer=answer, standard_answer=standard_answer, scorer=embedding
+    ).is_correct is False
+    assert answer_similarity.similarity_verdict(
+        score, answer=answer, standard_answer=standard_answer, scorer=scorer, reject_threshold=0.1
+    ).is_correct is False
+
+
+def test_calibrate_thresholds_against_judge_verdicts():
+    scores = [0.99, 0.97, 0.95, 0.9, 0.6, 0.5, 0.2, 0.1, 0.05, 0.01]
+    verdicts = [True, True, True, True, False, True, False, False, False, False]
+
+    calibration = answer_similarity.calibrate_thresholds(scores, verdicts, target_precision=1.0, min_samples=2)
+
+    assert calibration.accept_threshold == 0.9
+    assert calibration.reject_threshold == 0.2
+    assert calibration.auto_accept_rate == 0.4
+    assert calibration.auto_reject_rate == 0.4
+    assert calibration.samples == 10
+
+
+def test_calibrate_thresholds_without_enough_history():
+    calibration = answer_similarity.calibrate_thresholds([0.9], [True])
+    assert calibration.accept_threshold is None and calibration.reject_threshold is None
+
+
+class ScoringCorrectionService:
+    def __init__(self):
+        self.calls = []
+        self.similarity = answer_similarity.NgramSimilarity()
+
+    def evaluate(self, **kwargs):
+        self.calls.append(kwargs)
+        return CorrectionOutcome(status="SUCCESS", is_correct=True, reason="ok", error_message=None, retries=0)
+
+
+def test_runner_scores_all_runs_of_an_item_in_one_batch(monkeypatch):
+    monkeypatch.setattr("app.services.evaluation_runner.repo.update_run_correction", lambda db, run, **kwargs: None)
+    monkeypatch.setattr("app.services.evaluation_runner.repo.update_item_pass_status", lambda db, item, passed: None)
+    service = ScoringCorrectionService()
+    batches = []
+    original = service.similarity.score
+    service.similarity.score = lambda reference, candidates: batches.append(candidates) or original(reference, candidates)
+    item = SimpleNamespace(
+        question="Q?",
+        standard_answer="巴黎",
+        question_id="Q1",
+        runs=[
+            SimpleNamespace(id="r1", run_index=1, status=RunStatus.SUCCEEDED, response_body="巴黎", error_message=None),
+            SimpleNamespace(id="r2", run_index=2, status=RunStatus.SUCCEEDED, response_body="<think>想想</think>里昂", error_message=None),
+            SimpleNamespace(id="r3", run_index=3, status=RunStatus.FAILED, response_body=None, error_message="boom"),
+        ],
+    )
+
+    _run_corrections_for_item(object(), task=SimpleNamespace(id="t"), item=item, correction_service=service)
+
+    assert batches == [["巴黎", "里昂"]]
+    assert [call["similarity"] for call in service.calls] == [pytest.approx(1.0), 0.0]
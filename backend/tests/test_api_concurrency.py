@@ -0,0 +1,131 @@
+import asyncio
+import io
+import time
+import types
+
+import httpx
+import pytest
+
+from app.api.dependencies import get_async_db_session, get_db_session
+from app.api.routes import evaluation_tasks as routes
+from app.db import session as session_module
+from app.db.session import ThreadedSession
+from app.main import create_app
+from app.schemas.evaluation_task import TaskCreateResponse
+from app.services import task_service
+
+CSV_BYTES = "question,standard_answer\n中国的首都是哪里？,北京\n".encode("utf-8")
+
+
+async def _no_tasks(db, **kwargs):
+    return [], 0
+
+
+class LoopBoundSession:
+    """Mimics AsyncSession.run_sync, which runs the callable on the event-loop thread."""
+
+    def __init__(self):
+        self.sync_session = types.SimpleNamespace()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        return None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    app = create_app()
+    app.dependency_overrides[get_db_session] = lambda: types.SimpleNamespace()
+    app.dependency_overrides[get_async_db_session] = lambda: ThreadedSession(types.SimpleNamespace())
+    monkeypatch.setattr(routes.repo, "list_tasks_paginated_async", _no_tasks)
+    monkeypatch.setattr(routes, "get_processed_many", lambda task_ids: {})
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+async def test_list_requests_are_not_stalled_by_slow_upload(client, monkeypatch):
+    upload_delay = 0.5
+
+    def slow_accept_upload(db, *, payload, filename, raw):
+        # 模拟慢速提交与消息投递：阻塞调用必须运行在线程池中
+        time.sleep(upload_delay)
+        return TaskCreateResponse(task_id="task-1", status="INGESTING", enable_correction=False)
+
+    monkeypatch.setattr(task_service, "_accept_upload", slow_accept_upload)
+
+    async with client:
+        started = time.monotonic()
+        upload = asyncio.create_task(
+            client.post(
+                "/api/v1/evaluation-tasks",
+                data={"task_name": "load", "agent_api_url": "http://agent.example.com/api"},
+                files={"dataset_file": ("suite.csv", io.BytesIO(CSV_BYTES), "text/csv")},
+            )
+        )
+        await asyncio.sleep(0.05)
+
+        list_latencies = []
+
+        async def timed_list():
+            begin = time.monotonic()
+            response = await client.get("/api/v1/evaluation-tasks")
+            list_latencies.append(time.monotonic() - begin)
+            return response
+
+        responses = await asyncio.gather(*(timed_list() for _ in range(20)))
+        lists_done = time.monotonic() - started
+        upload_response = await upload
+
+    assert upload_response.status_code == 201
+    assert upload_response.json()["status"] == "INGESTING"
+    assert all(response.status_code == 200 for response in responses)
+    assert lists_done < upload_delay
+    assert max(list_latencies) < upload_delay / 2
+
+
+async def test_heavy_results_do_not_stall_lists_on_async_session(monkeypatch):
+    build_delay = 0.5
+    app = create_app()
+    app.dependency_overrides[get_async_db_session] = LoopBoundSession
+    monkeypatch.setattr(routes.repo, "list_tasks_paginated_async", _no_tasks)
+    monkeypatch.setattr(routes, "get_processed_many", lambda task_ids: {})
+
+    def slow_build(db, **kwargs):
+        # 模拟归档恢复、统计与解压：若落在事件循环线程上会阻塞其他请求
+        time.sleep(build_delay)
+        raise routes.HTTPException(status_code=404, detail={"code": "TASK_NOT_FOUND", "message": "任务不存在"})
+
+    monkeypatch.setattr(routes, "_build_task_results", slow_build)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async with client:
+        results = asyncio.create_task(client.get("/api/v1/evaluation-tasks/task-1/results"))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        responses = await asyncio.gather(*(client.get("/api/v1/evaluation-tasks") for _ in range(20)))
+        lists_done = time.monotonic() - started
+        results_response = await results
+
+    assert results_response.status_code == 404
+    assert all(response.status_code == 200 for response in responses)
+    assert lists_done < build_delay / 2
+
+
+def test_async_database_url_switches_driver():
+    url = "postgresql+psycopg2://user:secret@db:5432/agent_eval"
+    assert session_module.async_database_url(url) == "postgresql+asyncpg://user:secret@db:5432/agent_eval"
+
+
+async def test_open_async_session_falls_back_to_threadpool(monkeypatch):
+    monkeypatch.setattr(session_module.settings, "api_async_db", False)
+    closed = []
+    fake = types.SimpleNamespace(close=lambda: closed.append(True))
+    monkeypatch.setattr(session_module, "new_session", lambda: fake)
+
+    db = session_module.open_async_session()
+    assert isinstance(db, ThreadedSession)
+    assert await db.run_sync(lambda session, value: (session, value), 3) == (fake, 3)
+    await db.close()
+    assert closed == [True]
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import comparison
+
+
+def test_wilson_interval_bounds():
+    low, high = comparison.wilson_interval(80, 100)
+
+    assert low < 80 < high
+    assert 70 < low and high < 88
+    assert comparison.wilson_interval(0, 0) is None
+
+
+def test_paired_delta_interval_uses_discordant_pairs_only():
+    low, high = comparison.paired_delta_interval(1000, regressions=10, improvements=60)
+
+    # 净提升 5 个百分点，区间不跨 0
+    assert low < 5.0 < high
+    assert low > 0
+    assert comparison.paired_delta_interval(100, 0, 0) == (0.0, 0.0)
+
+
+def test_build_comparison_summary_reports_flips_and_new_errors(monkeypatch):
+    repo = comparison.comparison_repo
+    monkeypatch.setattr(
+        repo,
+        "summarize_comparison",
+        lambda db, base_id, candidate_id: {
+            "matched": 100,
+            "evaluated": 100,
+            "base_passed": 70,
+            "candidate_passed": 75,
+            "regressions": 5,
+            "improvements": 10,
+            "mean_latency_delta_ms": -120.456,
+            "median_latency_delta_ms": -100,
+            "p95_latency_delta_ms": 250,
+        },
+    )
+    monkeypatch.setattr(repo, "count_items", lambda db, task_id: {"base": 102, "cand": 100}[task_id])
+    monkeypatch.setattr(
+        repo,
+        "error_code_counts",
+        lambda db, task_id: {"base": {"TIMEOUT": 3}, "cand": {"TIMEOUT": 1, "HTTP_500": 4}}[task_id],
+    )
+
+    summary = comparison.build_comparison_summary(
+        None, SimpleNamespace(id="base"), SimpleNamespace(id="cand")
+    )
+
+    assert summary["base_only_items"] == 2
+    assert summary["candidate_only_items"] == 0
+    assert summary["accuracy_delta"] == 5.0
+    assert summary["accuracy_delta_ci"][0] < 5.0 < summary["accuracy_delta_ci"][1]
+    assert summary["mean_latency_delta_ms"] == -120.5
+    assert summary["new_error_codes"] == {"HTTP_500": 4}
+
+
+def test_comparison_csv_streams_rows():
+    rows = [
+        {
+            "question_id": "Q1",
+            "change": "REGRESSION",
+            "base_passed": True,
+            "candidate_passed": False,
+            "base_latency_ms": 100,
+            "candidate_latency_ms": 160.25,
+            "latency_delta_ms": 60.25,
+            "base_failed_runs": 0,
+            "candidate_failed_runs": 1,
+            "base_error_codes": None,
+            "candidate_error_codes": ["TIMEOUT", "HTTP_500"],
+        }
+    ]
+
+    text = b"".join(comparison.iter_comparison_csv(rows)).decode("utf-8-sig")
+
+    lines = text.splitlines()
+    assert lines[0].startswith("question_id,change")
+    assert lines[1] == "Q1,REGRESSION,True,False,100.0,160.2,60.2,0,1,,HTTP_500|TIMEOUT"
+
+
+def test_ensure_distinct_tasks_rejects_self_comparison():
+    with pytest.raises(HTTPException) as exc:
+        comparison.ensure_distinct_tasks("t1", "t1")
+
+    assert exc.value.detail["code"] == "COMPARISON_SAME_TASK"
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services import correction_service as correction_module
+from app.services.correction_service import (
+    ERROR_FATAL,
+    ERROR_PARSE,
+    ERROR_RATE_LIMIT,
+    ERROR_TIMEOUT,
+    ERROR_TRANSIENT,
+    JudgeParseError,
+    backoff_delay,
+    classify_error,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def _reply(content):
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None, model_dump=lambda: {})
+
+
+@pytest.fixture
+def service_factory(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(correction_module.settings, "zhipu_api_key", "key")
+    monkeypatch.setattr(correction_module.settings, "correction_max_retries", 3)
+    monkeypatch.setattr(correction_module.time, "sleep", sleeps.append)
+
+    def build(replies):
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            reply = replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return _reply(reply)
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(correction_module, "get_shared_client", lambda **kwargs: client)
+        return correction_module.CorrectionService(), calls
+
+    build.sleeps = sleeps
+    return build
+
+
+def _evaluate(service):
+    return service.evaluate(question="首都?", standard_answer="巴黎", agent_output="应该是里昂吧")
+
+
+def test_classify_error():
+    assert classify_error(JudgeParseError("bad", "raw")) == ERROR_PARSE
+    assert classify_error(StatusError(429)) == ERROR_RATE_LIMIT
+    assert classify_error(httpx.ReadTimeout("slow")) == ERROR_TIMEOUT
+    assert classify_error(StatusError(401)) == ERROR_FATAL
+    assert classify_error(StatusError(502)) == ERROR_TRANSIENT
+
+
+def test_backoff_delay_is_jittered_and_respects_retry_after(monkeypatch):
+    monkeypatch.setattr(correction_module.settings, "correction_backoff_base_seconds", 1.0)
+    monkeypatch.setattr(correction_module.settings, "correction_backoff_max_seconds", 5.0)
+    assert all(0 <= backoff_delay(10) <= 5.0 for _ in range(50))
+    assert backoff_delay(0, retry_after=3) >= 3
+    assert backoff_delay(0, retry_after=60) == 5.0
+
+
+def test_rate_limit_backs_off_then_succeeds(service_factory):
+    service, calls = service_factory([StatusError(429, {"retry-after": "2"}), '{"is_correct": false, "reason": "不一致"}'])
+
+    outcome = _evaluate(service)
+
+    assert outcome.status == "SUCCESS" and outcome.retries == 1
+    assert len(service_factory.sleeps) == 1 and service_factory.sleeps[0] >= 2
+    assert all(call["timeout"].read == service.timeout for call in calls)
+
+
+def test_parse_failure_runs_repair_pass_at_zero_temperature(service_factory):
+    service, calls = service_factory(["我认为是错误的", '{"is_correct": false, "reason": "城市不同"}'])
+
+    outcome = _evaluate(service)
+
+    assert outcome.status == "SUCCESS" and outcome.is_correct is False
+    assert service_factory.sleeps == []
+    repair = calls[1]
+    assert repair["temperature"] == 0.0
+    assert repair["messages"][-2] == {"role": "assistant", "content": "我认为是错误的"}
+    assert len(repair["messages"]) == 4
+
+
+def test_fatal_error_is_not_retried(service_factory):
+    service, calls = service_factory([StatusError(401)])
+
+    outcome = _evaluate(service)
+
+    assert outcome.status == "FAILED" and outcome.error_message.startswith(ERROR_FATAL)
+    assert len(calls) == 1 and service_factory.sleeps == []
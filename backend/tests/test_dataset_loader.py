@@ -6,12 +6,18 @@ from starlette.datastructures import UploadFile
 from app.utils import dataset_loader
 
 
+async def _parse_upload(upload):
+    # 与线上一致：接口只读取并校验上传，解析在导入任务中进行
+    extension, raw = await dataset_loader.read_dataset_upload(upload)
+    return dataset_loader.parse_dataset(extension, raw), raw
+
+
 @pytest.mark.asyncio
-async def test_load_dataset_generates_question_ids():
+async def test_parse_dataset_generates_question_ids():
     csv_content = "question,standard_answer\n中国的首都是哪里？,北京\n上海的别称是什么？,申城\n"
     upload = UploadFile(filename="sample.csv", file=io.BytesIO(csv_content.encode("utf-8")))
 
-    records, raw = await dataset_loader.load_dataset(upload)
+    records, raw = await _parse_upload(upload)
 
     assert len(records) == 2
     assert len(raw) == len(csv_content.encode("utf-8"))
@@ -22,19 +28,19 @@ async def test_load_dataset_generates_question_ids():
 
 
 @pytest.mark.asyncio
-async def test_load_dataset_missing_required_column():
+async def test_parse_dataset_missing_required_column():
     csv_content = "question_id,standard_answer\n1,北京\n"
     upload = UploadFile(filename="invalid.csv", file=io.BytesIO(csv_content.encode("utf-8")))
 
     with pytest.raises(HTTPException) as exc:
-        await dataset_loader.load_dataset(upload)
+        await _parse_upload(upload)
 
     assert exc.value.status_code == 422
     assert exc.value.detail["code"] == "DATASET_SCHEMA_INVALID"
 
 
 @pytest.mark.asyncio
-async def test_load_dataset_with_session_group_column():
+async def test_parse_dataset_with_session_group_column():
     csv_content = (
         "question,standard_answer,session_group\n"
         "你好,hi, grpA \n"
@@ -42,7 +48,23 @@ async def test_load_dataset_with_session_group_column():
     )
     upload = UploadFile(filename="multi.csv", file=io.BytesIO(csv_content.encode("utf-8")))
 
-    records, _ = await dataset_loader.load_dataset(upload)
+    records, _ = await _parse_upload(upload)
 
     assert records[0]["session_group"] == "grpA"
     assert records[1]["session_group"] is None
+
+
+@pytest.mark.asyncio
+async def test_parse_dataset_with_answer_rule_columns():
+    csv_content = (
+        "question,standard_answer,answer_pattern,answer_keywords\n"
+        "首都?,巴黎,,巴黎|法国\n"
+        "选哪个?,B,^B$,\n"
+    )
+    upload = UploadFile(filename="rules.csv", file=io.BytesIO(csv_content.encode("utf-8")))
+
+    records, _ = await _parse_upload(upload)
+
+    assert records[0]["answer_keywords"] == "巴黎|法国"
+    assert records[0]["answer_pattern"] is None
+    assert records[1]["answer_pattern"] == "^B$"
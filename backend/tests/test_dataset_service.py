@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services import dataset_service
+
+CSV_BYTES = b"question,standard_answer\nwhat?,answer\n"
+
+
+def test_register_dataset_bytes_parses_new_files_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "datasets_dir", str(tmp_path))
+    created = {}
+
+    def fake_create_dataset(db, **kwargs):
+        created.update(kwargs)
+        return SimpleNamespace(id="dataset-1", **kwargs)
+
+    monkeypatch.setattr(dataset_service.dataset_repo, "get_dataset_by_hash", lambda db, digest: None)
+    monkeypatch.setattr(dataset_service.dataset_repo, "create_dataset", fake_create_dataset)
+
+    dataset = dataset_service.register_dataset_bytes(None, filename="suite.csv", raw=CSV_BYTES)
+
+    assert dataset.id == "dataset-1"
+    assert created["filename"] == "suite.csv"
+    assert created["records"][0]["question"] == "what?"
+    stored = tmp_path / f"{created['content_hash']}.csv"
+    assert stored.read_bytes() == CSV_BYTES
+
+
+def test_register_dataset_bytes_reuses_existing_hash(monkeypatch):
+    existing = SimpleNamespace(id="dataset-1", row_count=1)
+    touched = []
+
+    monkeypatch.setattr(dataset_service.dataset_repo, "get_dataset_by_hash", lambda db, digest: existing)
+    monkeypatch.setattr(dataset_service.dataset_repo, "touch_dataset", lambda db, ds: touched.append(ds.id))
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("registered datasets must not be parsed again")
+
+    monkeypatch.setattr(dataset_service, "parse_dataset", fail_parse)
+
+    dataset = dataset_service.register_dataset_bytes(None, filename="suite.csv", raw=CSV_BYTES)
+
+    assert dataset is existing
+    assert touched == ["dataset-1"]
+
+
+def test_get_dataset_for_task_rejects_missing_dataset(monkeypatch):
+    monkeypatch.setattr(dataset_service.dataset_repo, "get_dataset", lambda db, dataset_id: None)
+
+    with pytest.raises(HTTPException) as exc:
+        dataset_service.get_dataset_for_task(None, "missing")
+
+    assert exc.value.status_code == 404
+    assert exc.value.detail["code"] == "DATASET_NOT_FOUND"
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.db import session as session_module
+
+
+@pytest.fixture(autouse=True)
+def _restore_session_bind():
+    original = session_module.SessionLocal.session_factory.kw["bind"]
+    yield
+    session_module.SessionLocal.configure(bind=original)
+
+
+def _use_engine(monkeypatch):
+    monkeypatch.setattr(session_module, "engine", session_module.build_engine())
+
+
+def test_worker_engine_is_sized_per_prefork_child(monkeypatch):
+    _use_engine(monkeypatch)
+    monkeypatch.setattr(session_module.settings, "celery_worker_pool", "prefork")
+    monkeypatch.setattr(session_module.settings, "evaluation_concurrency", 8)
+    previous = session_module.engine
+
+    engine = session_module.configure_worker_engine(after_fork=True)
+
+    assert engine is not previous
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 1
+    assert engine.pool._max_overflow == 1
+    assert session_module.SessionLocal.session_factory.kw["bind"] is engine
+
+
+def test_threaded_worker_pool_scales_with_concurrency(monkeypatch):
+    _use_engine(monkeypatch)
+    monkeypatch.setattr(session_module.settings, "celery_worker_pool", "threads")
+    monkeypatch.setattr(session_module.settings, "evaluation_concurrency", 8)
+
+    engine = session_module.configure_worker_engine()
+
+    assert engine.pool.size() == 8
+    assert engine.pool._max_overflow == 4
+
+
+def test_pgbouncer_mode_disables_pooling(monkeypatch):
+    _use_engine(monkeypatch)
+    monkeypatch.setattr(session_module.settings, "db_pgbouncer", True)
+
+    engine = session_module.configure_worker_engine(after_fork=True)
+
+    assert isinstance(engine.pool, NullPool)
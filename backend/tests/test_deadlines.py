@@ -0,0 +1,174 @@
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.db.models.evaluation_task import RunStatus, TaskStatus
+from app.services import evaluation_runner, zhipu_runner
+from app.services.agent_response import AgentResponse
+from app.utils.deadlines import Deadline, DeadlineExceeded
+
+
+class DummyDB:
+    def add(self, obj):
+        return None
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+
+def test_deadline_basics():
+    assert Deadline(0).expired is False and Deadline(0).remaining() is None
+    short, long = Deadline(0.05, "短"), Deadline(10, "长")
+    assert Deadline.earliest(long, None, short) is short
+    assert short.cap(30) <= 0.05
+    time.sleep(0.06)
+    with pytest.raises(DeadlineExceeded, match="短"):
+        short.check()
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    calls = []
+
+    def create(**payload):
+        calls.append(payload)
+        if payload.get("stream"):
+            def chunks():
+                while True:
+                    time.sleep(0.02)
+                    delta = SimpleNamespace(content="片段", reasoning_content=None)
+                    yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+            return chunks()
+        raise httpx.ReadTimeout("read timed out")
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_api_key", "key")
+    monkeypatch.setattr(zhipu_runner, "get_shared_client", lambda **kwargs: client)
+    monkeypatch.setattr(zhipu_runner, "_model_semaphores", {})
+    instance = zhipu_runner.ZhipuRunner()
+    instance.calls = calls
+    return instance
+
+
+def _item():
+    return SimpleNamespace(question_id="q1", question="1+1?", user_context=None, system_prompt="be brief")
+
+
+def test_zhipu_timeouts_are_reported_as_timeout(runner, monkeypatch):
+    task = SimpleNamespace(id="t", agent_api_headers={}, use_stream=False)
+    result = runner.execute(task, _item(), SimpleNamespace(run_index=1))
+    assert result.error_code == "TIMEOUT"
+    assert isinstance(runner.calls[0]["timeout"], httpx.Timeout)
+    assert evaluation_runner._run_status_for(result) == RunStatus.TIMEOUT
+
+    # 持续输出的流在总时限处被截断
+    monkeypatch.setattr(zhipu_runner.settings, "llm_total_timeout_seconds", 0.1)
+    streamed = runner.execute(SimpleNamespace(id="t", agent_api_headers={}, use_stream=True), _item(), SimpleNamespace(run_index=2))
+    assert streamed.error_code == "TIMEOUT" and streamed.latency_ms < 1000
+
+
+@pytest.fixture
+def hanging_server():
+    """Accepts connections and never replies."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    accepted = []
+
+    def accept():
+        while True:
+            try:
+                accepted.append(server.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/api/", accepted
+    server.close()
+    for conn in accepted:
+        conn.close()
+
+
+def test_zhipu_call_on_hanging_socket_stops_at_item_deadline(monkeypatch, hanging_server):
+    base_url, accepted = hanging_server
+    monkeypatch.setenv("ZAI_BASE_URL", base_url)
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_api_key", "id.secret")
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_timeout_seconds", 5)
+    monkeypatch.setattr(zhipu_runner, "_shared_clients", {})
+    monkeypatch.setattr(zhipu_runner, "_model_semaphores", {})
+    task = SimpleNamespace(id="t", agent_api_headers={}, use_stream=False)
+
+    started = time.perf_counter()
+    result = zhipu_runner.ZhipuRunner().execute(
+        task, _item(), SimpleNamespace(run_index=1), deadline=Deadline(0.5, "单题时限")
+    )
+
+    # SDK 不再自动重试：只建立一次连接，且在单题时限附近返回
+    assert result.error_code == "TIMEOUT"
+    assert time.perf_counter() - started < 2
+    assert len(accepted) == 1
+
+
+def test_expired_item_deadline_skips_calls(runner):
+    deadline = Deadline(0.001, "单题时限")
+    time.sleep(0.01)
+    task = SimpleNamespace(id="t", agent_api_headers={}, use_stream=False)
+
+    results = runner.execute_many(task, _item(), [SimpleNamespace(run_index=1)], deadline=deadline)
+
+    assert results[0].error_code == "ITEM_DEADLINE" and runner.calls == []
+    assert evaluation_runner._run_status_for(results[0]) == RunStatus.TIMEOUT
+
+
+def test_agent_stream_is_cut_at_deadline():
+    deadline = Deadline(0.001, "单次调用时限")
+    time.sleep(0.01)
+    response = SimpleNamespace(iter_lines=lambda: iter(['data: {"event": "llm_chunk"}']))
+    with pytest.raises(httpx.ReadTimeout):
+        evaluation_runner._parse_stream_response(response, deadline=deadline)
+
+
+def test_corrections_after_deadline_fail_without_judge_call(monkeypatch):
+    written = []
+    monkeypatch.setattr(evaluation_runner.repo, "update_run_correction", lambda db, run, **kwargs: written.append(kwargs))
+    monkeypatch.setattr(evaluation_runner.repo, "update_item_pass_status", lambda db, item, passed: None)
+    service = SimpleNamespace(evaluate=lambda **kwargs: pytest.fail("judge must not be called"))
+    item = SimpleNamespace(
+        question="Q?",
+        standard_answer="A",
+        question_id="Q1",
+        runs=[SimpleNamespace(run_index=1, status=RunStatus.SUCCEEDED, response_body="A", error_message=None)],
+    )
+    deadline = Deadline(0.001, "单题时限")
+    time.sleep(0.01)
+
+    evaluation_runner._run_corrections_for_item(
+        DummyDB(), task=SimpleNamespace(id="t"), item=item, correction_service=service, deadline=deadline
+    )
+
+    assert written[0]["status"] == "FAILED"
+    assert written[0]["error_message"].startswith("DEADLINE")
+
+
+def test_process_task_stops_at_task_deadline(monkeypatch, run_process_task):
+    class SlowRunner:
+        model_id = "glm-4.6"
+
+        def execute_many(self, task, item, runs, deadline=None):
+            time.sleep(0.05)
+            return [AgentResponse("ok", None, None, 50) for _ in runs]
+
+    monkeypatch.setattr(evaluation_runner.settings, "task_deadline_seconds", 0.03)
+
+    task, written = run_process_task(SlowRunner, total_items=3)
+
+    assert len(written) == 1
+    assert task.status == TaskStatus.FAILED
+    assert "任务时限" in task.failure_reason
@@ -1,11 +1,14 @@
+import json
 from types import SimpleNamespace
 
 import pytest
 
 from app.db.models.evaluation_task import RunStatus
+from app.services.agent_response import AgentResponse
 from app.services.correction_service import CorrectionOutcome
 from app.services.evaluation_runner import (
     _build_group_session_id,
+    _parse_stream_response,
     _process_multi_turn_group,
     _run_corrections_for_item,
 )
@@ -85,6 +88,29 @@ def test_run_corrections_service_unavailable(patch_repo):
     assert patch_repo["runs"][0]["status"] == "SKIPPED"
 
 
+def test_run_corrections_send_final_answer_without_reasoning(patch_repo):
+    task = SimpleNamespace(id="task-3")
+    item = SimpleNamespace(
+        question="Q?",
+        standard_answer="A",
+        question_id="Q3",
+        runs=[
+            SimpleNamespace(
+                run_index=1,
+                status=RunStatus.SUCCEEDED,
+                response_body="<think>\nlong chain of thought\n</think>\nfinal answer",
+                error_message=None,
+            )
+        ],
+    )
+    service = DummyCorrectionService(
+        outcomes=[CorrectionOutcome(status="SUCCESS", is_correct=True, reason="ok", error_message=None, retries=0)]
+    )
+
+    _run_corrections_for_item(DummyDB(), task=task, item=item, correction_service=service)
+
+    assert service.calls[0]["agent_output"] == "final answer"
+
 class DummySession:
     def __init__(self):
         self.commits = 0
@@ -132,7 +158,7 @@ def test_process_multi_turn_group_executes_sessions(monkeypatch):
 
     executed_calls = []
 
-    def fake_execute(client, task_arg, item_arg, run_arg, *, session_id):
+    def fake_execute(client, task_arg, item_arg, run_arg, *, session_id, deadline=None):
         executed_calls.append(
             {
                 "item": item_arg.question_id,
@@ -140,7 +166,7 @@ def test_process_multi_turn_group_executes_sessions(monkeypatch):
                 "session_id": session_id,
             }
         )
-        return "resp", None, None, 42
+        return AgentResponse("resp", None, None, 42)
 
     updated_runs = []
 
@@ -208,7 +234,7 @@ def test_process_multi_turn_group_skips_when_no_pending(monkeypatch):
 
     def fake_execute(*args, **kwargs):
         execute_calls.append(1)
-        return "resp", None, None, 1
+        return AgentResponse("resp", None, None, 1)
 
     monkeypatch.setattr("app.services.evaluation_runner._execute_single_run", fake_execute)
     monkeypatch.setattr(
@@ -231,3 +257,40 @@ def test_process_multi_turn_group_skips_when_no_pending(monkeypatch):
     )
 
     assert execute_calls == []
+
+
+def test_parse_stream_response_separates_reasoning():
+    def chunk(event, text):
+        return json.dumps({"event": event, "data": {"choices": [{"delta": {"content": text}}]}})
+
+    response = SimpleNamespace(
+        iter_lines=lambda: [
+            "data: " + json.dumps({"event": "reasoning_start", "data": {}}),
+            "data: " + chunk("reasoning_chunk", "先想一想"),
+            "data: " + json.dumps({"event": "reasoning_end", "data": {}}),
+            "data: " + chunk("llm_chunk", "答案是"),
+            "data: " + chunk("llm_chunk", "北京"),
+        ]
+    )
+
+    content, reasoning, error, _ = _parse_stream_response(response)
+
+    assert content == "答案是北京"
+    assert reasoning == "先想一想"
+    assert error is None
+
+
+def test_parse_stream_response_reports_first_token_once():
+    response = SimpleNamespace(
+        iter_lines=lambda: [
+            "data: " + json.dumps({"event": "node_started", "data": {}}),
+            "data: " + json.dumps({"event": "llm_chunk", "data": {"choices": [{"delta": {"content": "北"}}]}}),
+            "data: " + json.dumps({"event": "llm_chunk", "data": {"choices": [{"delta": {"content": "京"}}]}}),
+        ]
+    )
+    calls = []
+
+    content, _, _, _ = _parse_stream_response(response, lambda: calls.append(True))
+
+    assert content == "北京"
+    assert calls == [True]
@@ -0,0 +1,100 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.services import export_cache
+from app.utils.cached_file import build_cached_file_response, file_etag, parse_range
+
+
+def _request(**headers):
+    raw = [(key.replace("_", "-").encode(), value.encode()) for key, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = tmp_path / "report.csv"
+    path.write_bytes(b"0123456789")
+    return path
+
+
+def test_parse_range_variants():
+    assert parse_range(None, 10) is None
+    assert parse_range("bytes=2-5", 10) == (2, 5)
+    assert parse_range("bytes=7-", 10) == (7, 9)
+    assert parse_range("bytes=-3", 10) == (7, 9)
+    assert parse_range("bytes=0-3,5-6", 10) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=10-12", 10)
+
+
+def test_cached_file_response_honours_etag(artifact):
+    etag = file_etag(artifact.stat())
+
+    response = build_cached_file_response(_request(if_none_match=etag), artifact, media_type="text/csv")
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_cached_file_response_serves_partial_content(artifact):
+    response = build_cached_file_response(_request(range="bytes=2-5"), artifact, media_type="text/csv")
+    body = b"".join([chunk async for chunk in response.body_iterator])
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 2-5/10"
+    assert body == b"2345"
+
+
+def test_cached_file_response_ignores_range_when_if_range_is_stale(artifact):
+    response = build_cached_file_response(
+        _request(range="bytes=2-5", if_range='"stale"'), artifact, media_type="text/csv"
+    )
+
+    assert response.status_code == 200
+
+
+def test_cached_file_response_rejects_unsatisfiable_range(artifact):
+    response = build_cached_file_response(_request(range="bytes=50-"), artifact, media_type="text/csv")
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */10"
+
+
+def test_write_export_artifact_caches_jsonl(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "uploads_dir", str(tmp_path))
+    run = SimpleNamespace(
+        run_index=1,
+        status="SUCCEEDED",
+        response_body="答案",
+        latency_ms=10,
+        error_code=None,
+    )
+    item = SimpleNamespace(
+        question_id="Q1",
+        question="问题",
+        standard_answer="A",
+        system_prompt=None,
+        user_context=None,
+        session_group=None,
+        is_passed=True,
+        runs=[run],
+    )
+    monkeypatch.setattr(
+        export_cache.repo, "iter_items_for_task", lambda db, task_id, batch_size: iter([item])
+    )
+    task = SimpleNamespace(id="task-1")
+
+    assert export_cache.get_cached_export("task-1", "jsonl", True) is None
+    path = export_cache.write_export_artifact(object(), task, "jsonl", True)
+
+    assert export_cache.get_cached_export("task-1", "jsonl", True) == path
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert record["question_id"] == "Q1"
+    assert record["runs"][0]["output"] == "答案"
+    assert record["runs"][0]["status"] == "SUCCEEDED"
+    assert list(path.parent.glob("*.tmp")) == []
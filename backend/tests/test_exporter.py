@@ -0,0 +1,116 @@
+import io
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import load_workbook
+
+from app.utils.exporter import build_csv_stream_response, build_xlsx_response
+from app.utils.xlsx_stream import stream_xlsx
+
+
+def _task():
+    return SimpleNamespace(
+        task_name="导出任务",
+        status="SUCCEEDED",
+        runs_per_item=1,
+        timeout_seconds=30.0,
+        enable_correction=False,
+        accuracy_rate=None,
+        passed_count=0,
+        total_items=1,
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        completed_at=datetime(2025, 1, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _item(question_id: str, answer: str):
+    run = SimpleNamespace(
+        run_index=1,
+        status="SUCCEEDED",
+        response_body=answer,
+        latency_ms=150,
+        error_code=None,
+        correction_status="PENDING",
+        correction_result=None,
+        correction_reason=None,
+        correction_error_message=None,
+        correction_retries=0,
+    )
+    return SimpleNamespace(
+        question_id=question_id,
+        question="问题 <1> & more",
+        standard_answer="标准答案",
+        system_prompt=None,
+        user_context=None,
+        session_group=None,
+        is_passed=None,
+        runs=[run],
+    )
+
+
+def test_stream_xlsx_yields_multiple_chunks_for_large_sheets():
+    rows = ([f"row-{idx}", "x" * 2000, idx] for idx in range(2000))
+
+    chunks = list(stream_xlsx([("Data", rows)]))
+
+    assert len(chunks) > 1
+    workbook = load_workbook(io.BytesIO(b"".join(chunks)), read_only=True)
+    sheet = workbook["Data"]
+    last = list(sheet.iter_rows(min_row=2000, max_row=2000, values_only=True))[0]
+    assert last[0] == "row-1999"
+    assert last[2] == 1999
+
+
+@pytest.mark.asyncio
+async def test_build_xlsx_response_streams_results_and_info_sheets():
+    items = iter([_item("Q1", "答案\x01一"), _item("Q2", "答案二")])
+
+    response = build_xlsx_response(_task(), items, include_errors=True)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+
+    workbook = load_workbook(io.BytesIO(body))
+    results = workbook["Evaluation Results"]
+    assert results["A1"].value == "question_id"
+    assert results["A2"].value == "Q1"
+    assert results["B2"].value == "问题 <1> & more"
+    assert results["H2"].value == "答案一"
+    assert workbook["Info"]["B2"].value == "导出任务"
+
+
+@pytest.mark.asyncio
+async def test_build_csv_stream_response_batches_rows_per_chunk():
+    items = iter([_item(f"Q{idx}", "答案") for idx in range(50)])
+
+    response = build_csv_stream_response(_task(), items, include_errors=False)
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    # 表头一块，50 行数据合并为一块
+    assert len(chunks) == 2
+    assert chunks[0].startswith("﻿".encode("utf-8"))
+    text = b"".join(chunks).decode("utf-8-sig")
+    assert "question_id,question" in text
+    assert text.count("Q49") == 1
+    assert len(text.splitlines()) == 7 + 50
+
+
+def test_parquet_and_arrow_exports_are_long_format():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    from app.utils.columnar_export import iter_arrow_bytes, iter_parquet_bytes
+
+    task = SimpleNamespace(id="task-1", **vars(_task()))
+    items = [_item("Q1", "答案一"), _item("Q2", "答案二")]
+    items[1].runs.append(SimpleNamespace(**{**vars(items[1].runs[0]), "run_index": 2, "latency_ms": None}))
+
+    table = pq.read_table(pa.BufferReader(b"".join(iter_parquet_bytes(task, iter(items)))))
+    assert table.num_rows == 3
+    assert table.column("question_id").to_pylist() == ["Q1", "Q2", "Q2"]
+    assert table.column("latency_ms").to_pylist() == [150, 150, None]
+    assert table.schema.field("latency_ms").type == pa.int32()
+
+    reader = pa.ipc.open_stream(b"".join(iter_arrow_bytes(task, iter(items), include_errors=False)))
+    streamed = reader.read_all()
+    assert streamed.column("output").to_pylist() == ["答案一", "答案二", "答案二"]
+    assert "error_code" not in streamed.schema.names
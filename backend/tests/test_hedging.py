@@ -0,0 +1,119 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services import hedging
+from app.services.evaluation_runner import _attempt_request, _parse_stream_response
+from app.services.agent_response import AgentResponse
+from app.services.hedging import HedgePolicy, run_hedged
+
+
+def _policy(monkeypatch, *, observed=(100, 50), max_ratio=1.0, requests=0):
+    monkeypatch.setattr(hedging.task_events, "get_latency_percentile", lambda task_id, percentile: observed)
+    policy = HedgePolicy("task-1", percentile=0.9, max_ratio=max_ratio, min_samples=20)
+    policy.requests = requests
+    return policy
+
+
+def _call_with_delays(delays):
+    """Each invocation sleeps for the next delay unless cancelled; records cancel events."""
+    calls = []
+    lock = threading.Lock()
+
+    def call(cancel):
+        with lock:
+            index = len(calls)
+            calls.append(cancel)
+        if cancel.wait(delays[index]):
+            return AgentResponse("", "CANCELLED", "lost", int(delays[index] * 1000))
+        return AgentResponse(f"answer-{index}", None, None, int(delays[index] * 1000), first_token_ms=10)
+
+    return call, calls
+
+
+def test_slow_request_is_hedged_and_loser_cancelled(monkeypatch):
+    policy = _policy(monkeypatch, requests=10)
+    call, calls = _call_with_delays([1.0, 0.01])
+
+    started = time.perf_counter()
+    result = run_hedged(call, policy)
+
+    assert time.perf_counter() - started < 0.5
+    assert result.content == "answer-1"
+    # 延迟从第一次请求开始计算
+    assert result.latency_ms >= 50 and result.first_token_ms >= 50
+    assert policy.hedged == 1
+    assert calls[0].is_set()
+
+
+def test_fast_request_is_not_hedged(monkeypatch):
+    policy = _policy(monkeypatch, requests=10)
+    call, calls = _call_with_delays([0.001])
+
+    assert run_hedged(call, policy).content == "answer-0"
+    assert len(calls) == 1 and policy.hedged == 0
+
+
+def test_hedging_waits_for_enough_samples_and_respects_ratio(monkeypatch):
+    call, calls = _call_with_delays([0.1, 0.1])
+    assert run_hedged(call, _policy(monkeypatch, observed=(5, 10))).content == "answer-0"
+    assert len(calls) == 1
+
+    # 比例上限 0.1：第 1 次请求时不允许对冲
+    call, calls = _call_with_delays([0.1, 0.1])
+    policy = _policy(monkeypatch, max_ratio=0.1)
+    assert run_hedged(call, policy).content == "answer-0"
+    assert len(calls) == 1 and policy.hedged == 0
+
+
+def test_failed_first_finisher_waits_for_the_other(monkeypatch):
+    policy = _policy(monkeypatch, requests=10)
+    results = iter([AgentResponse("slow", None, None, 200), AgentResponse("", "HTTP_500", "boom", 5)])
+    delays = iter([0.2, 0.0])
+    lock = threading.Lock()
+
+    def call(cancel):
+        with lock:
+            delay, result = next(delays), next(results)
+        time.sleep(delay)
+        return result
+
+    assert run_hedged(call, policy).content == "slow"
+
+
+def test_cancelled_agent_stream_stops_reading():
+    cancel = threading.Event()
+    cancel.set()
+    response = SimpleNamespace(iter_lines=lambda: iter(['data: {"event": "llm_chunk"}']))
+    with pytest.raises(hedging.RequestCancelled):
+        _parse_stream_response(response, cancel=cancel)
+
+
+def test_non_stream_loser_stops_reading_when_cancelled():
+    sent = []
+
+    def body():
+        # 慢速非流式响应：每 20ms 输出一块，完整读完需要约 2 秒
+        for _ in range(100):
+            time.sleep(0.02)
+            sent.append(1)
+            yield b" "
+        yield b'{"output": "late"}'
+
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body())))
+    task = SimpleNamespace(
+        id="t", agent_api_url="http://agent/api", agent_api_headers={}, use_stream=False, agent_model=None
+    )
+    item = SimpleNamespace(question_id="q1", question="Q?", user_context=None, system_prompt=None)
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+
+    started = time.perf_counter()
+    result = _attempt_request(client, task, item, SimpleNamespace(run_index=1), cancel=cancel)
+
+    assert result.error_code == "CANCELLED"
+    assert time.perf_counter() - started < 0.5
+    assert len(sent) < 20
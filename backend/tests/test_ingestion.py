@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+from app.db.models.evaluation_task import TaskStatus
+from app.services import ingestion
+
+
+class DummyDB:
+    def __init__(self) -> None:
+        self.commits = 0
+        self.rollbacks = 0
+
+    def add(self, obj):
+        return None
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def _task():
+    return SimpleNamespace(
+        id="task-1",
+        status=TaskStatus.INGESTING,
+        runs_per_item=3,
+        total_items=0,
+        dataset_id=None,
+        failure_reason=None,
+    )
+
+
+def _patch_status(monkeypatch, task):
+    monkeypatch.setattr(ingestion.repo, "get_task", lambda db, task_id: task)
+    monkeypatch.setattr(
+        ingestion.repo, "mark_task_status", lambda db, t, status, **kwargs: setattr(t, "status", status)
+    )
+
+
+def test_ingest_spooled_dataset_inserts_items_and_enqueues(tmp_path, monkeypatch):
+    spool = tmp_path / "suite.csv"
+    spool.write_bytes(b"question,standard_answer\nwhat?,answer\n")
+    task = _task()
+    calls = {}
+    _patch_status(monkeypatch, task)
+    monkeypatch.setattr(
+        ingestion,
+        "register_dataset_bytes",
+        lambda db, filename, raw: SimpleNamespace(id="dataset-1", records=[{"question_id": "q1"}, {"question_id": "q2"}]),
+    )
+    monkeypatch.setattr(ingestion.repo, "bulk_insert_items", lambda db, task_id, items: ["i1", "i2"])
+    monkeypatch.setattr(
+        ingestion.repo,
+        "bulk_create_initial_runs",
+        lambda db, item_ids, runs_per_item: calls.update(runs=(item_ids, runs_per_item)),
+    )
+    monkeypatch.setattr(ingestion, "enqueue_evaluation", lambda task_id: calls.update(enqueued=task_id))
+    db = DummyDB()
+
+    assert ingestion.ingest_spooled_dataset(db, "task-1", str(spool)) is True
+
+    assert task.status == TaskStatus.PENDING
+    assert task.total_items == 2
+    assert task.dataset_id == "dataset-1"
+    assert calls == {"runs": (["i1", "i2"], 3), "enqueued": "task-1"}
+    assert not spool.exists()
+
+
+def test_ingest_spooled_dataset_marks_validation_failures(tmp_path, monkeypatch):
+    spool = tmp_path / "broken.csv"
+    spool.write_bytes(b"foo,bar\n1,2\n")
+    task = _task()
+    enqueued = []
+    _patch_status(monkeypatch, task)
+    monkeypatch.setattr(ingestion, "enqueue_evaluation", enqueued.append)
+    monkeypatch.setattr("app.services.dataset_service.dataset_repo.get_dataset_by_hash", lambda db, digest: None)
+    db = DummyDB()
+
+    assert ingestion.ingest_spooled_dataset(db, "task-1", str(spool)) is False
+
+    assert task.status == TaskStatus.FAILED
+    assert task.failure_reason == "文件缺少 question 或 standard_answer 列"
+    assert db.rollbacks == 1
+    assert enqueued == []
+    assert not spool.exists()
+
+
+def test_ingest_spooled_dataset_skips_tasks_already_ingested(tmp_path, monkeypatch):
+    task = _task()
+    task.status = TaskStatus.PENDING
+    monkeypatch.setattr(ingestion.repo, "get_task", lambda db, task_id: task)
+
+    assert ingestion.ingest_spooled_dataset(DummyDB(), "task-1", str(tmp_path / "missing.csv")) is False
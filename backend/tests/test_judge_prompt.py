@@ -0,0 +1,59 @@
+import time
+from types import SimpleNamespace
+
+from app.services import correction_service as correction_module
+from app.services.judge_prompt import compact_judge_input, dedupe_blocks, estimate_tokens, truncate_to_tokens
+
+
+def test_dedupe_blocks_drops_echoed_node_output():
+    streamed = "法国的首都是巴黎，位于塞纳河畔。\n常住人口约两百一十万。"
+    assert dedupe_blocks(f"{streamed}\n{streamed}\n好的\n好的") == f"{streamed}\n好的\n好的"
+
+
+def test_dedupe_blocks_is_linear_on_large_outputs():
+    text = "\n".join(f"第 {index} 行输出内容，用于测试去重耗时" for index in range(20000))
+
+    started = time.perf_counter()
+    assert dedupe_blocks(text + "\n" + text) == text
+    assert time.perf_counter() - started < 0.5
+
+
+def test_truncate_keeps_head_and_tail_within_budget():
+    text = "开头" + "中" * 2000 + "结论是巴黎"
+    truncated, cut = truncate_to_tokens(text, 200)
+
+    assert cut is True
+    assert estimate_tokens(truncated) <= 200
+    assert truncated.startswith("开头") and truncated.endswith("结论是巴黎")
+    assert truncate_to_tokens("短答案", 200) == ("短答案", False)
+
+
+def test_compact_judge_input_strips_reasoning_and_fits_budget():
+    output = "<think>" + "思考" * 3000 + "</think>" + "答" * 5000
+    compact = compact_judge_input("问题?", "巴黎", output, max_tokens=1000, overhead_tokens=200)
+
+    assert compact.truncated is True
+    assert "<think>" not in compact.agent_output
+    assert compact.estimated_tokens <= 1000
+    assert compact.question == "问题?" and compact.standard_answer == "巴黎"
+
+
+def test_correction_service_reports_truncated_prompt(monkeypatch):
+    sent = []
+
+    def create(**kwargs):
+        sent.append(kwargs["messages"][-1]["content"])
+        message = SimpleNamespace(content='{"is_correct": false, "reason": "不一致"}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None, model_dump=lambda: {})
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(correction_module.settings, "zhipu_api_key", "key")
+    monkeypatch.setattr(correction_module.settings, "correction_prompt_max_tokens", 600)
+    monkeypatch.setattr(correction_module, "get_shared_client", lambda **kwargs: client)
+
+    outcome = correction_module.CorrectionService().evaluate(
+        question="首都?", standard_answer="巴黎", agent_output="很长的回答" * 500
+    )
+
+    assert outcome.stage == "LLM" and outcome.prompt_truncated is True
+    assert estimate_tokens(sent[0]) <= 600
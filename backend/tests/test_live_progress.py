@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from app.db.repositories import evaluation_tasks as repo
+from app.utils import live_progress
+
+
+class DummyDB:
+    def __init__(self):
+        self.added = []
+        self.executed = []
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def execute(self, stmt):
+        self.executed.append(stmt)
+
+
+def test_should_checkpoint_by_interval_and_completion(monkeypatch):
+    monkeypatch.setattr(live_progress.settings, "progress_checkpoint_interval", 5)
+    monkeypatch.setattr(live_progress.settings, "progress_checkpoint_seconds", 3600)
+    live_progress._last_checkpoint["task-1"] = (0, live_progress.time.monotonic())
+
+    decisions = [live_progress.should_checkpoint("task-1", n, 12) for n in range(1, 13)]
+
+    assert [n for n, due in enumerate(decisions, start=1) if due] == [5, 10, 12]
+    live_progress.forget_checkpoint("task-1")
+
+
+def test_increment_task_progress_falls_back_to_row_update(monkeypatch):
+    monkeypatch.setattr(live_progress, "incr_processed", lambda task_id, increment=1: None)
+    monkeypatch.setattr(repo.task_events, "publish_task_event", lambda *args, **kwargs: None)
+    task = SimpleNamespace(id="task-1", status="RUNNING", progress_processed=2, total_items=3)
+    db = DummyDB()
+
+    processed = repo.increment_task_progress(db, task, increment=5)
+
+    assert processed == 3
+    assert task.progress_processed == 3
+    assert db.added == [task]
+
+
+def test_increment_task_progress_uses_live_counter_without_row_write(monkeypatch):
+    monkeypatch.setattr(live_progress, "incr_processed", lambda task_id, increment=1: 4)
+    monkeypatch.setattr(live_progress, "should_checkpoint", lambda *args: False)
+    monkeypatch.setattr(repo.task_events, "publish_task_event", lambda *args, **kwargs: None)
+    task = SimpleNamespace(id="task-1", status="RUNNING", progress_processed=0, total_items=10)
+    db = DummyDB()
+
+    processed = repo.increment_task_progress(db, task)
+
+    assert processed == 4
+    assert task.progress_processed == 0
+    assert db.added == [] and db.executed == []
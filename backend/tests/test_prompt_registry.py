@@ -0,0 +1,54 @@
+import os
+from types import SimpleNamespace
+
+from app.services import zhipu_runner
+from app.services.prompt_registry import PromptRegistry
+
+
+def test_registry_rereads_only_when_mtime_changes(tmp_path, monkeypatch):
+    path = tmp_path / "prompt.txt"
+    path.write_text(" first \n", encoding="utf-8")
+    registry = PromptRegistry()
+    reads = []
+    original_read = type(path).read_text
+
+    def counting_read(self, *args, **kwargs):
+        reads.append(self)
+        return original_read(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(path), "read_text", counting_read)
+
+    assert registry.get(path) == "first"
+    assert registry.get(path) == "first"
+    assert len(reads) == 1
+
+    path.write_text("second", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert registry.get(path) == "second"
+    assert len(reads) == 2
+
+
+def test_registry_returns_empty_for_missing_file(tmp_path):
+    assert PromptRegistry().get(tmp_path / "missing.txt", warn_missing=False) == ""
+
+
+def test_runner_resolves_task_prefix_once(monkeypatch):
+    calls = []
+
+    def fake_resolve(task):
+        calls.append(task.id)
+        return "task prompt"
+
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_api_key", "key")
+    monkeypatch.setattr(zhipu_runner, "get_shared_client", lambda **kwargs: None)
+    monkeypatch.setattr(zhipu_runner, "_resolve_task_prompt", fake_resolve)
+    runner = zhipu_runner.ZhipuRunner()
+    task = SimpleNamespace(id="task-1", agent_api_headers={})
+
+    first = runner.message_prefix(task)
+    second = runner.message_prefix(task)
+
+    assert first is second
+    assert first == ({"role": "system", "content": "task prompt"},)
+    assert calls == ["task-1"]
@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.models.evaluation_task import EvaluationItem, EvaluationRun, EvaluationTask, ResponseBlob
+from app.db.repositories import evaluation_tasks as repo
+from app.db.session import Base
+from app.utils.compression import compress_text, content_hash, decompress_text
+
+
+class RecordingDB:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+
+
+def test_compress_round_trip_preserves_text():
+    text = "<think>\n推理过程\n</think>\n最终答案" * 50
+
+    codec, payload = compress_text(text)
+
+    assert len(payload) < len(text.encode("utf-8"))
+    assert decompress_text(codec, payload) == text
+
+
+def test_store_response_blob_is_content_addressed():
+    db = RecordingDB()
+
+    first = repo.store_response_blob(db, "same answer")
+    second = repo.store_response_blob(db, "same answer")
+
+    assert first == second == content_hash("same answer")
+    assert "ON CONFLICT" in str(db.statements[0].compile(dialect=_pg_dialect()))
+    assert repo.store_response_blob(db, "") is None
+
+
+def test_run_response_body_prefers_blob_over_legacy_text():
+    codec, payload = compress_text("compressed answer")
+    run = EvaluationRun(run_index=1, response_text="legacy answer")
+    assert run.response_body == "legacy answer"
+
+    run.response_blob = ResponseBlob(content_hash=content_hash("compressed answer"), codec=codec, payload=payload)
+    assert run.response_body == "compressed answer"
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
+
+
+def _pending_run(db):
+    task = EvaluationTask(task_name="t", agent_api_url="http://agent")
+    item = EvaluationItem(task=task, question_id="q1", question="问题", standard_answer="答案")
+    run = EvaluationRun(item=item, run_index=1)
+    db.add_all([task, item, run])
+    db.commit()
+    return run
+
+
+def _update(db, run, **kwargs):
+    repo.update_run_result(
+        db, run, status="SUCCESS", latency_ms=10, error_code=None, error_message=None, **kwargs
+    )
+    db.add(run)
+    db.commit()
+
+
+def test_update_run_result_commits_through_real_session(session):
+    first = _pending_run(session)
+    _update(session, first, response_body="same answer")
+    assert first.response_body == "same answer"
+
+    # 第二次写入相同内容复用已有 blob
+    second = EvaluationRun(item_id=first.item_id, run_index=2)
+    session.add(second)
+    session.commit()
+    _update(session, second, response_body="same answer")
+
+    assert session.query(ResponseBlob).count() == 1
+    session.expire_all()
+    assert second.response_body == "same answer"
+
+
+def _pg_dialect():
+    from sqlalchemy.dialects import postgresql
+
+    return postgresql.dialect()
+
+
+def test_update_run_result_stores_reasoning_through_real_session(session):
+    run = _pending_run(session)
+    _update(session, run, response_body="最终答案", reasoning="推理过程")
+
+    assert run.reasoning_body == "推理过程"
+    assert session.query(ResponseBlob).count() == 2
+    session.expire_all()
+    assert run.reasoning_body == "推理过程"
+    assert run.response_body == "最终答案"
@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.db.models.evaluation_task import EvaluationItem, EvaluationRun, EvaluationTask
+from app.db.repositories import evaluation_tasks as repo
+from app.db.session import Base
+from app.services import retention
+
+
+class DummyDB:
+    def add(self, obj):
+        return None
+
+    def flush(self):
+        return None
+
+
+def _make_item(question_id: str, is_passed: bool):
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    run = SimpleNamespace(
+        id=f"run-{question_id}",
+        run_index=1,
+        status="SUCCEEDED",
+        response_body="answer",
+        reasoning_body="thinking",
+        latency_ms=120,
+        first_token_ms=40,
+        tokens_per_second=25.0,
+        prompt_tokens=12,
+        completion_tokens=2,
+        reasoning_tokens=None,
+        cost=0.0001,
+        error_code=None,
+        error_message=None,
+        correction_status="SUCCESS",
+        correction_result=is_passed,
+        correction_reason="ok",
+        correction_error_message=None,
+        correction_retries=0,
+        correction_prompt_tokens=300,
+        correction_completion_tokens=20,
+        correction_cost=0.0008,
+        correction_stage="LLM",
+        correction_prompt_truncated=False,
+        created_at=created,
+        updated_at=created,
+    )
+    return SimpleNamespace(
+        id=f"item-{question_id}",
+        row_index=1,
+        question_id=question_id,
+        question="Q?",
+        standard_answer="A",
+        system_prompt=None,
+        user_context=None,
+        session_group=None,
+        answer_pattern=None,
+        answer_keywords="巴黎",
+        is_passed=is_passed,
+        created_at=created,
+        runs=[run],
+    )
+
+
+def test_archive_and_restore_round_trip(monkeypatch, tmp_path):
+    monkeypatch.setattr(retention.settings, "archive_dir", str(tmp_path))
+    items = [_make_item("Q1", True), _make_item("Q2", False)]
+    deleted = []
+    restored_records = []
+    monkeypatch.setattr(retention.repo, "list_items_for_task", lambda db, task_id, **kwargs: items)
+    monkeypatch.setattr(retention.repo, "delete_task_details", lambda db, task_id: deleted.append(task_id))
+
+    def fake_restore_items(db, *, task_id, records):
+        restored_records.extend(records)
+        return len(restored_records)
+
+    monkeypatch.setattr(retention.repo, "restore_items", fake_restore_items)
+    task = SimpleNamespace(id="task-1", archived_at=None, archive_path=None, summary_stats=None)
+
+    path = retention.archive_task(DummyDB(), task)
+
+    assert path.exists() and path.name == "task-1.jsonl.gz"
+    assert deleted == ["task-1"]
+    assert task.archived_at is not None
+    assert task.summary_stats["passed"] == 1
+    assert task.summary_stats["run_status_counts"] == {"SUCCEEDED": 2}
+
+    assert retention.restore_task(DummyDB(), task) == 2
+    assert [record["question_id"] for record in restored_records] == ["Q1", "Q2"]
+    assert restored_records[0]["runs"][0]["reasoning_body"] == "thinking"
+    assert restored_records[0]["runs"][0]["first_token_ms"] == 40
+    assert task.archived_at is None
+
+
+def test_archive_expired_tasks_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(retention.settings, "retention_days", 0)
+
+    assert retention.archive_expired_tasks(DummyDB()) == 0
+
+
+def test_concurrent_reads_restore_an_archived_task_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(retention.settings, "archive_dir", str(tmp_path))
+    engine = create_engine(f"sqlite:///{tmp_path / 'eval.db'}")
+    # 归档删除明细依赖 ON DELETE CASCADE
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        task = EvaluationTask(id="task-1", task_name="t", agent_api_url="http://agent")
+        item = EvaluationItem(task=task, question_id="q1", question="问题", standard_answer="答案")
+        db.add_all([task, item, EvaluationRun(item=item, run_index=1)])
+        db.flush()
+        repo.update_run_result(
+            db, item.runs[0], status="SUCCEEDED", response_body="答案", latency_ms=10, error_code=None, error_message=None
+        )
+        db.commit()
+        retention.archive_task(db, task)
+        db.commit()
+
+    first, second = Session(engine), Session(engine)
+    try:
+        # 两个请求都读到了归档状态，其中一个先完成恢复
+        stale = first.get(EvaluationTask, "task-1")
+        retention.ensure_task_hydrated(second, second.get(EvaluationTask, "task-1"))
+        assert stale.archived_at is not None
+
+        retention.ensure_task_hydrated(first, stale)
+
+        assert stale.archived_at is None
+        assert first.query(EvaluationItem).count() == 1
+        assert first.query(EvaluationRun).one().response_body == "答案"
+    finally:
+        first.close()
+        second.close()
+        engine.dispose()
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from app.core import redis as redis_support
+from app.utils import task_events
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def zadd(self, key, mapping):
+        self.ops.append(lambda: self.client.zadd(key, mapping))
+
+    def expire(self, key, ttl):
+        self.ops.append(lambda: True)
+
+    def zrange(self, key, start, end, withscores=False):
+        self.ops.append(lambda: self.client.zrange(key, start, end, withscores=withscores))
+
+    def execute(self):
+        return [op() for op in self.ops]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+        self.zsets = {}
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zrange(self, key, start, end, withscores=False):
+        ordered = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1])
+        return [(member, float(score)) for member, score in ordered[start : end + 1]]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(redis_support, "get_redis_client", lambda: client)
+    monkeypatch.setattr(redis_support, "_unavailable_until", 0.0)
+    return client
+
+
+def test_publish_task_event_uses_task_channel(fake_redis):
+    task_events.publish_task_event("task-1", "progress", {"processed": 3, "total": 10})
+
+    channel, message = fake_redis.published[0]
+    assert channel == task_events.task_channel("task-1")
+    assert message == {"event": "progress", "task_id": "task-1", "processed": 3, "total": 10}
+
+
+def test_record_run_latency_returns_running_percentiles(fake_redis):
+    for idx, latency in enumerate([100, 200, 300, 400, 1000], start=1):
+        stats = task_events.record_run_latency("task-1", f"run-{idx}", latency)
+
+    assert stats == {"count": 5, "p50_ms": 300, "p95_ms": 1000, "max_ms": 1000}
+
+
+def test_publish_failure_pauses_event_publishing(monkeypatch):
+    class BrokenRedis:
+        calls = 0
+
+        def publish(self, channel, message):
+            BrokenRedis.calls += 1
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(redis_support, "get_redis_client", lambda: BrokenRedis())
+    monkeypatch.setattr(redis_support, "_unavailable_until", 0.0)
+
+    task_events.publish_task_event("task-1", "progress", {})
+    task_events.publish_task_event("task-1", "progress", {})
+
+    assert BrokenRedis.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_task_events_closes_for_finished_task():
+    frames = [
+        frame
+        async for frame in task_events.stream_task_events(
+            "task-1", snapshot={"task_id": "task-1", "status": "SUCCEEDED", "processed": 2, "total": 2}
+        )
+    ]
+
+    assert len(frames) == 1
+    assert frames[0].startswith("event: snapshot\n")
+    assert '"processed": 2' in frames[0]
@@ -21,8 +21,20 @@ def test_parse_headers_rejects_invalid_json():
     assert exc.value.detail["code"] == "INVALID_AGENT_HEADERS"
 
 
+class DummySession:
+    def __init__(self) -> None:
+        self.committed = False
+        self.rolled_back = False
+
+    def commit(self) -> None:
+        self.committed = True
+
+    def rollback(self) -> None:
+        self.rolled_back = True
+
+
 @pytest.mark.asyncio
-async def test_create_evaluation_task_with_enable_correction(monkeypatch):
+async def test_create_evaluation_task_with_enable_correction(tmp_path, monkeypatch):
     payload = TaskCreateRequest(
         task_name="demo task",
         agent_api_url="http://agent.example.com/api",
@@ -36,59 +48,23 @@ async def test_create_evaluation_task_with_enable_correction(monkeypatch):
 
     created_kwargs = {}
 
-    class DummyTask:
-        def __init__(self) -> None:
-            self.id = "task-123"
-
-    dummy_items = [types.SimpleNamespace(id="item-1")]
-
     def fake_create_task(db, **kwargs):
         created_kwargs.update(kwargs)
-        return DummyTask()
-
-    def fake_bulk_insert_items(db, *, task_id, items):
-        assert task_id == "task-123"
-        return dummy_items
-
-    def fake_create_initial_runs(db, *, item, runs_per_item):
-        assert item.id == "item-1"
-        assert runs_per_item == task_service.settings.runs_per_item
-
-    async def fake_load_dataset(upload):
-        return (
-            [
-                {
-                    "question_id": "q-1",
-                    "question": "Sample question",
-                    "standard_answer": "Sample answer",
-                }
-            ],
-            b"raw-bytes",
-        )
-
-    class DummySession:
-        def __init__(self) -> None:
-            self.committed = False
-            self.rolled_back = False
-
-        def commit(self) -> None:
-            self.committed = True
-
-        def rollback(self) -> None:
-            self.rolled_back = True
+        return types.SimpleNamespace(id="task-123", dataset_id=None)
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("the request must not parse the dataset")
 
     dummy_db = DummySession()
     enqueue_calls = []
 
+    monkeypatch.setattr(task_service.settings, "uploads_dir", str(tmp_path))
     monkeypatch.setattr(task_service.repo, "create_task", fake_create_task)
-    monkeypatch.setattr(task_service.repo, "bulk_insert_items", fake_bulk_insert_items)
-    monkeypatch.setattr(task_service.repo, "create_initial_runs", fake_create_initial_runs)
-    monkeypatch.setattr(task_service, "load_dataset", fake_load_dataset)
-    monkeypatch.setattr(task_service, "save_dataset_file", lambda *args, **kwargs: None)
+    monkeypatch.setattr(task_service.repo, "bulk_insert_items", fail_parse)
     monkeypatch.setattr(
-        task_service.run_evaluation_task,
+        task_service.ingest_task_dataset,
         "delay",
-        lambda task_id: enqueue_calls.append(task_id),
+        lambda task_id, spool_path: enqueue_calls.append((task_id, spool_path)),
     )
 
     response = await task_service.create_evaluation_task(
@@ -99,6 +75,31 @@ async def test_create_evaluation_task_with_enable_correction(monkeypatch):
 
     assert dummy_db.committed is True
     assert created_kwargs["enable_correction"] is True
+    assert created_kwargs["status"] == "INGESTING"
+    assert response.status == "INGESTING"
     assert response.enable_correction is True
     assert response.task_id == "task-123"
-    assert enqueue_calls == ["task-123"]
+    spooled = tmp_path / "task-123" / "dataset.csv"
+    assert enqueue_calls == [("task-123", str(spooled))]
+    assert spooled.read_bytes() == b"question,standard_answer\nwhat?,answer\n"
+
+
+def test_create_task_from_dataset_inserts_items_synchronously(monkeypatch):
+    payload = TaskCreateRequest(task_name="nightly", agent_api_url="http://agent.example.com/api")
+    task = types.SimpleNamespace(id="task-9", dataset_id=None, runs_per_item=2, total_items=0)
+    dataset = types.SimpleNamespace(id="dataset-1", records=[{"question_id": "q-1"}])
+    inserted = {}
+
+    monkeypatch.setattr(task_service, "get_dataset_for_task", lambda db, dataset_id: dataset)
+    monkeypatch.setattr(task_service.repo, "create_task", lambda db, **kwargs: task)
+    monkeypatch.setattr(
+        task_service, "populate_task_from_dataset", lambda db, t, ds: inserted.update(task=t, dataset=ds)
+    )
+    monkeypatch.setattr(task_service, "enqueue_evaluation", lambda task_id: inserted.update(enqueued=task_id))
+    dummy_db = DummySession()
+
+    response = task_service.create_task_from_dataset(dummy_db, payload=payload, dataset_id="dataset-1")
+
+    assert dummy_db.committed is True
+    assert inserted == {"task": task, "dataset": dataset, "enqueued": "task-9"}
+    assert response.status == "PENDING"
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.models.evaluation_task import TaskStatus
+from app.services import evaluation_runner, usage
+from app.services.agent_response import AgentResponse
+
+
+def test_normalize_usage_reads_sdk_objects_and_dicts():
+    sdk_usage = SimpleNamespace(
+        prompt_tokens=10,
+        completion_tokens=5,
+        completion_tokens_details=SimpleNamespace(reasoning_tokens=3),
+    )
+    assert usage.normalize_usage(sdk_usage) == usage.TokenUsage(10, 5, 3)
+    assert usage.normalize_usage({"prompt_tokens": "7", "completion_tokens": 2}) == usage.TokenUsage(7, 2, None)
+    assert usage.normalize_usage({"total": 3}) is None
+    assert usage.normalize_usage(None) is None
+
+
+def test_usage_cost_uses_per_thousand_pricing(monkeypatch):
+    monkeypatch.setattr(
+        usage.settings, "token_pricing", {"glm-4.6": {"prompt": 0.002, "completion": 0.008}}
+    )
+    assert usage.usage_cost("glm-4.6", usage.TokenUsage(1000, 500)) == pytest.approx(0.006)
+    assert usage.usage_cost("unknown", usage.TokenUsage(1000, 500)) is None
+
+
+def test_token_budget_raises_once_exceeded():
+    budget = usage.TokenBudget(100, used=60)
+    budget.add(40)
+    budget.check()
+    budget.add(1)
+    with pytest.raises(usage.TokenBudgetExceeded):
+        budget.check()
+    unlimited = usage.TokenBudget(0)
+    unlimited.add(10**9)
+    unlimited.check()
+
+
+class FakeZhipuRunner:
+    model_id = "glm-4.6"
+
+    def execute_many(self, task, item, runs, deadline=None):
+        return [
+            AgentResponse("ok", None, None, 100, prompt_tokens=400, completion_tokens=100)
+            for _ in runs
+        ]
+
+
+def test_process_task_stops_when_token_budget_is_exhausted(monkeypatch, run_process_task):
+    monkeypatch.setattr(evaluation_runner.settings, "token_pricing", {"glm-4.6": {"prompt": 0.001, "completion": 0.002}})
+
+    task, written = run_process_task(FakeZhipuRunner, total_items=4, token_budget=1200)
+
+    # 每题 500 token：前两题累计 1000 未超，第三题后 1500 超出预算，第四题不再执行
+    assert len(written) == 3
+    assert written[0]["cost"] == pytest.approx(0.0006)
+    assert written[0]["prompt_tokens"] == 400
+    assert task.status == TaskStatus.FAILED
+    assert "token 预算耗尽" in task.failure_reason
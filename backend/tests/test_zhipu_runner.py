@@ -0,0 +1,142 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import zhipu_runner
+
+
+class FakeCompletions:
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def create(self, **payload):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        message = SimpleNamespace(content=f"answer to {payload['messages'][-1]['content']}", reasoning_content=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], model_dump=lambda: {})
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_api_key", "key")
+    monkeypatch.setattr(zhipu_runner, "ZhipuAiClient", lambda api_key, **options: client)
+    monkeypatch.setattr(zhipu_runner, "_shared_clients", {})
+    monkeypatch.setattr(zhipu_runner, "_model_semaphores", {})
+    return completions
+
+
+def _item():
+    return SimpleNamespace(question_id="q1", question="1+1?", user_context=None, system_prompt="be brief")
+
+
+def test_shared_client_is_reused_across_runners(fake_client):
+    assert zhipu_runner.ZhipuRunner().client is zhipu_runner.ZhipuRunner().client
+
+
+def test_execute_many_fans_out_runs_in_order(fake_client, monkeypatch):
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_run_concurrency", 5)
+    runs = [SimpleNamespace(run_index=index) for index in range(1, 6)]
+    task = SimpleNamespace(id="task-1", agent_api_headers={})
+
+    started = time.perf_counter()
+    results = zhipu_runner.ZhipuRunner().execute_many(task, _item(), runs)
+    elapsed = time.perf_counter() - started
+
+    assert [result.content for result in results] == ["answer to 1+1?"] * 5
+    assert fake_client.peak == 5
+    assert elapsed < 5 * fake_client.delay
+
+
+def test_model_semaphore_caps_concurrency_across_runners(fake_client, monkeypatch):
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_run_concurrency", 6)
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_max_concurrency_per_model", 2)
+    runs = [SimpleNamespace(run_index=index) for index in range(1, 7)]
+    task = SimpleNamespace(id="task-1", agent_api_headers={})
+
+    zhipu_runner.ZhipuRunner().execute_many(task, _item(), runs)
+
+    assert fake_client.peak == 2
+
+
+def _chunk(content=None, reasoning=None, usage=None):
+    delta = SimpleNamespace(content=content, reasoning_content=reasoning)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)] if content or reasoning else [], usage=usage)
+
+
+def test_stream_assembles_content_and_captures_first_token(fake_client, monkeypatch):
+    requests = []
+
+    def stream_create(**payload):
+        requests.append(payload)
+
+        def chunks():
+            time.sleep(0.02)
+            yield _chunk(reasoning="think ")
+            time.sleep(0.02)
+            yield _chunk(content="Hel")
+            yield _chunk(content="lo")
+            yield _chunk(usage=SimpleNamespace(prompt_tokens=12, completion_tokens=4))
+
+        return chunks()
+
+    monkeypatch.setattr(fake_client, "create", stream_create)
+    task = SimpleNamespace(id="task-1", agent_api_headers={}, use_stream=True)
+
+    result = zhipu_runner.ZhipuRunner().execute(task, _item(), SimpleNamespace(run_index=1))
+
+    assert requests[0]["stream"] is True
+    assert result.error_code is None
+    assert result.content == "Hello"
+    assert result.reasoning == "think"
+    assert 15 <= result.first_token_ms < result.latency_ms
+    assert (result.prompt_tokens, result.completion_tokens) == (12, 4)
+    assert result.tokens_per_second > 0
+
+
+def test_non_stream_run_records_usage(fake_client, monkeypatch):
+    original = fake_client.create
+
+    def create_with_usage(**payload):
+        response = original(**payload)
+        response.usage = SimpleNamespace(prompt_tokens=7, completion_tokens=3)
+        return response
+
+    monkeypatch.setattr(fake_client, "create", create_with_usage)
+    task = SimpleNamespace(id="task-1", agent_api_headers={}, use_stream=False)
+
+    result = zhipu_runner.ZhipuRunner().execute(task, _item(), SimpleNamespace(run_index=1))
+
+    assert result.first_token_ms is None
+    assert (result.prompt_tokens, result.completion_tokens) == (7, 3)
+
+
+def test_latency_excludes_time_queued_on_model_semaphore(fake_client, monkeypatch):
+    def stream_create(**payload):
+        def chunks():
+            time.sleep(0.1)
+            yield _chunk(content="答案")
+
+        return chunks()
+
+    monkeypatch.setattr(fake_client, "create", stream_create)
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_run_concurrency", 3)
+    monkeypatch.setattr(zhipu_runner.settings, "zhipu_max_concurrency_per_model", 1)
+    task = SimpleNamespace(id="task-1", agent_api_headers={}, use_stream=True)
+    runs = [SimpleNamespace(run_index=index) for index in range(1, 4)]
+
+    results = zhipu_runner.ZhipuRunner().execute_many(task, _item(), runs)
+
+    # 三次调用串行执行，但每次的耗时只包含自身调用
+    assert all(90 <= result.first_token_ms < 190 for result in results)
+    assert all(result.latency_ms < 190 for result in results)
@@ -19,6 +19,9 @@ export const createTask = async (
   formData.append('agent_api_url', data.agent_api_url);
   formData.append('dataset_file', data.dataset_file, data.dataset_file.name);
   formData.append('enable_correction', String(data.enable_correction));
+  if (data.hedge_requests !== undefined) {
+    formData.append('hedge_requests', String(data.hedge_requests));
+  }
 
   const response = await apiClient.post<CreateTaskResponse>(
     '/v1/evaluation-tasks',
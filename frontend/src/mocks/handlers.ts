@@ -178,7 +178,7 @@ export const handlers = [
 
     const response: CreateTaskResponse = {
       task_id: generateTaskId(),
-      status: TaskStatus.PENDING,
+      status: TaskStatus.INGESTING,
       enable_correction: false,
     };
 
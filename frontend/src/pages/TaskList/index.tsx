@@ -65,6 +65,7 @@ const TaskList: React.FC = () => {
   // 状态Tag颜色映射
   const getStatusTag = (status: TaskStatus) => {
     const statusConfig = {
+      [TaskStatus.INGESTING]: { color: 'default', text: '导入中' },
       [TaskStatus.PENDING]: { color: 'default', text: '等待中' },
       [TaskStatus.RUNNING]: { color: 'processing', text: '运行中' },
       [TaskStatus.SUCCEEDED]: { color: 'success', text: '已完成' },
@@ -82,7 +83,11 @@ const TaskList: React.FC = () => {
 
     // FAILED状态用红色显示实际进度
     if (status === TaskStatus.FAILED) {
-      return <span style={{ color: '#ff4d4f' }}>{progressText}</span>;
+      return (
+        <span style={{ color: '#ff4d4f' }} title={task.failure_reason ?? undefined}>
+          {progressText}
+        </span>
+      );
     }
 
     return progressText;
@@ -150,7 +155,7 @@ const TaskList: React.FC = () => {
         if (!record.enable_correction) {
           return '-';
         }
-        if (record.status === TaskStatus.PENDING) {
+        if (record.status === TaskStatus.PENDING || record.status === TaskStatus.INGESTING) {
           return '-';
         }
         if (record.status === TaskStatus.RUNNING) {
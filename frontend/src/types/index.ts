@@ -2,6 +2,7 @@
  * 任务状态枚举
  */
 export const TaskStatus = {
+  INGESTING: 'INGESTING',
   PENDING: 'PENDING',
   RUNNING: 'RUNNING',
   SUCCEEDED: 'SUCCEEDED',
@@ -44,6 +45,9 @@ export interface EvaluationTask {
   updated_at: string;
   completed_at: string | null;
   duration_seconds: number | null;
+  failure_reason?: string | null;
+  total_tokens?: number | null;
+  total_cost?: number | null;
 }
 
 /**
@@ -53,7 +57,14 @@ export interface EvaluationRun {
   run_index: number;
   status: RunStatus;
   response_body: string | null;
+  reasoning_body?: string | null;
   latency_ms: number | null;
+  first_token_ms?: number | null;
+  tokens_per_second?: number | null;
+  prompt_tokens?: number | null;
+  completion_tokens?: number | null;
+  reasoning_tokens?: number | null;
+  cost?: number | null;
   error_code: string | null;
   error_message: string | null;
   created_at: string;
@@ -62,6 +73,13 @@ export interface EvaluationRun {
   correction_reason?: string | null;
   correction_error_message?: string | null;
   correction_retries?: number | null;
+  correction_prompt_tokens?: number | null;
+  correction_completion_tokens?: number | null;
+  correction_cost?: number | null;
+  /** 给出判定的阶段：EXACT/NUMERIC/DATE/PATTERN/KEYWORDS/SIMILARITY 为本地判定，LLM 为模型判定 */
+  correction_stage?: string | null;
+  /** 判定输入是否因超出 token 预算被截断 */
+  correction_prompt_truncated?: boolean | null;
 }
 
 /**
@@ -110,6 +128,8 @@ export interface CreateTaskRequest {
   agent_api_url: string;
   dataset_file: File;
   enable_correction: boolean;
+  /** 智能体接口幂等时可开启请求对冲，降低长尾耗时 */
+  hedge_requests?: boolean;
 }
 
 /**